@@ -1,61 +1,95 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
 
-from data_handling.ipc_data import generar_cashflows_df_ipc, generar_flujos_real_df_ipc
-from data_handling.shared_data import (
-    calcular_convexidad,
-    calcular_cupon_corrido,
-    calcular_duracion_mod,
-    calcular_dv01,
-    calcular_macaulay,
-    calcular_precio_sucio_desde_VP,
-    calcular_tir_desde_df,
-    clasificar_precio_limpio,
+from data_handling.archivos_data import compartir_archivo
+from data_handling.curva_data import obtener_curva_cero, tabla_curva_cero
+from data_handling.simulacion_data import simular_escenarios_ipc
+from data_handling.valoracion_data import (
+    cancelar_valoracion,
+    metricas_calculadora,
+    tir_inversion,
+    valorar_por_etapas,
+)
+from utils.cache_streamlit import (
+    generar_cashflows_df_ipc_cache,
+    generar_flujos_real_df_ipc_cache,
+)
+from utils.ui_helpers import (
+    botones_descarga,
+    display_errors,
+    mostrar_valoracion,
+    selector_descuento,
 )
-from logic.ipc_logic import sumar_spread_ipc
-from utils.ui_helpers import display_errors
 from utils.validation import validate_inputs
 
 # Initialize session state
 if "uploaded_file" not in st.session_state:
     st.session_state.uploaded_file = None  # Store the uploaded file persistently
+if "version_uploader" not in st.session_state:
+    st.session_state.version_uploader = 0  # Cambia para vaciar el uploader
+if "valoracion_ipc" not in st.session_state:
+    st.session_state.valoracion_ipc = None  # Valoración en segundo plano
 
 
-# Function to store the uploaded file persistently
-def store_file():
-    st.session_state.uploaded_file = st.session_state.file_uploader_key
+# Function to store the uploaded file persistently (only a reference to the shared
+# store, which keeps one copy per file content across sessions)
+def store_file(clave: str):
+    st.session_state.uploaded_file = compartir_archivo(st.session_state[clave])
+    # Uploader nuevo con otra llave: el anterior deja de mostrarse y Streamlit descarta
+    # su UploadedFile al terminar la ejecución, así la sesión no guarda una segunda copia
+    st.session_state.version_uploader += 1
 
 
 # Title
 st.title("Calculadora IPC")
 st.divider()
 
-upload_col1, upload_col2 = st.columns(2)
 
-with upload_col1:
-    # Radio button to enable/disable file uploader (Outside Form)
-    radio_data = st.radio(
-        "**Fuente de Datos**",
-        ("Online", "Excel de Proyecciones"),
-        key="radio_option",
-        index=1,
-        disabled=True,
-    )
+@st.fragment
+def fuente_datos():
+    """
+    Fuente de datos y archivo de proyecciones. Es un fragmento: cambiarlos no vuelve a
+    ejecutar la página (se leen al enviar el formulario).
 
-with upload_col2:
-    # Clear uploaded file when switching to "Online"
-    if st.session_state.radio_option == "Online":
-        st.session_state.uploaded_file = None  # Reset uploaded file
-
-    # Display file uploader only if "Excel" is selected
-    if st.session_state.radio_option == "Excel de Proyecciones":
-        uploaded_file = st.file_uploader(
-            "Selecciona el excel con los datos de IPC Proyectados",
-            key="file_uploader_key",
-            type=["xlsx"],
-            on_change=store_file,
+    Retorna:
+    tuple: Fuente elegida y espacio para el error del archivo (None en modo Online).
+    """
+    upload_col1, upload_col2 = st.columns(2)
+
+    with upload_col1:
+        # Radio button to enable/disable file uploader (Outside Form)
+        radio_data = st.radio(
+            "**Fuente de Datos**",
+            ("Online", "Excel de Proyecciones"),
+            key="radio_option",
+            index=1,
+            disabled=True,
         )
-        uploaded_file_error = st.empty()
+
+    uploaded_file_error = None
+    with upload_col2:
+        # Clear uploaded file when switching to "Online"
+        if st.session_state.radio_option == "Online":
+            st.session_state.uploaded_file = None  # Reset uploaded file
+
+        # Display file uploader only if "Excel" is selected
+        if st.session_state.radio_option == "Excel de Proyecciones":
+            clave = f"file_uploader_{st.session_state.version_uploader}"
+            st.file_uploader(
+                "Selecciona el excel con los datos de IPC Proyectados",
+                key=clave,
+                type=["xlsx"],
+                on_change=store_file,
+                args=(clave,),
+            )
+            if st.session_state.uploaded_file is not None:
+                st.caption(f"Archivo cargado: {st.session_state.uploaded_file.name}")
+            uploaded_file_error = st.empty()
+    return radio_data, uploaded_file_error
+
+
+radio_data, uploaded_file_error = fuente_datos()
 
 # Main form
 main_header_col1, main_header_col2 = st.columns(2)
@@ -143,11 +177,21 @@ with main_header_col1:
                 index=0,
                 horizontal=True,
             )
+            n_escenarios = st.number_input(
+                "**Escenarios de Inflación**",
+                min_value=0,
+                max_value=100000,
+                value=0,
+                step=1000,
+                help="0 desactiva la generación de escenarios de IPC.",
+            )
 
         # Create three columns and place the button in the middle column
         col_left, col_center, col_right = st.columns([2, 1, 2])
         with col_center:
             submitted = st.form_submit_button("Calcular")
+    instrumentos_curva = selector_descuento(key="ipc")
+    descuento_error = st.empty()
 
 # Container for results
 with main_header_col2:
@@ -190,18 +234,13 @@ with main_header_col2:
         label_chart_tasa_place_holder = st.empty()
         result_chart_tasa_place_holder = st.empty()
 
-tab1, tab2 = st.tabs(["🗃 Datos", "📈 Flujos Reales"])
-with tab1:
-    # Container for detailed table
-    st.header("Tabla de Datos")
-    tabla1_place_holder = st.empty()
-
-with tab2:
-
-    st.header("Tabla de Flujos Reales")
-    tabla2_place_holder = st.empty()
-
 if submitted:
+    # Un nuevo envío cancela la valoración anterior si sigue en curso y descarta
+    # sus resultados
+    if st.session_state.valoracion_ipc is not None:
+        cancelar_valoracion(st.session_state.valoracion_ipc)
+        st.session_state.valoracion_ipc = None
+
     # Retrieve file from session state
     uploaded_file = st.session_state.uploaded_file
     if radio_data == "Excel de Proyecciones" and uploaded_file is None:
@@ -230,157 +269,227 @@ if submitted:
             "fecha_negociacion": fecha_negociacion_error,
             "tasa_mercado": tasa_mercado_error,
             "valor_nominal_base": valor_nominal_base_error,
+            "descuento": descuento_error,
         }
 
+        curva = None
+        if instrumentos_curva is not None:
+            # En modo curva la tasa/spread de mercado no se usa para descontar
+            errors.pop("tasa_mercado", None)
+            if fecha_negociacion:
+                try:
+                    curva = obtener_curva_cero(instrumentos_curva, fecha_negociacion)
+                except ValueError as e:
+                    errors["descuento"] = str(e)
+
         if errors:
             display_errors(errors, error_placeholders)
 
         else:
-            if uploaded_file:
-                st.success(f"File '{uploaded_file.name}' included in calculation!")
-            else:
-                st.success("Datos de BanRep utilizados en el cálculo.")
-
-            df_errors_placeholder = st.empty()
-            df_datos = generar_cashflows_df_ipc(
-                fecha_emision=fecha_emision,
-                fecha_vencimiento=fecha_vencimiento,
-                fecha_negociacion=fecha_negociacion,
-                periodo_cupon=periodo_cupon,
-                base_intereses=base_intereses,
-                tasa_cupon=tasa_cupon,
-                valor_nominal_base=valor_nominal_base,
-                tasa_mercado=tasa_mercado,
-                valor_nominal=valor_nominal,
-                archivo_subido=uploaded_file,
-                modalidad=modalidad_tasa_cupon,
-                modo_ipc=modalidad_tasa_ipc,
-            )
-            df_flujos = generar_flujos_real_df_ipc(
-                fecha_emision=fecha_emision,
-                fecha_vencimiento=fecha_vencimiento,
-                fecha_negociacion=fecha_negociacion,
-                periodo_cupon=periodo_cupon,
-                base_intereses=base_intereses,
-                tasa_cupon=tasa_cupon,
-                valor_nominal_base=valor_nominal_base,
-                valor_nominal=valor_nominal,
-                archivo_subido=uploaded_file,
-                modalidad=modalidad_tasa_cupon,
-                modo_ipc=modalidad_tasa_ipc,
-            )
-            if isinstance(df_datos, dict) and "error" in df_datos:
-                df_errors_placeholder.error(df_datos["error"])
-            if isinstance(df_flujos, dict) and "error" in df_flujos:
-                df_errors_placeholder.error(df_flujos["error"])
-            else:
-                # Inicia index desde 1.
-                df_datos.index = range(1, len(df_datos) + 1)
-                df_flujos.index = range(1, len(df_flujos) + 1)
-                # show df
-                config = {
-                    "CFt": st.column_config.NumberColumn(
-                        "CFt", format="%.6f%%", help="Cupón Futuro"
-                    ),
-                    "VP CF": st.column_config.NumberColumn(
-                        "VP CF", format="%.6f%%", help="Valor Presente del Cupón"
-                    ),
-                    "t*PV CF": st.column_config.NumberColumn(
-                        "t*PV CF", format="%.6f%%", help="Valor Presente * t"
-                    ),
-                    "(t*PV CF)*(t+1)": st.column_config.NumberColumn(
-                        "(t*PV CF)*(t+1)",
-                        format="%.6f%%",
-                        help="t*Valor Presente * t+1",
-                    ),
-                }
-                tabla1_place_holder.dataframe(
-                    df_datos, use_container_width=True, height=800, column_config=config
-                )
-                tabla2_place_holder.dataframe(
-                    df_flujos, use_container_width=True, height=800
-                )
-                # Calculate new metric values
-                precio_sucio = calcular_precio_sucio_desde_VP(df_datos.copy())
-                valor_giro = (precio_sucio / 100) * valor_nominal
-                cupon_corrido = calcular_cupon_corrido(
-                    df=df_datos.copy(),
-                    date_negociacion=fecha_negociacion,
-                    periodicidad=periodo_cupon,
-                    base_intereses=base_intereses,
-                )
-                precio_limpio = precio_sucio - cupon_corrido
-                precio_limpio_venta = clasificar_precio_limpio(precio_limpio)
-                valor_TIR_negociar = sumar_spread_ipc(
-                    tasa_spread=tasa_mercado,
-                    fecha=fecha_negociacion,
-                    modalidad=modalidad_tasa_cupon,
-                    archivo=uploaded_file,
-                )
-                valor_TIR_inversion = calcular_tir_desde_df(
-                    df=df_flujos.copy(),
-                    columna_flujos="Flujo Pesos Reales(COP$)",
-                    valor_giro=valor_giro,
+            parametros = {
+                "fecha_emision": fecha_emision,
+                "fecha_vencimiento": fecha_vencimiento,
+                "fecha_negociacion": fecha_negociacion,
+                "periodo_cupon": periodo_cupon,
+                "base_intereses": base_intereses,
+                "tasa_cupon": tasa_cupon,
+                "valor_nominal_base": valor_nominal_base,
+                "valor_nominal": valor_nominal,
+                "archivo": uploaded_file,
+                "modalidad": modalidad_tasa_cupon,
+                "modo_ipc": modalidad_tasa_ipc,
+            }
+            # Métricas primero (solo requieren la tabla de datos); flujos reales,
+            # TIR de inversión y escenarios después
+            etapas = {
+                "datos": lambda r: generar_cashflows_df_ipc_cache(
+                    tasa_mercado=tasa_mercado, curva=curva, **parametros
+                ),
+                "metricas": lambda r: metricas_calculadora(
+                    r["datos"],
                     fecha_negociacion=fecha_negociacion,
-                )
-                d_macaulay = calcular_macaulay(
-                    df=df_datos.copy(), columna="t*PV CF", precio_sucio=precio_sucio
-                )
-                d_mod = calcular_duracion_mod(
-                    macaulay=d_macaulay, tasa=valor_TIR_negociar
-                )
-                dv01 = calcular_dv01(d_mod=d_mod, valor_giro=valor_giro)
-                conv = calcular_convexidad(
-                    df=df_datos,
-                    columna="(t*PV CF)*(t+1)",
-                    tasa_mercado=tasa_mercado,
-                    precio_sucio=precio_sucio,
-                    periodicidad=periodo_cupon,
+                    periodo_cupon=periodo_cupon,
                     base_intereses=base_intereses,
+                    valor_nominal=valor_nominal,
+                    valor_nominal_base=valor_nominal_base,
+                    tasa_mercado=tasa_mercado,
+                ),
+                "flujos": lambda r: generar_flujos_real_df_ipc_cache(**parametros),
+                "tir_inversion": lambda r: tir_inversion(
+                    r["flujos"], r["metricas"]["Valor Giro"], fecha_negociacion
+                ),
+            }
+            if n_escenarios > 0:
+                etapas["simulacion"] = lambda r: simular_escenarios_ipc(
+                    tasa_mercado=tasa_mercado,
+                    n_trayectorias=n_escenarios,
+                    **parametros,
                 )
+            st.session_state.valoracion_ipc = valorar_por_etapas(etapas)
+            st.session_state.valoracion_ipc["contexto"] = {
+                "archivo": uploaded_file,
+                "valor_nominal": valor_nominal,
+                "tasa_cupon": tasa_cupon,
+                "tasa_mercado": tasa_mercado,
+                "curva": curva,
+            }
 
-                # Update metrics dynamically
-                precio_sucio_placeholder.metric(
-                    "**Precio Sucio**", f"{precio_sucio:.3f}%"
-                )
-                valor_giro_placeholder.write(f"**Valor de Giro: ${valor_giro:,.2f}**")
-                valor_nominal_placeholder.write(
-                    f"**Valor Nominal: ${valor_nominal:,.2f}**"
-                )
-                cupon_corrido_placeholder.metric(
-                    "**Cupón Corrido**", f"{cupon_corrido:.3f}%"
-                )
-                precio_limpio_placeholder.metric(
-                    "**Precio Limpio**", f"{precio_limpio:.3f}%"
-                )
-                precio_limpio_placeholder_venta.markdown(
-                    precio_limpio_venta.replace("\n", "  \n")
-                )
-                valor_tasa_negociacion_EA_placeholder.metric(
-                    "**Tasa Negociación EA**", f"{valor_TIR_negociar:.3f}%"
-                )
-                valor_TIR_inversion_placeholder.metric(
-                    "**TIR Inversión**", f"{valor_TIR_inversion:.3f}%"
-                )
-                duracion_macaulay_placeholder.metric(
-                    "**Duración Macaulay (Años)**", f"{d_macaulay:.3f}"
+
+@st.fragment
+def panel_resultados():
+    """
+    Resultados de la valoración guardada en la sesión: los de las etapas terminadas
+    y, si sigue en curso, los demás a medida que terminan. Es un fragmento: las
+    descargas y demás interacciones del panel solo lo vuelven a ejecutar, sin
+    recalcular ni recargar datos.
+    """
+    tab1, tab2, tab3 = st.tabs(["🗃 Datos", "📈 Flujos Reales", "🎲 Escenarios"])
+    with tab1:
+        # Container for detailed table
+        st.header("Tabla de Datos")
+        tabla1_place_holder = st.empty()
+
+    with tab2:
+
+        st.header("Tabla de Flujos Reales")
+        tabla2_place_holder = st.empty()
+
+    with tab3:
+
+        st.header("Escenarios de Inflación")
+        escenarios_place_holder = st.empty()
+
+    valoracion = st.session_state.valoracion_ipc
+    if valoracion is None:
+        return
+    contexto = valoracion["contexto"]
+    if contexto["archivo"]:
+        st.success(f"File '{contexto['archivo'].name}' included in calculation!")
+    else:
+        st.success("Datos de BanRep utilizados en el cálculo.")
+    progreso_placeholder = st.empty()
+    df_errors_placeholder = st.empty()
+
+    def mostrar_metricas(metricas):
+        precio_sucio_placeholder.metric(
+            "**Precio Sucio**", f"{metricas['Precio Sucio']:.3f}%"
+        )
+        valor_giro_placeholder.write(
+            f"**Valor de Giro: ${metricas['Valor Giro']:,.2f}**"
+        )
+        valor_nominal_placeholder.write(
+            f"**Valor Nominal: ${contexto['valor_nominal']:,.2f}**"
+        )
+        cupon_corrido_placeholder.metric(
+            "**Cupón Corrido**", f"{metricas['Cupón Corrido']:.3f}%"
+        )
+        precio_limpio_placeholder.metric(
+            "**Precio Limpio**", f"{metricas['Precio Limpio']:.3f}%"
+        )
+        precio_limpio_placeholder_venta.markdown(
+            metricas["Clasificación"].replace("\n", "  \n")
+        )
+        valor_tasa_negociacion_EA_placeholder.metric(
+            "**Tasa Negociación EA**", f"{metricas['Tasa Negociación EA']:.3f}%"
+        )
+        duracion_macaulay_placeholder.metric(
+            "**Duración Macaulay (Años)**", f"{metricas['Duración Macaulay']:.3f}"
+        )
+        duracion_modficada_placeholder.metric(
+            "**Duración\\***", f"{metricas['Duración Modificada']:.3f}"
+        )
+        dv01_placeholder.metric("**DV01:**", "${:,.2f}".format(metricas["DV01"]))
+        convexidad_placeholder.metric(
+            "**Convexidad**", f"{metricas['Convexidad']:,.3f}"
+        )
+
+        # Create a DataFrame with the values, using the category names as the index
+        datos_giro = {"Value": [metricas["Valor Giro"], contexto["valor_nominal"]]}
+        df_giro = pd.DataFrame(datos_giro, index=["Valor Giro", "Valor Nominal"])
+
+        # Create a DataFrame with the values, using the category names as the index
+        datos_tasa = {"Value": [contexto["tasa_cupon"], contexto["tasa_mercado"]]}
+        df_tasa = pd.DataFrame(datos_tasa, index=["Tasa Cupón", "Tasa Mercado"])
+
+        # Display the bar chart
+        label_chart_giro_place_holder.write("Valor Giro vs Nominal")
+        result_chart_giro_place_holder.bar_chart(df_giro, horizontal=True)
+        label_chart_tasa_place_holder.write("Tasa Mercado vs Cupón")
+        result_chart_tasa_place_holder.bar_chart(df_tasa, horizontal=True)
+
+    def mostrar_tabla_datos(df_datos):
+        # Inicia index desde 1.
+        df_datos = df_datos.copy()
+        df_datos.index = range(1, len(df_datos) + 1)
+        # show df
+        config = {
+            "CFt": st.column_config.NumberColumn(
+                "CFt", format="%.6f%%", help="Cupón Futuro"
+            ),
+            "VP CF": st.column_config.NumberColumn(
+                "VP CF", format="%.6f%%", help="Valor Presente del Cupón"
+            ),
+            "t*PV CF": st.column_config.NumberColumn(
+                "t*PV CF", format="%.6f%%", help="Valor Presente * t"
+            ),
+            "(t*PV CF)*(t+1)": st.column_config.NumberColumn(
+                "(t*PV CF)*(t+1)",
+                format="%.6f%%",
+                help="t*Valor Presente * t+1",
+            ),
+        }
+        tabla1_place_holder.dataframe(
+            df_datos, use_container_width=True, height=800, column_config=config
+        )
+        with tab1:
+            botones_descarga(df_datos, "tabla_datos_ipc", key="ipc_tabla_datos")
+            if contexto["curva"] is not None:
+                st.subheader("Curva Cero")
+                st.dataframe(
+                    tabla_curva_cero(contexto["curva"]), use_container_width=True
                 )
-                duracion_modficada_placeholder.metric("**Duración\\***", f"{d_mod:.3f}")
-                dv01_placeholder.metric("**DV01:**", "${:,.2f}".format(dv01))
-                convexidad_placeholder.metric("**Convexidad**", f"{conv:,.3f}")
-
-                # Create a DataFrame with the values, using the category names as the index
-                datos_giro = {"Value": [valor_giro, valor_nominal]}
-                df_giro = pd.DataFrame(
-                    datos_giro, index=["Valor Giro", "Valor Nominal"]
+
+    def mostrar_tabla_flujos(df_flujos):
+        df_flujos = df_flujos.copy()
+        df_flujos.index = range(1, len(df_flujos) + 1)
+        tabla2_place_holder.dataframe(df_flujos, use_container_width=True, height=800)
+        with tab2:
+            botones_descarga(df_flujos, "flujos_reales_ipc", key="ipc_flujos_reales")
+
+    def mostrar_tir_inversion(valor_TIR_inversion):
+        valor_TIR_inversion_placeholder.metric(
+            "**TIR Inversión**", f"{valor_TIR_inversion:.3f}%"
+        )
+
+    def mostrar_escenarios(escenarios):
+        with escenarios_place_holder.container():
+            st.subheader("Precio Sucio")
+            st.dataframe(
+                pd.DataFrame(escenarios["resumen"], index=["Precio Sucio (%)"]),
+                use_container_width=True,
+            )
+            conteos, bordes = np.histogram(escenarios["precios"], bins=50)
+            st.bar_chart(
+                pd.DataFrame(
+                    {"Escenarios": conteos},
+                    index=np.round((bordes[:-1] + bordes[1:]) / 2, 3),
                 )
+            )
+            st.subheader("Flujos Reales")
+            st.dataframe(escenarios["flujos_reales"], use_container_width=True)
+
+    mostrar_valoracion(
+        valoracion,
+        {
+            "metricas": mostrar_metricas,
+            "datos": mostrar_tabla_datos,
+            "flujos": mostrar_tabla_flujos,
+            "tir_inversion": mostrar_tir_inversion,
+            "simulacion": mostrar_escenarios,
+        },
+        progreso=progreso_placeholder,
+        errores=df_errors_placeholder,
+    )
 
-                # Create a DataFrame with the values, using the category names as the index
-                datos_tasa = {"Value": [tasa_cupon, tasa_mercado]}
-                df_tasa = pd.DataFrame(datos_tasa, index=["Tasa Cupón", "Tasa Mercado"])
 
-                # Display the bar chart
-                label_chart_giro_place_holder.write("Valor Giro vs Nominal")
-                result_chart_giro_place_holder.bar_chart(df_giro, horizontal=True)
-                label_chart_tasa_place_holder.write("Tasa Mercado vs Cupón")
-                result_chart_tasa_place_holder.bar_chart(df_tasa, horizontal=True)
+panel_resultados()
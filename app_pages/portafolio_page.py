@@ -0,0 +1,254 @@
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from data_handling.exportacion_data import (
+    FORMATOS_EXPORTACION,
+    escribir_flujos_posiciones,
+)
+from data_handling.lote_data import (
+    COLUMNAS_METRICAS,
+    abrir_escritor,
+    argumentos_calculadora,
+    valorar_en_segundo_plano,
+)
+from data_handling.portafolio_data import agregar_metricas_portafolio
+from utils.cache_streamlit import (
+    generar_cashflows_df_ibr_cache,
+    generar_cashflows_df_ipc_cache,
+    generar_cashflows_df_tf_cache,
+)
+from utils.ui_helpers import AVISO_DATOS_DESACTUALIZADOS
+
+# Filas por bloque: cada cuánto se actualiza el progreso y se revisa la cancelación
+FILAS_POR_BLOQUE = 200
+
+# Contenidos exportables y nombre de su archivo
+EXPORTACIONES = {
+    "Posiciones": "portafolio_posiciones",
+    "Flujos por Bono (detalle)": "portafolio_flujos",
+    "Fallas": "portafolio_fallas",
+}
+
+# Initialize session state
+if "valoracion_portafolio" not in st.session_state:
+    st.session_state.valoracion_portafolio = None
+
+
+def flujos_posicion(fila: dict, archivo):
+    """
+    Tabla de flujos de una posición validada, con la función de su calculadora.
+    """
+    argumentos = argumentos_calculadora(fila)
+    if fila["tipo"] == "Tasa Fija":
+        return generar_cashflows_df_tf_cache(**argumentos)
+    if fila["tipo"] == "IBR":
+        return generar_cashflows_df_ibr_cache(archivo=archivo, **argumentos)
+    return generar_cashflows_df_ipc_cache(archivo=archivo, **argumentos)
+
+
+def generar_exportacion(estado: dict, contenido: str, formato: str):
+    """
+    Escribe el contenido elegido en un archivo temporal, por bloques (el detalle de
+    flujos se genera bono a bono, sin armar la tabla completa), y retorna sus bytes.
+    """
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = Path(carpeta) / f"{EXPORTACIONES[contenido]}.{formato}"
+        escribir, cerrar = abrir_escritor(ruta)
+        try:
+            if contenido == "Posiciones":
+                escribir(estado["tabla_resultados"])
+            elif contenido == "Fallas":
+                escribir(estado["tabla_fallas"])
+            else:
+                barra = st.progress(0.0, text="Generando flujos...")
+                valoradas = estado["tabla_posiciones"].loc[
+                    estado["tabla_resultados"]["fila"]
+                ]
+                escribir_flujos_posiciones(
+                    valoradas.reset_index(),
+                    escribir,
+                    archivo=estado["archivo"],
+                    avance=lambda hechas, total: barra.progress(
+                        hechas / total, text=f"{hechas:,} de {total:,} bonos"
+                    ),
+                )
+                barra.empty()
+        finally:
+            cerrar()
+        return ruta.read_bytes()
+
+
+@st.fragment(run_every=1)
+def progreso_valoracion():
+    """
+    Progreso de la valoración en curso; se refresca solo, sin volver a ejecutar la página.
+    """
+    estado = st.session_state.valoracion_portafolio
+    if estado["terminado"]:
+        st.rerun()
+    # El total se conoce al terminar de leer el archivo (se lee en el hilo de valoración)
+    st.info(f"⏳ {estado['hechas']:,} posiciones procesadas...")
+    if not estado["cancelar"].is_set() and st.button("Cancelar"):
+        estado["cancelar"].set()
+    if estado["cancelar"].is_set():
+        st.info("Cancelando al terminar el bloque en curso...")
+
+
+# Title
+st.title("Portafolio")
+st.divider()
+
+upload_col1, upload_col2 = st.columns(2)
+
+with upload_col1:
+    archivo_posiciones = st.file_uploader(
+        "Selecciona el archivo de posiciones (una fila por bono)",
+        type=["csv", "parquet", "xlsx"],
+        key="posiciones_portafolio",
+    )
+    st.caption(
+        "Columnas: tipo (Tasa Fija, IBR o IPC), fecha_emision, fecha_vencimiento, "
+        "fecha_negociacion, periodo_cupon, base_intereses, modalidad_tasa_cupon, "
+        "tasa_cupon, valor_nominal_base, tasa_mercado, valor_nominal, id (opcional) "
+        "y, para IPC, modo_ipc."
+    )
+
+with upload_col2:
+    radio_data = st.radio(
+        "**Fuente de Datos IBR/IPC**",
+        ("Online", "Excel de Proyecciones"),
+        key="radio_portafolio",
+        index=0,
+    )
+    archivo_proyecciones = None
+    if radio_data == "Excel de Proyecciones":
+        archivo_proyecciones = st.file_uploader(
+            "Selecciona el excel con los datos de IBR e IPC Proyectados",
+            type=["xlsx"],
+            key="proyecciones_portafolio",
+        )
+
+estado = st.session_state.valoracion_portafolio
+en_curso = estado is not None and not estado["terminado"]
+
+if st.button("Valorar Portafolio", type="primary", disabled=en_curso):
+    if archivo_posiciones is None:
+        st.error("❌ No se ha subido ningún archivo de posiciones.")
+    elif radio_data == "Excel de Proyecciones" and archivo_proyecciones is None:
+        st.error("❌ No se ha subido ningún archivo.")
+    else:
+        st.session_state.valoracion_portafolio = valorar_en_segundo_plano(
+            archivo_posiciones,
+            fuente="proyecciones" if archivo_proyecciones else "banrep",
+            archivo=archivo_proyecciones,
+            filas_por_bloque=FILAS_POR_BLOQUE,
+        )
+        st.rerun()
+
+if en_curso:
+    progreso_valoracion()
+
+elif estado is not None:
+    if estado["error"]:
+        st.error(f"❌ La valoración se detuvo: {estado['error']}")
+    if estado["desactualizado"]:
+        st.warning(AVISO_DATOS_DESACTUALIZADOS)
+    if estado["cancelar"].is_set():
+        st.warning(
+            f"Valoración cancelada: se muestran las {estado['hechas']:,} "
+            "posiciones procesadas antes de cancelar."
+        )
+
+    # Tablas finales (se arman una sola vez por valoración)
+    if "tabla_resultados" not in estado:
+        estado["tabla_resultados"] = (
+            pd.concat(estado["resultados"], ignore_index=True)
+            if estado["resultados"]
+            else pd.DataFrame(columns=["fila", "tipo", *COLUMNAS_METRICAS])
+        )
+        estado["tabla_fallas"] = (
+            pd.concat(estado["fallas"], ignore_index=True).sort_values(
+                "fila", ignore_index=True
+            )
+            if estado["fallas"]
+            else pd.DataFrame(columns=["fila", "tipo", "error"])
+        )
+        estado["tabla_posiciones"] = (
+            pd.concat(estado["posiciones"], ignore_index=True).set_index("fila")
+            if estado["posiciones"]
+            else pd.DataFrame()
+        )
+    resultados = estado["tabla_resultados"]
+    fallas = estado["tabla_fallas"]
+
+    st.subheader("**Resultados del Portafolio**")
+    agregados = agregar_metricas_portafolio(resultados)
+    metric_col1, metric_col2, metric_col3, metric_col4, metric_col5 = st.columns(5)
+    metric_col1.metric("**Valor de Giro**", f"${agregados['Valor Giro']:,.2f}")
+    metric_col2.metric(
+        "**Duración Macaulay (Años)**", f"{agregados['Duración Macaulay']:.3f}"
+    )
+    metric_col3.metric("**Duración\\***", f"{agregados['Duración Modificada']:.3f}")
+    metric_col4.metric("**DV01:**", f"${agregados['DV01']:,.2f}")
+    metric_col5.metric("**Convexidad**", f"{agregados['Convexidad']:,.3f}")
+    st.write(
+        f"**{agregados['Posiciones']:,} posiciones valoradas, {len(fallas):,} con "
+        f"error. TIR Inversión ponderada: {agregados['TIR Inversión']:.3f}%**"
+    )
+
+    tab1, tab2, tab3 = st.tabs(["Posiciones", "Flujos por Bono", "Fallas"])
+    with tab1:
+        st.dataframe(resultados, use_container_width=True, hide_index=True)
+    with tab2:
+        if resultados.empty:
+            st.info("No hay posiciones valoradas.")
+        else:
+            posiciones = estado["tabla_posiciones"]
+            fila_elegida = st.selectbox(
+                "Posición",
+                resultados["fila"].tolist(),
+                format_func=lambda fila: " - ".join(
+                    str(posiciones.at[fila, col])
+                    for col in ("id", "tipo")
+                    if col in posiciones.columns
+                )
+                + f" (fila {fila})",
+                key="posicion_portafolio",
+            )
+            fila = {"fila": fila_elegida, **posiciones.loc[fila_elegida].to_dict()}
+            df_flujos = flujos_posicion(fila, estado["archivo"])
+            if isinstance(df_flujos, dict) and "error" in df_flujos:
+                st.error(df_flujos["error"])
+            else:
+                df_flujos.index = range(1, len(df_flujos) + 1)
+                st.dataframe(df_flujos, use_container_width=True, height=600)
+    with tab3:
+        st.dataframe(fallas, use_container_width=True, hide_index=True)
+
+    st.subheader("**Exportar**")
+    export_col1, export_col2, export_col3 = st.columns(3)
+    contenido = export_col1.selectbox(
+        "Contenido", list(EXPORTACIONES), key="contenido_exportacion"
+    )
+    formato = export_col2.selectbox(
+        "Formato", list(FORMATOS_EXPORTACION), key="formato_exportacion"
+    )
+    if export_col3.button("Generar archivo", use_container_width=True):
+        try:
+            estado["exportacion"] = {
+                "datos": generar_exportacion(estado, contenido, formato),
+                "nombre": f"{EXPORTACIONES[contenido]}.{formato}",
+                "mime": FORMATOS_EXPORTACION[formato],
+            }
+        except ValueError as e:
+            st.error(f"❌ No se pudo exportar: {e}")
+    if estado.get("exportacion"):
+        st.download_button(
+            f"Descargar {estado['exportacion']['nombre']}",
+            data=estado["exportacion"]["datos"],
+            file_name=estado["exportacion"]["nombre"],
+            mime=estado["exportacion"]["mime"],
+        )
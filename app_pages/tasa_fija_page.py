@@ -1,20 +1,22 @@
 import pandas as pd
 import streamlit as st
 
-from data_handling.shared_data import (
-    calcular_convexidad,
-    calcular_cupon_corrido,
-    calcular_duracion_mod,
-    calcular_dv01,
-    calcular_macaulay,
-    calcular_precio_sucio_desde_VP,
-    calcular_tir_desde_df,
-    clasificar_precio_limpio,
+from data_handling.curva_data import obtener_curva_cero, tabla_curva_cero
+from data_handling.horizonte_data import (
+    fechas_fin_de_mes,
+    proyectar_horizonte_tf,
+    trayectoria_par_tf,
 )
-from data_handling.tasa_fija_data import generar_cashflows_df_tf
-from utils.ui_helpers import display_errors
+from data_handling.shared_data import calcular_tir_desde_df
+from data_handling.valoracion_data import metricas_calculadora
+from utils.cache_streamlit import generar_cashflows_df_tf_cache
+from utils.ui_helpers import botones_descarga, display_errors, selector_descuento
 from utils.validation import validate_inputs
 
+# Resultados de la última valoración (se muestran sin recalcular en cada interacción)
+if "resultados_tf" not in st.session_state:
+    st.session_state.resultados_tf = None
+
 # start from here
 st.title("Calculadora Tasa Fija")
 st.divider()
@@ -107,6 +109,8 @@ with main_header_col1:
         )  # Adjust ratios as needed
         with col_center:
             submitted = st.form_submit_button("Calcular")
+    instrumentos_curva = selector_descuento(key="tf")
+    descuento_error = st.empty()
 
 # Container for results
 with main_header_col2:
@@ -146,9 +150,6 @@ with main_header_col2:
         result_chart_tasa_place_holder = st.empty()
 
 
-# Container for detailed table
-st.header("Tabla detallada")
-
 if submitted:
     # Validate form inputs
     errors = validate_inputs(
@@ -173,110 +174,197 @@ if submitted:
         "fecha_negociacion": fecha_negociacion_error,
         "tasa_mercado": tasa_mercado_error,
         "valor_nominal_base": valor_nominal_base_error,
+        "descuento": descuento_error,
     }
 
+    curva = None
+    if instrumentos_curva is not None:
+        # En modo curva la tasa/spread de mercado no se usa para descontar
+        errors.pop("tasa_mercado", None)
+        if fecha_negociacion:
+            try:
+                curva = obtener_curva_cero(instrumentos_curva, fecha_negociacion)
+            except ValueError as e:
+                errors["descuento"] = str(e)
+
     if errors:
         display_errors(errors, error_placeholders)
+        st.session_state.resultados_tf = None
 
     else:
-        df = generar_cashflows_df_tf(
-            fecha_emision=fecha_emision,
-            fecha_vencimiento=fecha_vencimiento,
+        parametros = {
+            "fecha_emision": fecha_emision,
+            "fecha_vencimiento": fecha_vencimiento,
+            "periodo_cupon": periodo_cupon,
+            "base_intereses": base_intereses,
+            "modalidad_tasa_cupon": modalidad_tasa_cupon,
+            "tasa_cupon": tasa_cupon,
+            "valor_nominal_base": valor_nominal_base,
+            "tasa_mercado": tasa_mercado,
+            "curva": curva,
+        }
+        df = generar_cashflows_df_tf_cache(
             fecha_negociacion=fecha_negociacion,
-            periodo_cupon=periodo_cupon,
-            base_intereses=base_intereses,
-            modalidad_tasa_cupon=modalidad_tasa_cupon,
-            tasa_cupon=tasa_cupon,
-            valor_nominal_base=valor_nominal_base,
-            tasa_mercado=tasa_mercado,
             valor_nominal=valor_nominal,
+            **parametros,
         )
-        # Inicia index desde 1.
-        df.index = range(1, len(df) + 1)
-        # show df
-        config = {
-            "CFt": st.column_config.NumberColumn(
-                "CFt", format="%.6f%%", help="Cupón Futuro"
-            ),
-            "VP CF": st.column_config.NumberColumn(
-                "VP CF", format="%.6f%%", help="Valor Presente del Cupón"
-            ),
-            "t*PV CF": st.column_config.NumberColumn(
-                "t*PV CF", format="%.6f%%", help="Valor Presente * t"
-            ),
-            "(t*PV CF)*(t+1)": st.column_config.NumberColumn(
-                "(t*PV CF)*(t+1)", format="%.6f%%", help="t*Valor Presente * t+1"
-            ),
-        }
-        # show DF
-        st.dataframe(df, column_config=config, use_container_width=True, height=900)
-
-        # 🔹 Calculate new metric values
-        precio_sucio = calcular_precio_sucio_desde_VP(df.copy())
-        valor_giro = (precio_sucio / 100) * valor_nominal
-        cupon_corrido = calcular_cupon_corrido(
-            df=df.copy(),
-            date_negociacion=fecha_negociacion,
-            periodicidad=periodo_cupon,
+        metricas = metricas_calculadora(
+            df,
+            fecha_negociacion=fecha_negociacion,
+            periodo_cupon=periodo_cupon,
             base_intereses=base_intereses,
+            valor_nominal=valor_nominal,
+            valor_nominal_base=valor_nominal_base,
         )
-        precio_limpio = precio_sucio - cupon_corrido
-        precio_limpio_venta = clasificar_precio_limpio(precio_limpio)
-        valor_TIR_inversion = calcular_tir_desde_df(
+        metricas["TIR Inversión"] = calcular_tir_desde_df(
             df=df.copy(),
             columna_flujos="Flujo Pesos ($)",
-            valor_giro=valor_giro,
+            valor_giro=metricas["Valor Giro"],
             fecha_negociacion=fecha_negociacion,
         )
-        d_macaulay = calcular_macaulay(
-            df=df.copy(), columna="t*PV CF", precio_sucio=precio_sucio
-        )
-        d_mod = calcular_duracion_mod(macaulay=d_macaulay, tasa=tasa_mercado)
-        dv01 = calcular_dv01(d_mod=d_mod, valor_giro=valor_giro)
-        conv = calcular_convexidad(
-            df=df,
-            columna="(t*PV CF)*(t+1)",
-            tasa_mercado=tasa_mercado,
-            precio_sucio=precio_sucio,
-            periodicidad=periodo_cupon,
-            base_intereses=base_intereses,
-        )
+        # Resultados guardados en la sesión: el panel los vuelve a mostrar sin recalcular.
+        # El horizonte y la trayectoria se calculan en el panel cuando se piden y se
+        # guardan aquí mismo ("horizontes" por número de meses).
+        st.session_state.resultados_tf = {
+            "datos": df,
+            "metricas": metricas,
+            "valor_nominal": valor_nominal,
+            "tasa_cupon": tasa_cupon,
+            "curva": curva,
+            "fecha_negociacion": fecha_negociacion,
+            "parametros": parametros,
+            "horizontes": {},
+            "trayectoria": None,
+        }
 
-        # 🔹 Update metrics dynamically using `st.empty()`
-        precio_sucio_placeholder.metric(
-            label="**Precio Sucio**", value=f"{precio_sucio:.3f}%"
-        )
-        valor_giro_placeholder.write(f"**Valor de Giro: ${valor_giro:,.2f}**")
-        valor_nominal_placeholder.write(f"**Valor Nominal: ${valor_nominal:,.2f}**")
-        cupon_corrido_placeholder.metric(
-            label="**Cupón Corrido**", value=f"{cupon_corrido:.3f}%"
-        )
-        precio_limpio_placeholder.metric(
-            label="**Precio Limpio**", value=f"{precio_limpio:.3f}%"
-        )
-        precio_limpio_placeholder_venta.markdown(
-            precio_limpio_venta.replace("\n", "  \n")
-        )
-        valor_TIR_inversion_placeholder.metric(
-            "**TIR Inversión**", f"{valor_TIR_inversion:.3f}%"
-        )
-        duracion_macaulay_placeholder.metric(
-            "**Duración Macaulay (Años)**", f"{d_macaulay:.3f}"
+
+@st.fragment
+def panel_resultados():
+    """
+    Muestra los resultados guardados en la sesión. Las descargas y demás interacciones
+    del panel solo vuelven a ejecutar esta función, sin recalcular ni recargar datos.
+    """
+    # Container for detailed table
+    st.header("Tabla detallada")
+    resultados = st.session_state.resultados_tf
+    if resultados is None:
+        return
+    metricas = resultados["metricas"]
+    valor_nominal = resultados["valor_nominal"]
+
+    # Inicia index desde 1.
+    df = resultados["datos"].copy()
+    df.index = range(1, len(df) + 1)
+    # show df
+    config = {
+        "CFt": st.column_config.NumberColumn(
+            "CFt", format="%.6f%%", help="Cupón Futuro"
+        ),
+        "VP CF": st.column_config.NumberColumn(
+            "VP CF", format="%.6f%%", help="Valor Presente del Cupón"
+        ),
+        "t*PV CF": st.column_config.NumberColumn(
+            "t*PV CF", format="%.6f%%", help="Valor Presente * t"
+        ),
+        "(t*PV CF)*(t+1)": st.column_config.NumberColumn(
+            "(t*PV CF)*(t+1)", format="%.6f%%", help="t*Valor Presente * t+1"
+        ),
+    }
+    # show DF
+    st.dataframe(df, column_config=config, use_container_width=True, height=900)
+    botones_descarga(df, "tabla_datos_tasa_fija", key="tf_tabla_datos")
+    if resultados["curva"] is not None:
+        st.subheader("Curva Cero")
+        st.dataframe(tabla_curva_cero(resultados["curva"]), use_container_width=True)
+
+    # 🔹 Update metrics dynamically using `st.empty()`
+    precio_sucio_placeholder.metric(
+        label="**Precio Sucio**", value=f"{metricas['Precio Sucio']:.3f}%"
+    )
+    valor_giro_placeholder.write(f"**Valor de Giro: ${metricas['Valor Giro']:,.2f}**")
+    valor_nominal_placeholder.write(f"**Valor Nominal: ${valor_nominal:,.2f}**")
+    cupon_corrido_placeholder.metric(
+        label="**Cupón Corrido**", value=f"{metricas['Cupón Corrido']:.3f}%"
+    )
+    precio_limpio_placeholder.metric(
+        label="**Precio Limpio**", value=f"{metricas['Precio Limpio']:.3f}%"
+    )
+    precio_limpio_placeholder_venta.markdown(
+        metricas["Clasificación"].replace("\n", "  \n")
+    )
+    valor_TIR_inversion_placeholder.metric(
+        "**TIR Inversión**", f"{metricas['TIR Inversión']:.3f}%"
+    )
+    duracion_macaulay_placeholder.metric(
+        "**Duración Macaulay (Años)**", f"{metricas['Duración Macaulay']:.3f}"
+    )
+    duracion_modficada_placeholder.metric(
+        "**Duración\\***", f"{metricas['Duración Modificada']:.3f}"
+    )
+    dv01_placeholder.metric("**DV01:**", "${:,.2f}".format(metricas["DV01"]))
+    convexidad_placeholder.metric("**Convexidad**", f"{metricas['Convexidad']:,.3f}")
+
+    # Create a DataFrame with the values, using the category names as the index
+    datos_giro = {"Value": [metricas["Valor Giro"], valor_nominal]}
+    df_giro = pd.DataFrame(datos_giro, index=["Valor Giro", "Valor Nominal"])
+
+    # Create a DataFrame with the values, using the category names as the index
+    datos_tasa = {"Value": [resultados["tasa_cupon"], metricas["Tasa Negociación EA"]]}
+    df_tasa = pd.DataFrame(datos_tasa, index=["Tasa Cupón", "Tasa Mercado"])
+
+    # Display the bar chart
+    label_chart_giro_place_holder.write("Valor Giro vs Nominal")
+    result_chart_giro_place_holder.bar_chart(df_giro, horizontal=True)
+    label_chart_tasa_place_holder.write("Tasa Mercado vs Cupón")
+    result_chart_tasa_place_holder.bar_chart(df_tasa, horizontal=True)
+
+    # Análisis opcionales: cambiarlos solo vuelve a ejecutar este panel
+    col_horizonte, col_trayectoria = st.columns(2)
+    meses_horizonte = col_horizonte.number_input(
+        "**Meses de Horizonte**",
+        min_value=0,
+        max_value=600,
+        value=0,
+        step=1,
+        key="tf_meses_horizonte",
+        help="Proyecta precio, carry y roll-down a cada cierre de mes "
+        "con la tasa constante. 0 desactiva el análisis.",
+    )
+    mostrar_trayectoria = col_trayectoria.checkbox(
+        "**Trayectoria al Par**",
+        value=False,
+        key="tf_mostrar_trayectoria",
+        help="Precio limpio y sucio teórico de cada día desde la emisión "
+        "hasta el vencimiento con la tasa constante.",
+    )
+    parametros = resultados["parametros"]
+
+    if meses_horizonte > 0:
+        if meses_horizonte not in resultados["horizontes"]:
+            fecha_negociacion = resultados["fecha_negociacion"]
+            resultados["horizontes"][meses_horizonte] = proyectar_horizonte_tf(
+                fecha_negociacion=fecha_negociacion,
+                valor_nominal=valor_nominal,
+                fechas_horizonte=fechas_fin_de_mes(fecha_negociacion, meses_horizonte),
+                **parametros,
+            )
+        df_horizonte = resultados["horizontes"][meses_horizonte]
+        st.header("Análisis de Horizonte")
+        st.dataframe(df_horizonte, hide_index=True, use_container_width=True)
+        st.line_chart(
+            df_horizonte.set_index("Fecha Horizonte")[
+                ["Carry", "Roll-Down", "Retorno Total"]
+            ]
         )
-        duracion_modficada_placeholder.metric("**Duración\\***", f"{d_mod:.3f}")
-        dv01_placeholder.metric("**DV01:**", "${:,.2f}".format(dv01))
-        convexidad_placeholder.metric("**Convexidad**", f"{conv:,.3f}")
 
-        # Create a DataFrame with the values, using the category names as the index
-        datos_giro = {"Value": [valor_giro, valor_nominal]}
-        df_giro = pd.DataFrame(datos_giro, index=["Valor Giro", "Valor Nominal"])
+    if mostrar_trayectoria:
+        if resultados["trayectoria"] is None:
+            resultados["trayectoria"] = trayectoria_par_tf(**parametros)
+        df_trayectoria = resultados["trayectoria"]
+        st.header("Trayectoria al Par")
+        st.line_chart(
+            df_trayectoria.set_index("Fecha")[["Precio Sucio", "Precio Limpio"]]
+        )
 
-        # Create a DataFrame with the values, using the category names as the index
-        datos_tasa = {"Value": [tasa_cupon, tasa_mercado]}
-        df_tasa = pd.DataFrame(datos_tasa, index=["Tasa Cupón", "Tasa Mercado"])
 
-        # Display the bar chart
-        label_chart_giro_place_holder.write("Valor Giro vs Nominal")
-        result_chart_giro_place_holder.bar_chart(df_giro, horizontal=True)
-        label_chart_tasa_place_holder.write("Tasa Mercado vs Cupón")
-        result_chart_tasa_place_holder.bar_chart(df_tasa, horizontal=True)
+panel_resultados()
@@ -0,0 +1,117 @@
+"""
+Mide el tiempo de importación en frío de los puntos de entrada y lo compara con su
+presupuesto, para que los arranques de Streamlit, del CLI y del servicio sigan rápidos.
+
+Cada medición corre en un proceso nuevo. Además del tiempo, se verifica que cada
+punto de entrada no cargue módulos que no necesita (p. ej. la pila HTTP o el
+calendario de festivos en el camino de tasa fija). Termina con código 1 si algún
+punto de entrada supera su presupuesto o carga un módulo prohibido.
+
+Uso:
+    python -m benchmarks.bench_importacion --repeticiones 5
+    python -m benchmarks.bench_importacion --factor 1.5  # máquinas más lentas
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# Punto de entrada: (módulo, presupuesto en ms, módulos que no debe cargar)
+PRESUPUESTOS = {
+    "Núcleo de precios": (
+        "logic.kernels_logic",
+        200,
+        ("pandas", "requests", "holidays", "openpyxl", "streamlit"),
+    ),
+    "Tasa fija": (
+        "data_handling.tasa_fija_data",
+        800,
+        ("requests", "holidays", "openpyxl", "streamlit"),
+    ),
+    "IBR / IPC": (
+        "data_handling.ibr_data",
+        900,
+        ("requests", "holidays", "openpyxl", "streamlit"),
+    ),
+    "CLI por lotes": (
+        "valorar_lote",
+        1000,
+        ("requests", "holidays", "openpyxl", "streamlit"),
+    ),
+    "Servicio HTTP": (
+        "servidor_precios",
+        1100,
+        ("requests", "holidays", "openpyxl", "streamlit"),
+    ),
+    "Interfaz (cachés de páginas)": (
+        "utils.cache_streamlit",
+        1500,
+        ("requests", "holidays", "openpyxl"),
+    ),
+}
+
+MEDIR = """
+import json, sys, time
+inicio = time.perf_counter()
+import {modulo}
+ms = (time.perf_counter() - inicio) * 1000
+print(json.dumps({{"ms": ms, "cargados": [m for m in {prohibidos!r} if m in sys.modules]}}))
+"""
+
+
+def medir_importacion(modulo: str, prohibidos: tuple):
+    """
+    Importa `modulo` en un intérprete nuevo.
+
+    Retorna:
+    dict: "ms" (tiempo de importación) y "cargados" (módulos prohibidos presentes).
+    """
+    salida = subprocess.run(
+        [sys.executable, "-c", MEDIR.format(modulo=modulo, prohibidos=prohibidos)],
+        cwd=RAIZ,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument(
+        "--factor",
+        type=float,
+        default=1.0,
+        help="Multiplica los presupuestos (p. ej. en máquinas lentas o de CI).",
+    )
+    args = parser.parse_args()
+
+    fallas = 0
+    for nombre, (modulo, presupuesto, prohibidos) in PRESUPUESTOS.items():
+        # Una importación previa llena la caché de disco del sistema operativo
+        medir_importacion(modulo, prohibidos)
+        mediciones = [
+            medir_importacion(modulo, prohibidos) for _ in range(args.repeticiones)
+        ]
+        mediana = statistics.median(m["ms"] for m in mediciones)
+        limite = presupuesto * args.factor
+        cargados = sorted({m for medicion in mediciones for m in medicion["cargados"]})
+        estado = "ok" if mediana <= limite and not cargados else "EXCEDE"
+        fallas += estado != "ok"
+        detalle = f", carga {', '.join(cargados)}" if cargados else ""
+        print(
+            f"{nombre:<30} {mediana:8.0f} ms (presupuesto {limite:,.0f} ms) "
+            f"{estado}{detalle}"
+        )
+
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Compara los backends de `valorar_lote_tf` (NumPy y Numba) sobre un portafolio sintético.
+
+Uso:
+    python -m benchmarks.bench_kernels --bonos 5000 --repeticiones 5
+"""
+
+import argparse
+import calendar
+import datetime
+import time
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from data_handling.portafolio_data import armar_lote_tf
+from logic.kernels_logic import backend_activo, valorar_lote_tf
+
+
+def portafolio_sintetico(n_bonos: int, semilla: int = 0):
+    """
+    Posiciones de tasa fija aleatorias (columnas de `COLUMNAS_TF`). Una cuarta parte
+    se emite el último día del mes (días 30 y 31, 28 y 29 de febrero), para cubrir
+    los ajustes de fin de mes y de año bisiesto de los calendarios.
+    """
+    rng = np.random.default_rng(semilla)
+    emision = [
+        datetime.date(2015, 1, 1) + datetime.timedelta(days=int(d))
+        for d in rng.integers(0, 3000, n_bonos)
+    ]
+    emision = [
+        e.replace(day=calendar.monthrange(e.year, e.month)[1]) if fin_mes else e
+        for e, fin_mes in zip(emision, rng.random(n_bonos) < 0.25)
+    ]
+    # Emisión en 29 de febrero: vence el 28 de febrero en años no bisiestos
+    vencimiento = [
+        e + relativedelta(years=int(a))
+        for e, a in zip(emision, rng.integers(10, 30, n_bonos))
+    ]
+    return pd.DataFrame(
+        {
+            "fecha_emision": emision,
+            "fecha_vencimiento": vencimiento,
+            "fecha_negociacion": datetime.date(2024, 7, 15),
+            "periodo_cupon": rng.choice(
+                ["Anual", "Semestral", "Trimestral", "Mensual"], n_bonos
+            ),
+            "base_intereses": rng.choice(["30/360", "365/365"], n_bonos),
+            "modalidad_tasa_cupon": rng.choice(["EA", "Nominal"], n_bonos),
+            "tasa_cupon": rng.uniform(5, 12, n_bonos).round(2),
+            "valor_nominal_base": 100.0,
+            "tasa_mercado": rng.uniform(8, 13, n_bonos).round(3),
+            "valor_nominal": 1e6,
+        }
+    )
+
+
+def medir(funcion, repeticiones: int):
+    """
+    Mejor tiempo (segundos) de `repeticiones` ejecuciones.
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bonos", type=int, default=5000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    lote = armar_lote_tf(portafolio_sintetico(args.bonos))
+    print(f"Calendarios ({args.bonos} bonos): {time.perf_counter() - inicio:.3f} s")
+
+    referencia = valorar_lote_tf(lote, backend="numpy")
+    for backend in ("numpy", "numba"):
+        if backend_activo(backend) != backend:
+            print(f"{backend:>6}: no disponible (instala numba para habilitarlo)")
+            continue
+        # Primera llamada fuera de la medición (compilación JIT)
+        resultado = valorar_lote_tf(lote, backend=backend)
+        diferencia = max(
+            float(np.max(np.abs(resultado[clave] - referencia[clave])))
+            for clave in referencia
+        )
+        segundos = medir(
+            lambda: valorar_lote_tf(lote, backend=backend), args.repeticiones
+        )
+        print(
+            f"{backend:>6}: {segundos * 1000:9.2f} ms "
+            f"({args.bonos / segundos:,.0f} bonos/s, dif. máx. vs numpy {diferencia:.2e})"
+        )
+
+
+if __name__ == "__main__":
+    main()
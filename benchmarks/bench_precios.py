@@ -0,0 +1,361 @@
+"""
+Microbenchmarks del cálculo de precios sobre bonos sintéticos: todas las periodicidades,
+ambas bases y plazos de 1 a 30 años. Las tasas IBR e IPC se leen de un Excel de
+proyecciones generado en memoria, sin red ni archivos del usuario.
+
+Mide las funciones de fechas, días, descuento (con una tasa fija y con una tasa nueva
+en cada llamada), cupón corrido y TIR, y las tablas completas de Tasa Fija, IBR e IPC. Las tablas se miden sin la caché en disco y con
+las cachés de etapas vacías; la hoja de proyecciones y el calendario quedan en caché.
+Cada tiempo es la suma, sobre los 8 bonos de cada plazo, del mejor tiempo de cada uno.
+
+Los resultados se guardan como línea base en JSON. Con --comparar se contrastan con
+una línea base y se marcan las regresiones que superan el umbral; en ese caso
+termina con código 1.
+
+Uso:
+    python -m benchmarks.bench_precios --guardar benchmarks/linea_base_precios.json
+    python -m benchmarks.bench_precios --comparar benchmarks/linea_base_precios.json
+    python -m benchmarks.bench_precios --plazos 1 10 --umbral 0.5
+"""
+
+import argparse
+import datetime
+import gc
+import io
+import itertools
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_handling.ibr_data import generar_cashflows_df_ibr, limpiar_caches_ibr
+from data_handling.ipc_data import (
+    etapa_flujos_ipc,
+    generar_cashflows_df_ipc,
+    tasa_ipc_real_cache,
+)
+from data_handling.shared_data import calcular_cupon_corrido, calcular_tir_desde_df
+from data_handling.tasa_fija_data import etapa_flujos_tf, generar_cashflows_df_tf
+from logic.shared_logic import (
+    calcular_diferencias_fechas_pago_cupon,
+    calcular_numero_dias_descuento_cupon,
+    calcular_vp_cfs,
+    generar_fechas,
+)
+
+PERIODOS = ("Anual", "Semestral", "Trimestral", "Mensual")
+BASES = ("30/360", "365/365")
+PLAZOS = (1, 2, 5, 10, 20, 30)
+
+# Emisión a fin de mes (ejercita el ajuste de los meses de 31 días)
+FECHA_EMISION = datetime.date(2024, 1, 31)
+FECHA_NEGOCIACION = datetime.date(2024, 7, 15)
+
+# Diferencias menores a esta no se marcan como regresión (ruido de medición)
+DIFERENCIA_MINIMA_MS = 0.05
+
+# Contador para tasas que nunca se repiten (como las de negociación IBR/IPC)
+_tasas_nuevas = itertools.count(1)
+
+
+def bonos_sinteticos(plazos=PLAZOS):
+    """
+    Un bono por periodicidad, base y plazo (en años), con los parámetros de las
+    calculadoras.
+    """
+    return [
+        {
+            "plazo": plazo,
+            "fecha_emision": FECHA_EMISION,
+            "fecha_vencimiento": FECHA_EMISION.replace(year=FECHA_EMISION.year + plazo),
+            "fecha_negociacion": FECHA_NEGOCIACION,
+            "periodo_cupon": periodo,
+            "base_intereses": base,
+            "tasa_cupon": 9.5,
+            "valor_nominal_base": 100.0,
+            "tasa_mercado": 10.25,
+            "valor_nominal": 1e6,
+        }
+        for plazo in plazos
+        for periodo in PERIODOS
+        for base in BASES
+    ]
+
+
+def proyecciones_sinteticas():
+    """
+    Excel de proyecciones en memoria con las hojas "IBR Estimada" e "IPC Estimado"
+    (una tasa por día desde 2010 hasta 2060), en el formato del archivo que se sube a
+    la interfaz.
+    """
+    fechas = pd.date_range("2010-01-01", "2060-12-31", freq="D")
+    ciclo = np.sin(np.arange(len(fechas)) / 365 * 2 * np.pi)
+    archivo = io.BytesIO()
+    with pd.ExcelWriter(archivo) as escritor:
+        pd.DataFrame({"Fecha": fechas, "IBR": 0.08 + 0.01 * ciclo}).to_excel(
+            escritor, sheet_name="IBR Estimada", index=False
+        )
+        pd.DataFrame({"Fecha": fechas, "IPC": 0.05 + 0.005 * ciclo}).to_excel(
+            escritor, sheet_name="IPC Estimado", index=False
+        )
+    archivo.name = "proyecciones_sinteticas.xlsx"
+    return archivo
+
+
+def parametros_tf(bono: dict):
+    """
+    Parámetros de `generar_cashflows_df_tf` para el bono (cupón EA).
+    """
+    return {
+        "fecha_emision": bono["fecha_emision"],
+        "fecha_vencimiento": bono["fecha_vencimiento"],
+        "fecha_negociacion": bono["fecha_negociacion"],
+        "periodo_cupon": bono["periodo_cupon"],
+        "base_intereses": bono["base_intereses"],
+        "modalidad_tasa_cupon": "EA",
+        "tasa_cupon": bono["tasa_cupon"],
+        "valor_nominal_base": bono["valor_nominal_base"],
+        "tasa_mercado": bono["tasa_mercado"],
+        "valor_nominal": bono["valor_nominal"],
+    }
+
+
+def parametros_variable(bono: dict, archivo):
+    """
+    Parámetros de `generar_cashflows_df_ibr`/`generar_cashflows_df_ipc` (spread de
+    cupón y de negociación sobre la tasa del Excel sintético).
+    """
+    params = parametros_tf(bono)
+    params.pop("modalidad_tasa_cupon")
+    return {
+        **params,
+        "tasa_cupon": 1.5,
+        "tasa_mercado": 2.0,
+        "archivo_subido": archivo,
+        "modalidad": "Nominal",
+    }
+
+
+def _etapa_tf(bono: dict):
+    params = parametros_tf(bono)
+    params.pop("tasa_mercado")
+    return etapa_flujos_tf(**params)
+
+
+# Cada caso prepara (sin medir) lo que necesita el bono y retorna la llamada a medir
+def caso_generar_fechas(bono, archivo):
+    return lambda: generar_fechas(
+        fecha_inicio=bono["fecha_emision"],
+        fecha_fin=bono["fecha_vencimiento"],
+        fecha_negociacion=bono["fecha_negociacion"],
+        periodicidad=bono["periodo_cupon"],
+    )
+
+
+def caso_diferencias_fechas(bono, archivo):
+    fechas = list(_etapa_tf(bono)["fechas_cupon"])
+    return lambda: calcular_diferencias_fechas_pago_cupon(
+        lista_fechas=fechas,
+        periodicidad=bono["periodo_cupon"],
+        base_intereses=bono["base_intereses"],
+    )
+
+
+def caso_dias_descuento(bono, archivo):
+    fechas = list(_etapa_tf(bono)["fechas_cupon"])
+    return lambda: calcular_numero_dias_descuento_cupon(
+        fecha_negociacion=bono["fecha_negociacion"], lista_fechas=fechas
+    )
+
+
+def caso_vp_cfs(bono, archivo):
+    etapa = _etapa_tf(bono)
+    return lambda: calcular_vp_cfs(
+        lista_cfs=etapa["cf_t"],
+        tasa_mercado=bono["tasa_mercado"],
+        lista_dias_descuento=etapa["dias_descuento_cupon"],
+    )
+
+
+def caso_vp_cfs_tasas_distintas(bono, archivo):
+    etapa = _etapa_tf(bono)
+    tasa_mercado = bono["tasa_mercado"] + next(_tasas_nuevas) * 1e-7
+    return lambda: calcular_vp_cfs(
+        lista_cfs=etapa["cf_t"],
+        tasa_mercado=tasa_mercado,
+        lista_dias_descuento=etapa["dias_descuento_cupon"],
+    )
+
+
+def caso_cupon_corrido(bono, archivo):
+    df = generar_cashflows_df_tf.__wrapped__(**parametros_tf(bono))
+    return lambda: calcular_cupon_corrido(
+        df=df.copy(),
+        date_negociacion=bono["fecha_negociacion"],
+        periodicidad=bono["periodo_cupon"],
+        base_intereses=bono["base_intereses"],
+        valor_nominal_base=bono["valor_nominal_base"],
+    )
+
+
+def caso_tir(bono, archivo):
+    df = generar_cashflows_df_tf.__wrapped__(**parametros_tf(bono))
+    valor_giro = df["VP CF"].sum() / 100 * bono["valor_nominal"]
+    return lambda: calcular_tir_desde_df(
+        df=df,
+        columna_flujos="Flujo Pesos ($)",
+        valor_giro=valor_giro,
+        fecha_negociacion=bono["fecha_negociacion"],
+    )
+
+
+def caso_cashflows_tf(bono, archivo):
+    etapa_flujos_tf.cache_clear()
+    params = parametros_tf(bono)
+    return lambda: generar_cashflows_df_tf.__wrapped__(**params)
+
+
+def caso_cashflows_ibr(bono, archivo):
+    limpiar_caches_ibr()
+    params = parametros_variable(bono, archivo)
+    return lambda: generar_cashflows_df_ibr.__wrapped__(archivo=archivo, **params)
+
+
+def caso_cashflows_ipc(bono, archivo):
+    tasa_ipc_real_cache.cache_clear()
+    etapa_flujos_ipc.cache_clear()
+    params = parametros_variable(bono, archivo)
+    return lambda: generar_cashflows_df_ipc.__wrapped__(modo_ipc="Inicio", **params)
+
+
+CASOS = {
+    "generar_fechas": caso_generar_fechas,
+    "calcular_diferencias_fechas_pago_cupon": caso_diferencias_fechas,
+    "calcular_numero_dias_descuento_cupon": caso_dias_descuento,
+    "calcular_vp_cfs": caso_vp_cfs,
+    "calcular_vp_cfs (tasas distintas)": caso_vp_cfs_tasas_distintas,
+    "calcular_cupon_corrido": caso_cupon_corrido,
+    "calcular_tir_desde_df": caso_tir,
+    "generar_cashflows_df_tf": caso_cashflows_tf,
+    "generar_cashflows_df_ibr": caso_cashflows_ibr,
+    "generar_cashflows_df_ipc": caso_cashflows_ipc,
+}
+
+
+def medir_caso(caso, bonos: list, archivo, repeticiones: int):
+    """
+    Suma, sobre `bonos`, el mejor tiempo (ms) de `repeticiones` llamadas de cada
+    bono; solo se mide la llamada, no su preparación.
+    """
+    total = 0.0
+    for bono in bonos:
+        mejor = float("inf")
+        for _ in range(repeticiones):
+            llamada = caso(bono, archivo)
+            # Sin recolección de basura durante la llamada (como `timeit`)
+            gc.disable()
+            try:
+                inicio = time.perf_counter()
+                resultado = llamada()
+                mejor = min(mejor, time.perf_counter() - inicio)
+            finally:
+                gc.enable()
+            if isinstance(resultado, dict) and "error" in resultado:
+                raise RuntimeError(resultado["error"])
+        total += mejor
+    return total * 1000
+
+
+def ejecutar(plazos, repeticiones: int):
+    """
+    Retorna:
+    dict: Milisegundos por "función|plazo".
+    """
+    archivo = proyecciones_sinteticas()
+    bonos = bonos_sinteticos(plazos)
+    tiempos = {}
+    for nombre, caso in CASOS.items():
+        # Pasada previa: lee la hoja de proyecciones y arma el calendario
+        medir_caso(caso, bonos[:1], archivo, 1)
+        for plazo in plazos:
+            grupo = [b for b in bonos if b["plazo"] == plazo]
+            tiempos[f"{nombre}|{plazo}a"] = medir_caso(
+                caso, grupo, archivo, repeticiones
+            )
+    return tiempos
+
+
+def comparar(tiempos: dict, base: dict, umbral: float):
+    """
+    Imprime cada tiempo frente a la línea base.
+
+    Retorna:
+    int: Número de regresiones (más lento que la base en más de `umbral`, relativo,
+    y de `DIFERENCIA_MINIMA_MS`).
+    """
+    regresiones = 0
+    for clave, ms in tiempos.items():
+        if clave not in base:
+            print(f"{clave:<48} {ms:10.3f} ms  (sin línea base)")
+            continue
+        cambio = ms / base[clave] - 1 if base[clave] else 0.0
+        regresion = cambio > umbral and ms - base[clave] > DIFERENCIA_MINIMA_MS
+        regresiones += regresion
+        print(
+            f"{clave:<48} {ms:10.3f} ms  base {base[clave]:10.3f} ms  {cambio:+7.1%}"
+            f"{'  REGRESIÓN' if regresion else ''}"
+        )
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--plazos", type=int, nargs="+", default=list(PLAZOS))
+    parser.add_argument("--guardar", help="Ruta del JSON donde guardar la línea base.")
+    parser.add_argument("--comparar", help="Ruta de la línea base a comparar.")
+    parser.add_argument(
+        "--umbral",
+        type=float,
+        default=0.25,
+        help="Aumento relativo que se considera regresión (0.25 = 25%%).",
+    )
+    args = parser.parse_args()
+
+    tiempos = ejecutar(args.plazos, args.repeticiones)
+
+    regresiones = 0
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        print(f"Línea base: {base['fecha']} ({base['python']}, {base['plataforma']})")
+        regresiones = comparar(tiempos, base["tiempos_ms"], args.umbral)
+        print(f"{regresiones} regresiones (umbral {args.umbral:.0%})")
+    else:
+        for clave, ms in tiempos.items():
+            print(f"{clave:<48} {ms:10.3f} ms")
+
+    if args.guardar:
+        with open(args.guardar, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "python": platform.python_version(),
+                    "plataforma": platform.platform(),
+                    "repeticiones": args.repeticiones,
+                    "tiempos_ms": tiempos,
+                },
+                f,
+                indent=2,
+                ensure_ascii=False,
+            )
+        print(f"Línea base guardada en {args.guardar}")
+
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Mide la trayectoria de convergencia al par (`trayectoria_par_tf`) y verifica que converge.
+
+La medición usa el caso más pesado de la página de Tasa Fija: un bono mensual a 30
+años (~11.000 fechas x 360 cupones), con el tiempo y el pico de memoria de NumPy. La
+verificación recorre todas las periodicidades, bases y modalidades con tasas de
+mercado por debajo, igual y por encima del cupón: el último día el precio limpio debe
+quedar a menos de `TOLERANCIA_PAR` del par (sin el ajuste del cupón corrido del último
+periodo caía a cero). Si alguna falla, termina con código 1.
+
+Uso:
+    python -m benchmarks.bench_trayectoria --repeticiones 5
+"""
+
+import argparse
+import datetime
+import sys
+import time
+import tracemalloc
+
+from data_handling.horizonte_data import trayectoria_par_tf
+
+PERIODOS = ("Anual", "Semestral", "Trimestral", "Mensual")
+BASES = ("30/360", "365/365")
+MODALIDADES = ("EA", "Nominal")
+TASAS_MERCADO = (4.0, 8.0, 14.0)
+
+# Emisión a fin de mes (ejercita el ajuste de los meses de 31 días)
+FECHA_EMISION = datetime.date(2024, 1, 31)
+
+# Distancia máxima al par del precio limpio el día anterior al vencimiento (% del nominal)
+TOLERANCIA_PAR = 0.1
+
+
+def parametros_bono(plazo: int, periodo: str, base: str, modalidad: str, tasa: float):
+    return {
+        "fecha_emision": FECHA_EMISION,
+        "fecha_vencimiento": FECHA_EMISION.replace(year=FECHA_EMISION.year + plazo),
+        "periodo_cupon": periodo,
+        "base_intereses": base,
+        "modalidad_tasa_cupon": modalidad,
+        "tasa_cupon": 8.0,
+        "valor_nominal_base": 100.0,
+        "tasa_mercado": tasa,
+    }
+
+
+def verificar_convergencia(plazo: int = 5):
+    """
+    Retorna:
+    list[str]: Casos cuyo último precio limpio queda a más de `TOLERANCIA_PAR` del par.
+    """
+    fallas = []
+    for periodo in PERIODOS:
+        for base in BASES:
+            for modalidad in MODALIDADES:
+                for tasa in TASAS_MERCADO:
+                    df = trayectoria_par_tf(
+                        **parametros_bono(plazo, periodo, base, modalidad, tasa)
+                    )
+                    ultimo = df["Precio Limpio"].iloc[-1]
+                    if not abs(ultimo - 100) <= TOLERANCIA_PAR:
+                        fallas.append(
+                            f"{periodo} {base} {modalidad} al {tasa}%: {ultimo:.4f}"
+                        )
+    return fallas
+
+
+def medir(parametros: dict, repeticiones: int):
+    """
+    Mejor tiempo (s) y pico de memoria (bytes) de la trayectoria, con la etapa de
+    cupones ya en caché.
+    """
+    trayectoria_par_tf(**parametros)
+    tracemalloc.start()
+    df = trayectoria_par_tf(**parametros)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        trayectoria_par_tf(**parametros)
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos), pico, len(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--plazo", type=int, default=30, help="Plazo en años.")
+    args = parser.parse_args()
+
+    segundos, pico, n_fechas = medir(
+        parametros_bono(args.plazo, "Mensual", "365/365", "EA", 10.25),
+        args.repeticiones,
+    )
+    print(
+        f"Mensual a {args.plazo} años: {n_fechas:,} fechas en {segundos * 1e3:,.1f} ms "
+        f"(pico de memoria {pico / 2**20:,.1f} MiB)"
+    )
+
+    fallas = verificar_convergencia()
+    casos = len(PERIODOS) * len(BASES) * len(MODALIDADES) * len(TASAS_MERCADO)
+    print(f"Convergencia al par: {casos - len(fallas)} de {casos} casos ok")
+    for falla in fallas:
+        print(f"  NO CONVERGE {falla}")
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import hashlib
+import io
+import threading
+import weakref
+
+from data_handling.shared_data import liberar_hojas_excel
+
+# Almacén por proceso de los archivos de proyecciones subidos, deduplicados por
+# contenido: cada sesión guarda solo una referencia (un BytesIO que comparte los
+# bytes del almacén, sin copiarlos) y la entrada se libera, junto con sus hojas
+# ya leídas, cuando la última referencia deja de existir.
+
+_archivos = {}
+_candado = threading.Lock()
+
+# Funciones llamadas con la huella de cada archivo liberado (p. ej. cachés de la interfaz)
+_liberaciones = [liberar_hojas_excel]
+
+
+def registrar_liberacion_archivo(funcion):
+    """
+    Registra una función que se llama con la huella de cada archivo liberado del almacén.
+    """
+    _liberaciones.append(funcion)
+
+
+def compartir_archivo(archivo):
+    """
+    Guarda el archivo en el almacén (una sola vez por contenido) y retorna una
+    referencia propia a él.
+
+    Parámetros:
+    archivo: Archivo subido (UploadedFile / BytesIO) o None.
+
+    Retorna:
+    io.BytesIO: Referencia de solo lectura con los atributos "name" y "huella" (SHA-1
+    del contenido, la misma de `huella_archivo`), o None si no hay archivo.
+    """
+    if archivo is None:
+        return None
+    huella = getattr(archivo, "huella", None)
+    datos = archivo.getvalue()
+    if huella is None:
+        huella = hashlib.sha1(datos).hexdigest()
+    with _candado:
+        entrada = _archivos.setdefault(huella, {"datos": datos, "referencias": 0})
+        entrada["referencias"] += 1
+    referencia = io.BytesIO(entrada["datos"])
+    referencia.name = getattr(archivo, "name", "proyecciones.xlsx")
+    referencia.huella = huella
+    weakref.finalize(referencia, _liberar, huella)
+    return referencia
+
+
+def _liberar(huella: str):
+    with _candado:
+        entrada = _archivos[huella]
+        entrada["referencias"] -= 1
+        if entrada["referencias"]:
+            return
+        del _archivos[huella]
+    for funcion in _liberaciones:
+        funcion(huella)
+
+
+def estadisticas_archivos():
+    """
+    Retorna:
+    dict: "archivos" (contenidos distintos), "referencias" y "bytes" en el almacén.
+    """
+    with _candado:
+        return {
+            "archivos": len(_archivos),
+            "referencias": sum(e["referencias"] for e in _archivos.values()),
+            "bytes": sum(len(e["datos"]) for e in _archivos.values()),
+        }
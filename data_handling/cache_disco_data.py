@@ -0,0 +1,297 @@
+import datetime
+import functools
+import hashlib
+import inspect
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils import configuracion
+from utils.helper_functions import huella_archivo
+
+# Caché en disco de resultados de valoración, compartida entre procesos (páginas de
+# Streamlit, valorador por lotes, servicio HTTP). Cada resultado se guarda bajo el
+# hash canónico de sus entradas, de la huella de la fuente de tasas y de la del
+# código de cálculo, como un .npz (columnas del DataFrame + atributos) en una base
+# SQLite en modo WAL, que admite lectores y escritores concurrentes de varios procesos.
+
+ARCHIVO_CACHE_DISCO = configuracion.DIRECTORIO_DATOS / "resultados.sqlite"
+
+# Versión del formato de llaves y valores; cambiarla invalida las entradas previas
+VERSION_CACHE = 1
+
+# Paquetes cuyo código fuente entra en la llave (ver `huella_codigo`)
+PAQUETES_CALCULO = ("logic", "data_handling", "utils")
+
+# Escrituras entre revisiones del tamaño total (desalojo LRU)
+ESCRITURAS_POR_REVISION = 64
+
+# Segundos mínimos entre actualizaciones del último uso de una misma entrada
+INTERVALO_ULTIMO_USO = 60
+
+_conexiones = threading.local()
+_estado = {"escrituras": 0}
+
+
+def _conexion():
+    """
+    Conexión a la base de la caché, una por hilo y proceso (las conexiones de SQLite
+    no se comparten entre hilos ni sobreviven a un fork).
+    """
+    conexion = getattr(_conexiones, "conexion", None)
+    if conexion is not None and _conexiones.pid == os.getpid():
+        return conexion
+    ARCHIVO_CACHE_DISCO.parent.mkdir(parents=True, exist_ok=True)
+    conexion = sqlite3.connect(ARCHIVO_CACHE_DISCO, timeout=30, isolation_level=None)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute("PRAGMA synchronous=NORMAL")
+    conexion.execute(
+        "CREATE TABLE IF NOT EXISTS resultados ("
+        "clave TEXT PRIMARY KEY, datos BLOB NOT NULL, bytes INTEGER NOT NULL, "
+        "ultimo_uso REAL NOT NULL)"
+    )
+    conexion.execute(
+        "CREATE INDEX IF NOT EXISTS resultados_ultimo_uso ON resultados (ultimo_uso)"
+    )
+    _conexiones.conexion = conexion
+    _conexiones.pid = os.getpid()
+    return conexion
+
+
+def _canonico(valor):
+    """
+    Representación estable (JSON) de una entrada de valoración: fechas en ISO,
+    números como float, arreglos por el hash de su contenido.
+    """
+    if valor is None or isinstance(valor, (str, bool)):
+        return valor
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, (int, float)):
+        return repr(float(valor))
+    if isinstance(valor, datetime.datetime):
+        if valor.time() == datetime.time(0):
+            return valor.date().isoformat()
+        return valor.isoformat()
+    if isinstance(valor, datetime.date):
+        return valor.isoformat()
+    if isinstance(valor, np.ndarray):
+        contenido = np.ascontiguousarray(valor)
+        return (
+            f"{contenido.dtype}{contenido.shape}:"
+            + hashlib.sha256(contenido.tobytes()).hexdigest()
+        )
+    if isinstance(valor, dict):
+        return {str(k): _canonico(v) for k, v in sorted(valor.items())}
+    if isinstance(valor, (list, tuple)):
+        return [_canonico(v) for v in valor]
+    raise TypeError(f"Entrada no soportada en la llave de caché: {type(valor)}")
+
+
+def huella_codigo():
+    """
+    Hash del código fuente de `PAQUETES_CALCULO`, calculado una vez por proceso: una
+    corrección en el cálculo invalida los resultados guardados (también los de tasa
+    fija, cuya huella de fuente es vacía) sin depender de subir `VERSION_CACHE`.
+    """
+    if "huella_codigo" not in _estado:
+        raiz = Path(__file__).resolve().parent.parent
+        huella = hashlib.sha256()
+        for ruta in sorted(
+            ruta
+            for paquete in PAQUETES_CALCULO
+            for ruta in (raiz / paquete).rglob("*.py")
+        ):
+            huella.update(ruta.relative_to(raiz).as_posix().encode("utf-8"))
+            huella.update(ruta.read_bytes())
+        _estado["huella_codigo"] = huella.hexdigest()
+    return _estado["huella_codigo"]
+
+
+def clave_resultado(nombre: str, entradas: dict, fuente: str):
+    """
+    Hash canónico (SHA-256) de la función, sus entradas, la huella de la fuente de
+    tasas y la del código de cálculo.
+    """
+    contenido = json.dumps(
+        [VERSION_CACHE, huella_codigo(), nombre, fuente, _canonico(entradas)],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def huella_fuente(archivo):
+    """
+    Huella de la fuente de tasas: el contenido del archivo de proyecciones o, sin
+    archivo, la fuente en línea configurada y el día (la serie se actualiza a diario).
+    """
+    if archivo is not None:
+        return f"archivo:{huella_archivo(archivo)}"
+    return f"{configuracion.FUENTE_IBR}:{datetime.date.today().isoformat()}"
+
+
+def _serializar(df: pd.DataFrame):
+    """
+    DataFrame a .npz comprimido: una matriz por columna, nombres y atributos en JSON.
+    """
+    arreglos = {
+        "__columnas__": np.array(json.dumps(list(df.columns))),
+        "__attrs__": np.array(json.dumps(df.attrs)),
+    }
+    for i, col in enumerate(df.columns):
+        valores = df[col].to_numpy()
+        if valores.dtype == object:
+            valores = valores.astype(str)
+        arreglos[f"c{i}"] = valores
+    destino = io.BytesIO()
+    np.savez_compressed(destino, **arreglos)
+    return destino.getvalue()
+
+
+def _deserializar(datos: bytes):
+    with np.load(io.BytesIO(datos), allow_pickle=False) as npz:
+        columnas = json.loads(npz["__columnas__"].item())
+        df = pd.DataFrame(
+            {
+                col: (
+                    npz[f"c{i}"].astype(object)
+                    if npz[f"c{i}"].dtype.kind == "U"
+                    else npz[f"c{i}"]
+                )
+                for i, col in enumerate(columnas)
+            }
+        )
+        df.attrs = json.loads(npz["__attrs__"].item())
+    return df
+
+
+def leer_resultado(clave: str):
+    """
+    Resultado guardado bajo `clave`, o None si no está (o la caché no está disponible).
+    """
+    try:
+        conexion = _conexion()
+        fila = conexion.execute(
+            "SELECT datos, ultimo_uso FROM resultados WHERE clave = ?", (clave,)
+        ).fetchone()
+        if fila is None:
+            return None
+        ahora = time.time()
+        if ahora - fila[1] > INTERVALO_ULTIMO_USO:
+            conexion.execute(
+                "UPDATE resultados SET ultimo_uso = ? WHERE clave = ?", (ahora, clave)
+            )
+        return _deserializar(fila[0])
+    except (sqlite3.Error, OSError, ValueError):
+        return None
+
+
+def guardar_resultado(clave: str, df: pd.DataFrame):
+    """
+    Guarda un resultado y, cada `ESCRITURAS_POR_REVISION` escrituras, desaloja las
+    entradas de uso más antiguo hasta quedar bajo el tamaño máximo.
+    """
+    try:
+        datos = _serializar(df)
+        conexion = _conexion()
+        conexion.execute(
+            "INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?)",
+            (clave, datos, len(datos), time.time()),
+        )
+        _estado["escrituras"] += 1
+        if _estado["escrituras"] % ESCRITURAS_POR_REVISION == 1:
+            desalojar(configuracion.CACHE_DISCO_BYTES)
+    except (sqlite3.Error, OSError, ValueError, TypeError):
+        pass  # La caché nunca debe impedir la valoración
+
+
+def desalojar(max_bytes: int):
+    """
+    Elimina las entradas de uso más antiguo hasta que el total quede bajo el 90 % de
+    `max_bytes`.
+
+    Retorna:
+    int: Entradas eliminadas.
+    """
+    conexion = _conexion()
+    total = conexion.execute(
+        "SELECT COALESCE(SUM(bytes), 0) FROM resultados"
+    ).fetchone()[0]
+    if total <= max_bytes:
+        return 0
+    sobrante = total - 0.9 * max_bytes
+    eliminadas = 0
+    conexion.execute("BEGIN IMMEDIATE")
+    try:
+        for clave, tamano in conexion.execute(
+            "SELECT clave, bytes FROM resultados ORDER BY ultimo_uso"
+        ).fetchall():
+            if sobrante <= 0:
+                break
+            conexion.execute("DELETE FROM resultados WHERE clave = ?", (clave,))
+            sobrante -= tamano
+            eliminadas += 1
+        conexion.execute("COMMIT")
+    except sqlite3.Error:
+        conexion.execute("ROLLBACK")
+        raise
+    return eliminadas
+
+
+def cache_en_disco(nombre: str):
+    """
+    Decorador para las funciones que generan tablas de flujos: con una entrada en la
+    caché se retorna directamente (sin generar fechas, resolver tasas ni descontar).
+    Los argumentos `archivo`/`archivo_subido` se reemplazan por la huella de la
+    fuente de tasas; los resultados con error (dict) o marcados con
+    `attrs["datos_desactualizados"]` no se guardan.
+    """
+
+    def decorador(funcion):
+        firma = inspect.signature(funcion)
+        con_fuente = bool({"archivo", "archivo_subido"} & set(firma.parameters))
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if configuracion.CACHE_DISCO_BYTES <= 0:
+                return funcion(*args, **kwargs)
+            argumentos = firma.bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            entradas = dict(argumentos.arguments)
+            archivos = [
+                entradas.pop(param)
+                for param in ("archivo", "archivo_subido")
+                if param in entradas
+            ]
+            fuente = (
+                huella_fuente(next((a for a in archivos if a is not None), None))
+                if con_fuente
+                else ""
+            )
+            try:
+                clave = clave_resultado(nombre, entradas, fuente)
+            except TypeError:
+                return funcion(*args, **kwargs)
+
+            resultado = leer_resultado(clave)
+            if resultado is not None:
+                return resultado
+            resultado = funcion(*args, **kwargs)
+            # No se guardan valoraciones hechas con datos de respaldo de BanRep
+            if isinstance(resultado, pd.DataFrame) and not resultado.attrs.get(
+                "datos_desactualizados"
+            ):
+                guardar_resultado(clave, resultado)
+            return resultado
+
+        return envoltura
+
+    return decorador
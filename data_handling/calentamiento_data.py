@@ -0,0 +1,108 @@
+import datetime
+import threading
+import time
+
+from data_handling.historico_data import sincronizar_historico_ibr
+from logic.ibr_logic import (
+    es_dia_habil_bancario,
+    fecha_publicacion_ibr,
+    obtener_tasa_ibr_real,
+)
+from utils import configuracion
+
+# Calentamiento de cachés al iniciar la aplicación, en un hilo aparte para no
+# demorar la primera página: calendario de festivos, histórico de IBR de BanRep y
+# fechas de publicación de la IBR. El IPC no tiene fuente en línea (solo el archivo
+# de proyecciones), así que no hay serie que sincronizar.
+
+_estado = {"hilo": None, "etapas": {}, "terminado": False}
+_candado = threading.Lock()
+
+
+def calentar_calendario(anios: int = 30):
+    """
+    Construye el calendario de festivos de Colombia para `anios` años antes y después
+    del año en curso (cada año se arma la primera vez que se consulta).
+    """
+    anio = datetime.date.today().year
+    for anio_festivos in range(anio - anios, anio + anios + 1):
+        es_dia_habil_bancario(datetime.date(anio_festivos, 1, 1))
+
+
+def calentar_publicaciones(fecha_inicio: datetime.date, fecha_fin: datetime.date):
+    """
+    Calcula (y deja en caché) la fecha de publicación de la IBR de cada día de la ventana.
+    """
+    dias = (fecha_fin - fecha_inicio).days
+    for i in range(dias + 1):
+        fecha_publicacion_ibr(fecha_inicio + datetime.timedelta(days=i))
+
+
+def calentar_series(fecha_inicio: datetime.date, fecha_fin: datetime.date):
+    """
+    Sincroniza el histórico local de IBR (fuente local y respaldo si BanRep falla) y,
+    con la fuente en línea, deja en caché la IBR de negociación de hoy.
+    """
+    sincronizar_historico_ibr(fecha_inicio, fecha_fin)
+    if configuracion.FUENTE_IBR == "banrep":
+        obtener_tasa_ibr_real(fecha_fin, archivo=None)
+
+
+def calentar_caches(ventana_dias: int = None):
+    """
+    Ejecuta las etapas del calentamiento; una falla (p. ej. BanRep sin conexión) no
+    detiene las siguientes.
+
+    Retorna:
+    dict: Por etapa, segundos que tomó o el error encontrado.
+    """
+    if ventana_dias is None:
+        ventana_dias = configuracion.VENTANA_CALENTAMIENTO_DIAS
+    hoy = datetime.date.today()
+    inicio = hoy - datetime.timedelta(days=ventana_dias)
+    etapas = {
+        "calendario": calentar_calendario,
+        "series": lambda: calentar_series(inicio, hoy),
+        "publicaciones": lambda: calentar_publicaciones(inicio, hoy),
+    }
+    for nombre, etapa in etapas.items():
+        tiempo_inicio = time.perf_counter()
+        try:
+            etapa()
+            _estado["etapas"][nombre] = round(time.perf_counter() - tiempo_inicio, 3)
+        except Exception as e:
+            _estado["etapas"][nombre] = f"Error: {e}"
+    return dict(_estado["etapas"])
+
+
+def iniciar_calentamiento(ventana_dias: int = None):
+    """
+    Lanza `calentar_caches` en un hilo de fondo, una sola vez por proceso.
+
+    Retorna:
+    threading.Thread: El hilo del calentamiento (el mismo en llamadas posteriores).
+    """
+    with _candado:
+        if _estado["hilo"] is None:
+
+            def trabajar():
+                calentar_caches(ventana_dias)
+                _estado["terminado"] = True
+
+            _estado["hilo"] = threading.Thread(
+                target=trabajar, name="calentamiento-caches", daemon=True
+            )
+            _estado["hilo"].start()
+        return _estado["hilo"]
+
+
+def estado_calentamiento():
+    """
+    Retorna:
+    dict: "iniciado", "terminado" y "etapas" (segundos o error por etapa).
+    """
+    return {
+        "iniciado": _estado["hilo"] is not None,
+        "terminado": _estado["terminado"],
+        "etapas": dict(_estado["etapas"]),
+    }
@@ -0,0 +1,159 @@
+import threading
+
+import pandas as pd
+from cachetools import LRUCache
+
+from data_handling.tasa_fija_data import etapa_flujos_tf
+from logic.curva_logic import (
+    armar_curva,
+    bootstrap_curva_cero,
+    factores_descuento_curva,
+    tasas_cero_curva,
+)
+from logic.shared_logic import calcular_vp_cfs
+
+COLUMNAS_CURVA = [
+    "fecha_emision",
+    "fecha_vencimiento",
+    "periodo_cupon",
+    "base_intereses",
+    "modalidad_tasa_cupon",
+    "tasa_cupon",
+    "tasa_mercado",
+]
+
+# Última curva construida por (fecha de valoración, términos de los instrumentos)
+_curvas = LRUCache(maxsize=32)
+_curvas_lock = threading.Lock()
+
+
+def _instrumento(terminos: tuple, tasa_mercado: float, fecha_valoracion):
+    """
+    Flujos de un instrumento de tasa fija con las convenciones de `generar_cashflows_df_tf`
+    y su precio sucio (base 100) a la tasa de mercado cotizada.
+    """
+    etapa = etapa_flujos_tf(
+        fecha_emision=terminos[0],
+        fecha_vencimiento=terminos[1],
+        fecha_negociacion=fecha_valoracion,
+        periodo_cupon=terminos[2],
+        base_intereses=terminos[3],
+        modalidad_tasa_cupon=terminos[4],
+        tasa_cupon=terminos[5],
+        valor_nominal_base=100.0,
+        valor_nominal=100.0,
+    )
+    precio = sum(
+        calcular_vp_cfs(
+            lista_cfs=etapa["cf_t"],
+            tasa_mercado=tasa_mercado,
+            lista_dias_descuento=etapa["dias_descuento_cupon"],
+        )
+    )
+    return {
+        "dias": etapa["dias_descuento_cupon"],
+        "flujos": etapa["cf_t"],
+        "precio": precio,
+        "tasa": tasa_mercado,
+    }
+
+
+def _leer_instrumentos(df_instrumentos: pd.DataFrame, fecha_valoracion):
+    """
+    Normaliza los instrumentos, descarta los vencidos y los ordena por vencimiento.
+
+    Retorna:
+    tuple[tuple, tuple]: Términos (sin la cotización) y cotizaciones de cada instrumento.
+    """
+    faltantes = [col for col in COLUMNAS_CURVA if col not in df_instrumentos.columns]
+    if faltantes:
+        raise ValueError(
+            f"❌ Faltan columnas en los instrumentos de la curva: {faltantes}"
+        )
+
+    df = df_instrumentos[COLUMNAS_CURVA].dropna().copy()
+    for col in ("fecha_emision", "fecha_vencimiento"):
+        df[col] = pd.to_datetime(df[col], dayfirst=True).dt.date
+    df = df[df["fecha_vencimiento"] > fecha_valoracion]
+    df = df.sort_values("fecha_vencimiento")
+
+    if df.empty:
+        raise ValueError("❌ No hay instrumentos vigentes para construir la curva.")
+
+    terminos = tuple(
+        tuple(fila) for fila in df[COLUMNAS_CURVA[:-1]].itertuples(index=False)
+    )
+    tasas = tuple(float(t) for t in df["tasa_mercado"])
+    return terminos, tasas
+
+
+def obtener_curva_cero(df_instrumentos: pd.DataFrame, fecha_valoracion):
+    """
+    Retorna la curva cero (bootstrapping) de los instrumentos de tasa fija a la fecha de valoración.
+
+    La curva se guarda en caché con sus nodos y pendientes precalculados. Si los
+    instrumentos son los mismos de una curva anterior y solo cambian cotizaciones, la
+    curva se reconstruye de forma incremental desde el primer instrumento modificado.
+
+    Parámetros:
+    df_instrumentos (pd.DataFrame): Una fila por instrumento con las columnas de `COLUMNAS_CURVA`.
+    fecha_valoracion (datetime.date): Fecha de valoración de la curva.
+
+    Retorna:
+    dict: Curva con "dias", "log_df", "pendientes", "fecha_valoracion", "terminos" y "tasas".
+    """
+    terminos, tasas = _leer_instrumentos(df_instrumentos, fecha_valoracion)
+    clave = (fecha_valoracion, terminos)
+
+    with _curvas_lock:
+        anterior = _curvas.get(clave)
+
+    if anterior is not None and anterior["tasas"] == tasas:
+        return anterior
+
+    desde = 0
+    if anterior is not None:
+        desde = next(
+            i for i, (a, b) in enumerate(zip(anterior["tasas"], tasas)) if a != b
+        )
+        instrumentos = anterior["instrumentos"][:desde]
+    else:
+        instrumentos = []
+    instrumentos += [
+        _instrumento(t, tasa, fecha_valoracion)
+        for t, tasa in zip(terminos[desde:], tasas[desde:])
+    ]
+
+    nodo_dias, nodo_log_df = bootstrap_curva_cero(
+        instrumentos,
+        desde=desde,
+        nodos=(anterior["dias"], anterior["log_df"]) if anterior else None,
+    )
+    curva = armar_curva(
+        nodo_dias,
+        nodo_log_df,
+        fecha_valoracion=fecha_valoracion,
+        terminos=terminos,
+        tasas=tasas,
+        instrumentos=instrumentos,
+    )
+
+    with _curvas_lock:
+        _curvas[clave] = curva
+
+    return curva
+
+
+def tabla_curva_cero(curva: dict):
+    """
+    Nodos de la curva como DataFrame para mostrar: días, años, factor de descuento y tasa cero EA.
+    """
+    dias = curva["dias"][1:]
+    return pd.DataFrame(
+        {
+            "Días": dias.astype(int),
+            "Años": dias / 365,
+            "Factor Descuento": factores_descuento_curva(curva, dias),
+            "Tasa Cero EA (%)": tasas_cero_curva(curva, dias),
+        }
+    )
@@ -0,0 +1,105 @@
+import io
+
+import pandas as pd
+
+from data_handling.ibr_data import generar_cashflows_df_ibr
+from data_handling.ipc_data import generar_cashflows_df_ipc
+from data_handling.lote_data import abrir_escritor, argumentos_calculadora
+from data_handling.tasa_fija_data import generar_cashflows_df_tf
+
+# Formatos de exportación y su tipo MIME
+FORMATOS_EXPORTACION = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+    "csv": "text/csv",
+}
+
+# Columnas del detalle de flujos de un portafolio (una fila por cupón de cada posición)
+COLUMNAS_FLUJOS_POSICIONES = [
+    "fila",
+    "id",
+    "tipo",
+    "Fechas Cupón",
+    "Días Cupón",
+    "Días Dcto Cupón",
+    "CFt",
+    "VP CF",
+    "t*PV CF",
+    "(t*PV CF)*(t+1)",
+    "Flujo Pesos ($)",
+]
+
+
+def exportar_tabla(df: pd.DataFrame, formato: str):
+    """
+    Serializa una tabla (p. ej. "Tabla de Datos" o "Flujos Reales") en xlsx, Parquet
+    o CSV.
+
+    Retorna:
+    bytes: Contenido del archivo.
+    """
+    destino = io.BytesIO()
+    escribir, cerrar = abrir_escritor(destino, formato=formato)
+    escribir(df)
+    cerrar()
+    return destino.getvalue()
+
+
+def tabla_flujos_posicion(fila: dict, archivo=None):
+    """
+    Tabla de flujos de una posición validada (ver `argumentos_calculadora`), con la
+    columna de flujo en pesos bajo un mismo nombre para los tres tipos de bono.
+    """
+    argumentos = argumentos_calculadora(fila)
+    if fila["tipo"] == "Tasa Fija":
+        df = generar_cashflows_df_tf(**argumentos)
+    elif fila["tipo"] == "IBR":
+        df = generar_cashflows_df_ibr(
+            archivo_subido=archivo, archivo=archivo, **argumentos
+        )
+    else:
+        df = generar_cashflows_df_ipc(archivo_subido=archivo, **argumentos)
+    if isinstance(df, dict) and "error" in df:
+        raise ValueError(df["error"])
+    return df.rename(columns={"Aprox. Flujo Pesos (COP$)": "Flujo Pesos ($)"})
+
+
+def escribir_flujos_posiciones(
+    posiciones: pd.DataFrame,
+    escribir,
+    archivo=None,
+    avance=None,
+    bonos_por_bloque: int = 500,
+):
+    """
+    Escribe el detalle de flujos de todas las posiciones con un escritor por bloques
+    (`abrir_escritor`), de a `bonos_por_bloque` bonos, sin armar la tabla completa en
+    memoria.
+
+    Parámetros:
+    posiciones (pd.DataFrame): Posiciones validadas con "fila", "tipo" e "id" opcional.
+    escribir (Callable): Función `escribir(df)` del escritor.
+    archivo: Archivo de proyecciones (IBR/IPC) o None.
+    avance (Callable, opcional): `avance(hechas, total)` tras cada bloque.
+
+    Retorna:
+    int: Filas (cupones) escritas.
+    """
+    total = len(posiciones)
+    filas_escritas = 0
+    bloque = []
+    for hechas, fila in enumerate(posiciones.to_dict("records"), start=1):
+        df = tabla_flujos_posicion(fila, archivo)
+        for col in ("tipo", "id", "fila"):
+            df.insert(0, col, fila.get(col))
+        bloque.append(df)
+        if len(bloque) == bonos_por_bloque or hechas == total:
+            tabla = pd.concat(bloque, ignore_index=True).reindex(
+                columns=COLUMNAS_FLUJOS_POSICIONES
+            )
+            escribir(tabla.astype({"id": "string"}))
+            filas_escritas += len(tabla)
+            bloque = []
+            if avance is not None:
+                avance(hechas, total)
+    return filas_escritas
@@ -0,0 +1,101 @@
+import datetime
+
+import pandas as pd
+
+from data_handling.shared_data import leer_datos_excel
+from logic.ibr_logic import fetch_ibr_data_banrep
+from utils.configuracion import DIRECTORIO_DATOS
+
+ARCHIVO_HISTORICO_IBR = DIRECTORIO_DATOS / "ibr_banrep.parquet"
+
+
+def leer_historico_local_ibr():
+    """
+    Lee el histórico local de IBR descargado de BanRep.
+
+    Retorna:
+        pd.DataFrame: Columnas "Fecha" y "Tasa_ibr_mes_nominal" (vacío si no existe).
+    """
+    if not ARCHIVO_HISTORICO_IBR.exists():
+        return pd.DataFrame(columns=["Fecha", "Tasa_ibr_mes_nominal"])
+    return pd.read_parquet(ARCHIVO_HISTORICO_IBR)
+
+
+def sincronizar_historico_ibr(fecha_inicio: datetime.date, fecha_fin: datetime.date):
+    """
+    Asegura que el histórico local de IBR cubra la ventana [fecha_inicio, fecha_fin],
+    descargando de BanRep únicamente los tramos que faltan y guardando el resultado.
+
+    Retorna:
+        pd.DataFrame: El histórico local completo, ordenado por fecha.
+    """
+    historico = leer_historico_local_ibr()
+    tramos = []
+
+    if historico.empty:
+        tramos.append((fecha_inicio, fecha_fin))
+    else:
+        primera = historico["Fecha"].min().date()
+        ultima = historico["Fecha"].max().date()
+        if fecha_inicio < primera:
+            tramos.append((fecha_inicio, primera - datetime.timedelta(days=1)))
+        if fecha_fin > ultima:
+            tramos.append((ultima + datetime.timedelta(days=1), fecha_fin))
+
+    nuevos = [fetch_ibr_data_banrep(inicio, fin) for inicio, fin in tramos]
+    nuevos = [df for df in nuevos if not df.empty]
+
+    if nuevos:
+        historico = (
+            pd.concat([historico, *nuevos], ignore_index=True)
+            .drop_duplicates(subset="Fecha", keep="last")
+            .sort_values("Fecha", ignore_index=True)
+        )
+        ARCHIVO_HISTORICO_IBR.parent.mkdir(parents=True, exist_ok=True)
+        historico.to_parquet(ARCHIVO_HISTORICO_IBR, index=False)
+
+    return historico
+
+
+def obtener_historico_ibr(
+    fecha_inicio: datetime.date, fecha_fin: datetime.date, archivo=None
+):
+    """
+    Retorna la serie de IBR (en porcentaje) de la ventana indicada, desde el archivo
+    de proyecciones si se sube uno, o desde el histórico local sincronizado con BanRep.
+
+    Retorna:
+        pd.DataFrame: Columnas "Fecha" y "Tasa_ibr_mes_nominal" ordenadas por fecha.
+    """
+    if archivo:
+        df = leer_datos_excel(archivo, "IBR Estimada").iloc[:, :2]
+        df.columns = ["Fecha", "Tasa_ibr_mes_nominal"]
+        df["Tasa_ibr_mes_nominal"] = df["Tasa_ibr_mes_nominal"] * 100
+    else:
+        df = sincronizar_historico_ibr(fecha_inicio, fecha_fin)
+
+    en_ventana = (df["Fecha"] >= pd.Timestamp(fecha_inicio)) & (
+        df["Fecha"] <= pd.Timestamp(fecha_fin)
+    )
+
+    return df[en_ventana].sort_values("Fecha", ignore_index=True)
+
+
+def obtener_historico_ipc_mensual(fecha_fin: datetime.date, archivo):
+    """
+    Retorna la serie mensual (último dato de cada mes, en porcentaje) del IPC del archivo
+    de proyecciones hasta `fecha_fin`. No existe aún una fuente en línea para el IPC.
+
+    Retorna:
+        pd.Series: Serie indexada por fin de mes.
+    """
+    if not archivo:
+        raise ValueError(
+            "❌ Se requiere el archivo de proyecciones con la hoja 'IPC Estimado'."
+        )
+
+    df = leer_datos_excel(archivo, "IPC Estimado")
+    serie = df.set_index(df.columns[0]).iloc[:, 0] * 100
+    serie = serie[serie.index <= pd.Timestamp(fecha_fin)].sort_index()
+
+    return serie.resample("ME").last().dropna()
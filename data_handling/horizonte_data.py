@@ -0,0 +1,194 @@
+import datetime
+
+import pandas as pd
+
+from data_handling.tasa_fija_data import etapa_cupones_vigentes_tf, etapa_flujos_tf
+from logic.fechas_logic import descomponer_fechas
+from logic.horizonte_logic import valorar_horizonte
+
+
+def fechas_fin_de_mes(fecha_inicio: datetime.date, n_meses: int):
+    """
+    Los `n_meses` cierres de mes posteriores a `fecha_inicio`.
+    """
+    return [
+        f.date()
+        for f in pd.date_range(start=fecha_inicio, periods=n_meses + 1, freq="ME")
+        if f.date() > fecha_inicio
+    ][:n_meses]
+
+
+def proyectar_horizonte_tf(
+    fecha_emision,
+    fecha_vencimiento,
+    fecha_negociacion,
+    periodo_cupon,
+    base_intereses,
+    modalidad_tasa_cupon,
+    tasa_cupon,
+    valor_nominal_base,
+    tasa_mercado,
+    valor_nominal,
+    fechas_horizonte: list,
+    curva: dict = None,
+):
+    """
+    Proyecta el valor del bono de tasa fija en varias fechas futuras si la tasa de
+    mercado (o la curva cero, estática por plazo) no cambia.
+
+    Reutiliza la etapa de flujos en caché de la negociación (un solo calendario) y
+    valora todas las fechas en una pasada. Frente a la fecha de negociación:
+    - Carry: cupones cobrados más el cambio en el cupón corrido (sin reinversión).
+    - Roll-Down: cambio del precio limpio por el paso del tiempo.
+    - Retorno Total: Carry + Roll-Down (cambio del precio sucio más cupones cobrados).
+
+    Las fechas en o después del vencimiento se omiten.
+
+    Retorna:
+    pd.DataFrame: Una fila por fecha (la primera es la negociación) con precios en % del nominal.
+    """
+    fechas_horizonte = sorted(
+        {f for f in fechas_horizonte if f < fecha_vencimiento} | {fecha_negociacion}
+    )
+    if fechas_horizonte[0] < fecha_negociacion:
+        raise ValueError(
+            "❌ Las fechas del horizonte no pueden ser anteriores a la negociación."
+        )
+
+    etapa = etapa_flujos_tf(
+        fecha_emision=fecha_emision,
+        fecha_vencimiento=fecha_vencimiento,
+        fecha_negociacion=fecha_negociacion,
+        periodo_cupon=periodo_cupon,
+        base_intereses=base_intereses,
+        modalidad_tasa_cupon=modalidad_tasa_cupon,
+        tasa_cupon=tasa_cupon,
+        valor_nominal_base=valor_nominal_base,
+        valor_nominal=valor_nominal,
+    )
+    vigentes = etapa_cupones_vigentes_tf(
+        fecha_emision=fecha_emision,
+        fecha_vencimiento=fecha_vencimiento,
+        fecha_desde=fecha_negociacion,
+        periodo_cupon=periodo_cupon,
+        base_intereses=base_intereses,
+        modalidad_tasa_cupon=modalidad_tasa_cupon,
+        tasa_cupon=tasa_cupon,
+        valor_nominal_base=valor_nominal_base,
+    )
+    fechas_cupon = [
+        datetime.datetime.strptime(f, "%d/%m/%Y").date() for f in etapa["fechas_cupon"]
+    ]
+
+    valores = valorar_horizonte(
+        fechas_cupon=descomponer_fechas(fechas_cupon),
+        inicios_periodo=descomponer_fechas(vigentes["inicios_periodo"]),
+        cf_t=etapa["cf_t"],
+        dias_cupon=etapa["dias_cupon"],
+        horizonte=descomponer_fechas(fechas_horizonte),
+        base_intereses=base_intereses,
+        valor_nominal_base=valor_nominal_base,
+        tasa_mercado=None if curva is not None else tasa_mercado,
+        curva=curva,
+        cf_primero=vigentes["cf_primero"],
+        dias_primero=vigentes["dias_primero"],
+    )
+
+    precio_sucio = valores["precio_sucio"]
+    cupon_corrido = valores["cupon_corrido"]
+    precio_limpio = precio_sucio - cupon_corrido
+    carry = valores["cupones_recibidos"] + cupon_corrido - cupon_corrido[0]
+    roll_down = precio_limpio - precio_limpio[0]
+
+    return pd.DataFrame(
+        {
+            "Fecha Horizonte": fechas_horizonte,
+            "Precio Sucio": precio_sucio,
+            "Cupón Corrido": cupon_corrido,
+            "Precio Limpio": precio_limpio,
+            "Cupones Recibidos": valores["cupones_recibidos"],
+            "Carry": carry,
+            "Roll-Down": roll_down,
+            "Retorno Total": carry + roll_down,
+            "Valor Giro": precio_sucio / 100 * valor_nominal,
+            "Retorno Total ($)": (carry + roll_down) / 100 * valor_nominal,
+        }
+    )
+
+
+def trayectoria_par_tf(
+    fecha_emision,
+    fecha_vencimiento,
+    periodo_cupon,
+    base_intereses,
+    modalidad_tasa_cupon,
+    tasa_cupon,
+    valor_nominal_base,
+    tasa_mercado,
+    curva: dict = None,
+):
+    """
+    Trayectoria teórica de precio (convergencia al par) del bono de tasa fija para cada
+    día desde la emisión hasta el día anterior al vencimiento, a tasa de mercado (o
+    curva cero) constante.
+
+    Usa un solo calendario de pagos (la etapa de cupones desde la emisión) y valora
+    todas las fechas con la matriz fechas x cupones de `valorar_horizonte`, por bloques.
+    En el último periodo el cupón corrido no incluye el nominal, así que el precio
+    limpio termina cerca del par (y no en cero).
+
+    Retorna:
+    pd.DataFrame: Columnas "Fecha", "Precio Sucio", "Cupón Corrido" y "Precio Limpio"
+    (en % del nominal).
+    """
+    if fecha_vencimiento <= fecha_emision:
+        raise ValueError("❌ La fecha de vencimiento debe ser posterior a la emisión.")
+
+    desde = fecha_emision - datetime.timedelta(days=1)
+    etapa = etapa_flujos_tf(
+        fecha_emision=fecha_emision,
+        fecha_vencimiento=fecha_vencimiento,
+        fecha_negociacion=desde,
+        periodo_cupon=periodo_cupon,
+        base_intereses=base_intereses,
+        modalidad_tasa_cupon=modalidad_tasa_cupon,
+        tasa_cupon=tasa_cupon,
+        valor_nominal_base=valor_nominal_base,
+        valor_nominal=valor_nominal_base,
+    )
+    vigentes = etapa_cupones_vigentes_tf(
+        fecha_emision=fecha_emision,
+        fecha_vencimiento=fecha_vencimiento,
+        fecha_desde=desde,
+        periodo_cupon=periodo_cupon,
+        base_intereses=base_intereses,
+        modalidad_tasa_cupon=modalidad_tasa_cupon,
+        tasa_cupon=tasa_cupon,
+        valor_nominal_base=valor_nominal_base,
+    )
+    fechas = pd.date_range(
+        fecha_emision, fecha_vencimiento - datetime.timedelta(days=1), freq="D"
+    )
+
+    valores = valorar_horizonte(
+        fechas_cupon=descomponer_fechas(vigentes["ordinal_cupon"]),
+        inicios_periodo=descomponer_fechas(vigentes["ordinal_inicio"]),
+        cf_t=etapa["cf_t"],
+        dias_cupon=etapa["dias_cupon"],
+        horizonte=descomponer_fechas(fechas.values),
+        base_intereses=base_intereses,
+        valor_nominal_base=valor_nominal_base,
+        tasa_mercado=None if curva is not None else tasa_mercado,
+        curva=curva,
+        cf_primero=vigentes["cf_primero"],
+        dias_primero=vigentes["dias_primero"],
+    )
+
+    return pd.DataFrame(
+        {
+            "Fecha": fechas.date,
+            "Precio Sucio": valores["precio_sucio"],
+            "Cupón Corrido": valores["cupon_corrido"],
+            "Precio Limpio": valores["precio_sucio"] - valores["cupon_corrido"],
+        }
+    )
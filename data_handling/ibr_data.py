@@ -1,7 +1,13 @@
+import functools
+import threading
+
 import pandas as pd
+from cachetools import LRUCache, cached
 
+from data_handling.cache_disco_data import cache_en_disco
+from data_handling.shared_data import construir_df_cashflows
 from logic.ibr_logic import (
-    obtener_tasa_negociacion_EA,
+    obtener_tasa_ibr_real,
     procesar_tasa_cupon_ibr_datos,
     procesar_tasa_flujos_real_ibr,
 )
@@ -10,14 +16,59 @@ from logic.shared_logic import (
     calcular_diferencias_fechas_pago_cupon,
     calcular_flujo_pesos,
     calcular_numero_dias_descuento_cupon,
-    calcular_t_pv_cf,
-    calcular_t_pv_cf_t1,
-    calcular_vp_cfs,
+    convertir_tasa_nominal_a_efectiva_anual,
     generar_fechas,
+    sumar_tasas,
+)
+from utils.helper_functions import clave_con_archivo
+from utils.proteccion_banrep import (
+    marcar_datos_desactualizados,
+    registrar_datos_desactualizados,
+    registrar_recuperacion_banrep,
 )
 
 
-def generar_cashflows_df_ibr(
+def _cache_ibr(maxsize: int):
+    """
+    Caché en memoria (llave `clave_con_archivo`) que guarda con cada resultado si se
+    calculó con datos viejos de la IBR y, en cada acierto, vuelve a marcar los
+    registros activos: la marca sigue al resultado y no a la sesión que lo calculó.
+    """
+
+    def decorador(funcion):
+        @cached(
+            cache=LRUCache(maxsize=maxsize),
+            key=clave_con_archivo,
+            lock=threading.Lock(),
+        )
+        def calcular(*args, **kwargs):
+            with registrar_datos_desactualizados() as registro:
+                resultado = funcion(*args, **kwargs)
+            return resultado, registro["desactualizado"]
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            resultado, desactualizado = calcular(*args, **kwargs)
+            if desactualizado:
+                marcar_datos_desactualizados()
+            return resultado
+
+        envoltura.cache_clear = calcular.cache_clear
+        return envoltura
+
+    return decorador
+
+
+@_cache_ibr(maxsize=512)
+def tasa_ibr_real_cache(fecha, archivo=None):
+    """
+    Versión en caché de `obtener_tasa_ibr_real`, con llave (fecha, huella del archivo).
+    """
+    return obtener_tasa_ibr_real(fecha=fecha, archivo=archivo)
+
+
+@_cache_ibr(maxsize=128)
+def etapa_flujos_ibr(
     fecha_emision,
     fecha_vencimiento,
     fecha_negociacion,
@@ -25,14 +76,13 @@ def generar_cashflows_df_ibr(
     base_intereses,
     tasa_cupon,
     valor_nominal_base,
-    tasa_mercado,
     valor_nominal,
-    archivo_subido,
     modalidad,
-    archivo,
+    archivo=None,
 ):
     """
-    Returns a complete bond cash flow DataFrame.
+    Calcula (y guarda en caché) la etapa de flujos del bono IBR: fechas, días,
+    tasas IBR+spread del cupón y cupones. Ninguno depende del spread de negociación.
     """
     fechas_cupon = generar_fechas(
         fecha_inicio=fecha_emision,
@@ -48,61 +98,92 @@ def generar_cashflows_df_ibr(
     dias_descuento_cupon = calcular_numero_dias_descuento_cupon(
         fecha_negociacion=fecha_negociacion, lista_fechas=fechas_cupon
     )
+    tasas = procesar_tasa_cupon_ibr_datos(
+        base_dias_anio=base_intereses,
+        periodicidad=periodo_cupon,
+        tasa_anual_cupon=tasa_cupon,
+        lista_fechas=fechas_cupon,
+        fecha_negociacion=fecha_negociacion,
+        modalidad=modalidad,
+        archivo=archivo,
+    )
+    cf_t = calcular_cupones_futuros_cf(
+        valor_nominal_base=valor_nominal_base, tasas_periodicas=tasas
+    )
+    flujo_pesos = calcular_flujo_pesos(valor_nominal=valor_nominal, lista_cfs=cf_t)
+
+    return {
+        "fechas_cupon": tuple(fechas_cupon),
+        "dias_cupon": tuple(dias_cupon),
+        "dias_descuento_cupon": tuple(dias_descuento_cupon),
+        "cf_t": tuple(cf_t),
+        "flujo_pesos": tuple(flujo_pesos),
+    }
+
+
+@cache_en_disco("generar_cashflows_df_ibr")
+def generar_cashflows_df_ibr(
+    fecha_emision,
+    fecha_vencimiento,
+    fecha_negociacion,
+    periodo_cupon,
+    base_intereses,
+    tasa_cupon,
+    valor_nominal_base,
+    tasa_mercado,
+    valor_nominal,
+    archivo_subido,
+    modalidad,
+    archivo,
+    curva=None,
+):
+    """
+    Returns a complete bond cash flow DataFrame.
+    Si se entrega `curva` (curva cero), los flujos se descuentan con ella en lugar de la tasa.
+    `df.attrs["datos_desactualizados"]` indica si se usaron datos viejos de la IBR.
+    """
     # ⚠️ Handling missing IBR rate
     try:
-        tasas = procesar_tasa_cupon_ibr_datos(
-            base_dias_anio=base_intereses,
-            periodicidad=periodo_cupon,
-            tasa_anual_cupon=tasa_cupon,
-            lista_fechas=fechas_cupon,
-            fecha_negociacion=fecha_negociacion,
-            modalidad=modalidad,
-            archivo=archivo,
-        )
+        with registrar_datos_desactualizados() as registro:
+            etapa = etapa_flujos_ibr(
+                fecha_emision=fecha_emision,
+                fecha_vencimiento=fecha_vencimiento,
+                fecha_negociacion=fecha_negociacion,
+                periodo_cupon=periodo_cupon,
+                base_intereses=base_intereses,
+                tasa_cupon=tasa_cupon,
+                valor_nominal_base=valor_nominal_base,
+                valor_nominal=valor_nominal,
+                modalidad=modalidad,
+                archivo=archivo,
+            )
+            tasa_ibr_negociacion = tasa_ibr_real_cache(
+                fecha=fecha_negociacion, archivo=archivo_subido
+            )
     except ValueError as e:
         return {"error": str(e)}  # Return error message instead of crashing
 
-    cf_t = calcular_cupones_futuros_cf(
-        valor_nominal_base=valor_nominal_base, tasas_periodicas=tasas
-    )
-
     # IBR+SPREAD negociacion -> Tasa Negociacion EA
-    tasa_negociacion_efectiva = obtener_tasa_negociacion_EA(
-        tasa_mercado, fecha_negociacion, archivo_subido, periodo_cupon, modalidad
+    tasa_negociacion_efectiva = convertir_tasa_nominal_a_efectiva_anual(
+        tasa_nominal_negociacion=sumar_tasas(
+            tasa1=tasa_ibr_negociacion, tasa2=tasa_mercado, modalidad=modalidad
+        ),
+        periodo=periodo_cupon,
     )
 
-    vp_cfs = calcular_vp_cfs(
-        lista_cfs=cf_t,
+    df = construir_df_cashflows(
+        etapa=etapa,
         tasa_mercado=tasa_negociacion_efectiva,
-        lista_dias_descuento=dias_descuento_cupon,
-    )
-    flujo_pesos = calcular_flujo_pesos(valor_nominal=valor_nominal, lista_cfs=cf_t)
-    t_pv_cf = calcular_t_pv_cf(
-        vp_cft=vp_cfs, conteo_dias_descuento=dias_descuento_cupon
-    )
-    t_pv_cf_t1 = calcular_t_pv_cf_t1(
-        t_vp_cft=t_pv_cf, conteo_dias_descuento=dias_descuento_cupon
+        columna_pesos="Aprox. Flujo Pesos (COP$)",
+        curva=curva,
+        fecha_negociacion=fecha_negociacion,
     )
-    cashflows = {
-        "Fechas Cupón": fechas_cupon,
-        "Días Cupón": dias_cupon,
-        "Días Dcto Cupón": dias_descuento_cupon,
-        "CFt": cf_t,
-        "VP CF": vp_cfs,
-        "t*PV CF": t_pv_cf,
-        "(t*PV CF)*(t+1)": t_pv_cf_t1,
-        "Aprox. Flujo Pesos (COP$)": flujo_pesos,
-    }
-
-    # 🔍 Ensure all columns have the same length
-    for key, value in cashflows.items():
-        if len(value) != len(dias_cupon):
-            raise ValueError(f"Column '{key}' has inconsistent length!")
-
-    return pd.DataFrame(cashflows)
+    df.attrs["datos_desactualizados"] = registro["desactualizado"]
+    return df
 
 
-def generar_flujos_real_df_ibr(
+@_cache_ibr(maxsize=128)
+def _flujos_real_ibr(
     fecha_emision,
     fecha_vencimiento,
     fecha_negociacion,
@@ -112,10 +193,10 @@ def generar_flujos_real_df_ibr(
     valor_nominal_base,
     valor_nominal,
     modalidad,
-    archivo,
+    archivo=None,
 ):
     """
-    Returns a complete bond cash flow DataFrame.
+    Calcula (y guarda en caché) los flujos reales del bono IBR, que no dependen del spread de negociación.
     """
     fechas_cupon = generar_fechas(
         fecha_inicio=fecha_emision,
@@ -128,18 +209,14 @@ def generar_flujos_real_df_ibr(
         periodicidad=periodo_cupon,
         base_intereses=base_intereses,
     )
-    # ⚠️ Handling missing IBR rate
-    try:
-        tasas, tasas_ibr = procesar_tasa_flujos_real_ibr(
-            base_dias_anio=base_intereses,
-            periodicidad=periodo_cupon,
-            tasa_anual_cupon=tasa_cupon,
-            lista_fechas=fechas_cupon,
-            modalidad=modalidad,
-            archivo=archivo,
-        )
-    except ValueError as e:
-        return {"error": str(e)}  # Return error message instead of crashing
+    tasas, tasas_ibr = procesar_tasa_flujos_real_ibr(
+        base_dias_anio=base_intereses,
+        periodicidad=periodo_cupon,
+        tasa_anual_cupon=tasa_cupon,
+        lista_fechas=fechas_cupon,
+        modalidad=modalidad,
+        archivo=archivo,
+    )
 
     cf_t = calcular_cupones_futuros_cf(
         valor_nominal_base=valor_nominal_base, tasas_periodicas=tasas
@@ -158,4 +235,57 @@ def generar_flujos_real_df_ibr(
         if len(value) != len(dias_cupon):
             raise ValueError(f"Column '{key}' has inconsistent length!")
 
-    return pd.DataFrame(flujos_reales)
+    return {key: tuple(value) for key, value in flujos_reales.items()}
+
+
+@cache_en_disco("generar_flujos_real_df_ibr")
+def generar_flujos_real_df_ibr(
+    fecha_emision,
+    fecha_vencimiento,
+    fecha_negociacion,
+    periodo_cupon,
+    base_intereses,
+    tasa_cupon,
+    valor_nominal_base,
+    valor_nominal,
+    modalidad,
+    archivo,
+):
+    """
+    Returns a complete bond cash flow DataFrame.
+    `df.attrs["datos_desactualizados"]` indica si se usaron datos viejos de la IBR.
+    """
+    # ⚠️ Handling missing IBR rate
+    try:
+        with registrar_datos_desactualizados() as registro:
+            flujos_reales = _flujos_real_ibr(
+                fecha_emision=fecha_emision,
+                fecha_vencimiento=fecha_vencimiento,
+                fecha_negociacion=fecha_negociacion,
+                periodo_cupon=periodo_cupon,
+                base_intereses=base_intereses,
+                tasa_cupon=tasa_cupon,
+                valor_nominal_base=valor_nominal_base,
+                valor_nominal=valor_nominal,
+                modalidad=modalidad,
+                archivo=archivo,
+            )
+    except ValueError as e:
+        return {"error": str(e)}  # Return error message instead of crashing
+
+    df = pd.DataFrame({key: list(value) for key, value in flujos_reales.items()})
+    df.attrs["datos_desactualizados"] = registro["desactualizado"]
+    return df
+
+
+def limpiar_caches_ibr():
+    """
+    Descarta las tasas y flujos IBR en caché (p. ej. calculados con datos de respaldo
+    mientras BanRep no respondía).
+    """
+    tasa_ibr_real_cache.cache_clear()
+    etapa_flujos_ibr.cache_clear()
+    _flujos_real_ibr.cache_clear()
+
+
+registrar_recuperacion_banrep(limpiar_caches_ibr)
@@ -1,23 +1,36 @@
+import threading
+
 import pandas as pd
+from cachetools import LRUCache, cached
 
+from data_handling.cache_disco_data import cache_en_disco
+from data_handling.shared_data import construir_df_cashflows
 from logic.ipc_logic import (
+    obtener_tasa_ipc_real,
     procesar_tasa_cupon_ipc_datos,
     procesar_tasa_flujos_real_ipc,
-    sumar_spread_ipc,
 )
 from logic.shared_logic import (
     calcular_cupones_futuros_cf,
     calcular_diferencias_fechas_pago_cupon,
     calcular_flujo_pesos,
     calcular_numero_dias_descuento_cupon,
-    calcular_t_pv_cf,
-    calcular_t_pv_cf_t1,
-    calcular_vp_cfs,
     generar_fechas,
+    sumar_tasas,
 )
+from utils.helper_functions import clave_con_archivo
 
 
-def generar_cashflows_df_ipc(
+@cached(cache=LRUCache(maxsize=512), key=clave_con_archivo, lock=threading.Lock())
+def tasa_ipc_real_cache(fecha, archivo=None):
+    """
+    Versión en caché de `obtener_tasa_ipc_real`, con llave (fecha, huella del archivo).
+    """
+    return obtener_tasa_ipc_real(fecha=fecha, archivo=archivo)
+
+
+@cached(cache=LRUCache(maxsize=128), key=clave_con_archivo, lock=threading.Lock())
+def etapa_flujos_ipc(
     fecha_emision,
     fecha_vencimiento,
     fecha_negociacion,
@@ -25,14 +38,14 @@ def generar_cashflows_df_ipc(
     base_intereses,
     tasa_cupon,
     valor_nominal_base,
-    tasa_mercado,
     valor_nominal,
-    archivo_subido,
     modalidad,
     modo_ipc,
+    archivo=None,
 ):
     """
-    Returns a complete bond cash flow DataFrame.
+    Calcula (y guarda en caché) la etapa de flujos del bono IPC: fechas, días,
+    tasas IPC+spread del cupón y cupones. Ninguno depende del spread de negociación.
     """
     fechas_cupon = generar_fechas(
         fecha_inicio=fecha_emision,
@@ -48,66 +61,87 @@ def generar_cashflows_df_ipc(
     dias_descuento_cupon = calcular_numero_dias_descuento_cupon(
         fecha_negociacion=fecha_negociacion, lista_fechas=fechas_cupon
     )
+    tasas_cupon = procesar_tasa_cupon_ipc_datos(
+        base_dias_anio=base_intereses,
+        periodicidad=periodo_cupon,
+        tasa_anual_cupon=tasa_cupon,
+        lista_fechas=fechas_cupon,
+        dias_cupon=dias_cupon,
+        fecha_negociacion=fecha_negociacion,
+        modalidad=modalidad,
+        archivo=archivo,
+        modo_ipc=modo_ipc,
+    )
+    cf_t = calcular_cupones_futuros_cf(
+        valor_nominal_base=valor_nominal_base, tasas_periodicas=tasas_cupon
+    )
+    flujo_pesos = calcular_flujo_pesos(valor_nominal=valor_nominal, lista_cfs=cf_t)
+
+    return {
+        "fechas_cupon": tuple(fechas_cupon),
+        "dias_cupon": tuple(dias_cupon),
+        "dias_descuento_cupon": tuple(dias_descuento_cupon),
+        "cf_t": tuple(cf_t),
+        "flujo_pesos": tuple(flujo_pesos),
+    }
+
 
+@cache_en_disco("generar_cashflows_df_ipc")
+def generar_cashflows_df_ipc(
+    fecha_emision,
+    fecha_vencimiento,
+    fecha_negociacion,
+    periodo_cupon,
+    base_intereses,
+    tasa_cupon,
+    valor_nominal_base,
+    tasa_mercado,
+    valor_nominal,
+    archivo_subido,
+    modalidad,
+    modo_ipc,
+    curva=None,
+):
+    """
+    Returns a complete bond cash flow DataFrame.
+    Si se entrega `curva` (curva cero), los flujos se descuentan con ella en lugar de la tasa.
+    """
     try:
-        tasas_cupon = procesar_tasa_cupon_ipc_datos(
-            base_dias_anio=base_intereses,
-            periodicidad=periodo_cupon,
-            tasa_anual_cupon=tasa_cupon,
-            lista_fechas=fechas_cupon,
-            dias_cupon=dias_cupon,
+        etapa = etapa_flujos_ipc(
+            fecha_emision=fecha_emision,
+            fecha_vencimiento=fecha_vencimiento,
             fecha_negociacion=fecha_negociacion,
+            periodo_cupon=periodo_cupon,
+            base_intereses=base_intereses,
+            tasa_cupon=tasa_cupon,
+            valor_nominal_base=valor_nominal_base,
+            valor_nominal=valor_nominal,
             modalidad=modalidad,
-            archivo=archivo_subido,
             modo_ipc=modo_ipc,
+            archivo=archivo_subido,
+        )
+        tasa_ipc_negociacion = tasa_ipc_real_cache(
+            fecha=fecha_negociacion, archivo=archivo_subido
         )
     except ValueError as e:
         return {"error": str(e)}  # Return error message instead of crashing
 
-    cf_t = calcular_cupones_futuros_cf(
-        valor_nominal_base=valor_nominal_base, tasas_periodicas=tasas_cupon
-    )
-
     # IPC+SPREAD negociacion -> Tasa Negociacion EA
-    tasa_negociacion_efectiva = sumar_spread_ipc(
-        tasa_spread=tasa_mercado,
-        fecha=fecha_negociacion,
-        modalidad=modalidad,
-        archivo=archivo_subido,
+    tasa_negociacion_efectiva = sumar_tasas(
+        tasa1=tasa_ipc_negociacion, tasa2=tasa_mercado, modalidad=modalidad
     )
 
-    vp_cfs = calcular_vp_cfs(
-        lista_cfs=cf_t,
+    return construir_df_cashflows(
+        etapa=etapa,
         tasa_mercado=tasa_negociacion_efectiva,
-        lista_dias_descuento=dias_descuento_cupon,
-    )
-    flujo_pesos = calcular_flujo_pesos(valor_nominal=valor_nominal, lista_cfs=cf_t)
-    t_pv_cf = calcular_t_pv_cf(
-        vp_cft=vp_cfs, conteo_dias_descuento=dias_descuento_cupon
-    )
-    t_pv_cf_t1 = calcular_t_pv_cf_t1(
-        t_vp_cft=t_pv_cf, conteo_dias_descuento=dias_descuento_cupon
+        columna_pesos="Flujo Pesos ($)",
+        curva=curva,
+        fecha_negociacion=fecha_negociacion,
     )
-    cashflows = {
-        "Fechas Cupón": fechas_cupon,
-        "Días Cupón": dias_cupon,
-        "Días Dcto Cupón": dias_descuento_cupon,
-        "CFt": cf_t,
-        "VP CF": vp_cfs,
-        "t*PV CF": t_pv_cf,
-        "(t*PV CF)*(t+1)": t_pv_cf_t1,
-        "Flujo Pesos ($)": flujo_pesos,
-    }
-
-    # 🔍 Ensure all columns have the same length
-    for key, value in cashflows.items():
-        if len(value) != len(dias_cupon):
-            raise ValueError(f"Column '{key}' has inconsistent length!")
-
-    return pd.DataFrame(cashflows)
 
 
-def generar_flujos_real_df_ipc(
+@cached(cache=LRUCache(maxsize=128), key=clave_con_archivo, lock=threading.Lock())
+def _flujos_real_ipc(
     fecha_emision,
     fecha_vencimiento,
     fecha_negociacion,
@@ -116,12 +150,12 @@ def generar_flujos_real_df_ipc(
     tasa_cupon,
     valor_nominal_base,
     valor_nominal,
-    archivo_subido,
     modalidad,
     modo_ipc,
+    archivo=None,
 ):
     """
-    Returns a complete bond cash flow DataFrame.
+    Calcula (y guarda en caché) los flujos reales del bono IPC, que no dependen del spread de negociación.
     """
     fechas_cupon = generar_fechas(
         fecha_inicio=fecha_emision,
@@ -134,20 +168,16 @@ def generar_flujos_real_df_ipc(
         periodicidad=periodo_cupon,
         base_intereses=base_intereses,
     )
-    # ⚠️ Handling missing IBR rate
-    try:
-        tasas, tasas_ibr = procesar_tasa_flujos_real_ipc(
-            base_dias_anio=base_intereses,
-            periodicidad=periodo_cupon,
-            tasa_anual_cupon=tasa_cupon,
-            lista_fechas=fechas_cupon,
-            dias_cupon=dias_cupon,
-            modalidad=modalidad,
-            archivo=archivo_subido,
-            modo_ipc=modo_ipc,
-        )
-    except ValueError as e:
-        return {"error": str(e)}  # Return error message instead of crashing
+    tasas, tasas_ibr = procesar_tasa_flujos_real_ipc(
+        base_dias_anio=base_intereses,
+        periodicidad=periodo_cupon,
+        tasa_anual_cupon=tasa_cupon,
+        lista_fechas=fechas_cupon,
+        dias_cupon=dias_cupon,
+        modalidad=modalidad,
+        archivo=archivo,
+        modo_ipc=modo_ipc,
+    )
 
     cf_t = calcular_cupones_futuros_cf(
         valor_nominal_base=valor_nominal_base, tasas_periodicas=tasas
@@ -166,4 +196,42 @@ def generar_flujos_real_df_ipc(
         if len(value) != len(dias_cupon):
             raise ValueError(f"Column '{key}' has inconsistent length!")
 
-    return pd.DataFrame(flujos_reales)
+    return {key: tuple(value) for key, value in flujos_reales.items()}
+
+
+@cache_en_disco("generar_flujos_real_df_ipc")
+def generar_flujos_real_df_ipc(
+    fecha_emision,
+    fecha_vencimiento,
+    fecha_negociacion,
+    periodo_cupon,
+    base_intereses,
+    tasa_cupon,
+    valor_nominal_base,
+    valor_nominal,
+    archivo_subido,
+    modalidad,
+    modo_ipc,
+):
+    """
+    Returns a complete bond cash flow DataFrame.
+    """
+    # ⚠️ Handling missing IBR rate
+    try:
+        flujos_reales = _flujos_real_ipc(
+            fecha_emision=fecha_emision,
+            fecha_vencimiento=fecha_vencimiento,
+            fecha_negociacion=fecha_negociacion,
+            periodo_cupon=periodo_cupon,
+            base_intereses=base_intereses,
+            tasa_cupon=tasa_cupon,
+            valor_nominal_base=valor_nominal_base,
+            valor_nominal=valor_nominal,
+            modalidad=modalidad,
+            modo_ipc=modo_ipc,
+            archivo=archivo_subido,
+        )
+    except ValueError as e:
+        return {"error": str(e)}  # Return error message instead of crashing
+
+    return pd.DataFrame({key: list(value) for key, value in flujos_reales.items()})
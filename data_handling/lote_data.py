@@ -0,0 +1,576 @@
+import io
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_handling.archivos_data import compartir_archivo
+from data_handling.calentamiento_data import calentar_calendario
+from data_handling.historico_data import leer_historico_local_ibr
+from data_handling.ibr_data import generar_cashflows_df_ibr, generar_flujos_real_df_ibr
+from data_handling.ipc_data import generar_cashflows_df_ipc, generar_flujos_real_df_ipc
+from data_handling.portafolio_data import (
+    COLUMNAS_TF,
+    DIAS_CUPON_CONVEXIDAD,
+    PERIODOS_POR_ANIO,
+    calcular_metricas_bono,
+    valorar_portafolio_tf,
+)
+from data_handling.shared_data import (
+    HOJAS_PROYECCIONES,
+    calcular_tir_desde_df,
+    leer_datos_excel,
+)
+from utils import configuracion
+from utils.proteccion_banrep import registrar_datos_desactualizados
+from utils.validation import validate_inputs
+
+TIPOS_BONO = ("Tasa Fija", "IBR", "IPC")
+
+# Columnas de entrada por tipo de bono (además de "tipo"); "id" es opcional
+COLUMNAS_LOTE = {
+    "Tasa Fija": COLUMNAS_TF,
+    "IBR": COLUMNAS_TF,
+    "IPC": [*COLUMNAS_TF, "modo_ipc"],
+}
+
+COLUMNAS_FECHA = ("fecha_emision", "fecha_vencimiento", "fecha_negociacion")
+COLUMNAS_NUMERICAS = (
+    "tasa_cupon",
+    "valor_nominal_base",
+    "tasa_mercado",
+    "valor_nominal",
+)
+
+COLUMNAS_METRICAS = [
+    "Precio Sucio",
+    "Cupón Corrido",
+    "Precio Limpio",
+    "Valor Giro",
+    "Duración Macaulay",
+    "Duración Modificada",
+    "DV01",
+    "Convexidad",
+    "TIR Inversión",
+]
+
+# Estado de cada proceso de valoración (ver `preparar_trabajador`)
+_trabajador = {"fuente": "proyecciones", "archivo": None}
+
+VALORES_VALIDOS = {
+    "periodo_cupon": tuple(PERIODOS_POR_ANIO),
+    "base_intereses": tuple(DIAS_CUPON_CONVEXIDAD),
+    "modalidad_tasa_cupon": ("EA", "Nominal"),
+    "modo_ipc": ("Inicio", "Final"),
+}
+
+
+def leer_posiciones_por_bloques(ruta, filas_por_bloque: int = 5000):
+    """
+    Lee un archivo de posiciones (CSV, Parquet o xlsx) por bloques, sin cargarlo
+    completo en memoria. `ruta` puede ser también un archivo subido desde Streamlit;
+    el formato se toma de la extensión de su nombre.
+
+    Retorna:
+    Iterator[pd.DataFrame]: Bloques con la columna "fila" (posición en el archivo,
+    desde 0) además de las columnas originales.
+    """
+    extension = Path(getattr(ruta, "name", ruta)).suffix.lower()
+    if extension == ".csv":
+        bloques = pd.read_csv(ruta, chunksize=filas_por_bloque, dtype=str)
+    elif extension == ".parquet":
+        bloques = (
+            lote.to_pandas()
+            for lote in pq.ParquetFile(ruta).iter_batches(batch_size=filas_por_bloque)
+        )
+    elif extension == ".xlsx":
+        bloques = _leer_excel_por_bloques(ruta, filas_por_bloque)
+    else:
+        raise ValueError(
+            "❌ Formato no soportado. Usa un archivo .csv, .parquet o .xlsx."
+        )
+
+    inicio = 0
+    for bloque in bloques:
+        bloque = bloque.reset_index(drop=True)
+        bloque.insert(0, "fila", range(inicio, inicio + len(bloque)))
+        inicio += len(bloque)
+        yield bloque
+
+
+def _leer_excel_por_bloques(ruta, filas_por_bloque: int):
+    """
+    Recorre la primera hoja de un xlsx en modo de solo lectura, por bloques de filas.
+    """
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        encabezado = [str(c).strip() for c in next(filas, ())]
+        bloque = []
+        for fila in filas:
+            if all(valor is None for valor in fila):
+                continue
+            bloque.append(fila)
+            if len(bloque) == filas_por_bloque:
+                yield pd.DataFrame(bloque, columns=encabezado)
+                bloque = []
+        if bloque:
+            yield pd.DataFrame(bloque, columns=encabezado)
+    finally:
+        libro.close()
+
+
+def _normalizar(bloque: pd.DataFrame):
+    """
+    Convierte fechas (DD/MM/YYYY o ISO) y números; los valores no válidos quedan en None
+    para que `validate_inputs` los reporte como vacíos.
+
+    Cada fecha se prueba con los dos formatos por separado (un bloque puede mezclarlos)
+    y las columnas convertidas quedan con dtype object: asignar una lista con None a
+    una columna numérica los volvería NaN, que `validate_inputs` no ve como vacío.
+    """
+    posiciones = bloque.copy()
+    for col in COLUMNAS_FECHA:
+        if col in posiciones:
+            fechas = pd.to_datetime(
+                posiciones[col], format="%d/%m/%Y", errors="coerce"
+            ).fillna(pd.to_datetime(posiciones[col], format="ISO8601", errors="coerce"))
+            posiciones[col] = pd.Series(
+                [None if pd.isna(f) else f.date() for f in fechas],
+                index=posiciones.index,
+                dtype=object,
+            )
+    for col in COLUMNAS_NUMERICAS:
+        if col in posiciones:
+            numeros = pd.to_numeric(posiciones[col], errors="coerce")
+            posiciones[col] = pd.Series(
+                [None if pd.isna(n) else float(n) for n in numeros],
+                index=posiciones.index,
+                dtype=object,
+            )
+    for col in ("tipo", *VALORES_VALIDOS):
+        if col in posiciones:
+            posiciones[col] = posiciones[col].where(posiciones[col].notna(), None)
+            posiciones[col] = [
+                v.strip() if isinstance(v, str) else v for v in posiciones[col]
+            ]
+    return posiciones
+
+
+def validar_posiciones(bloque: pd.DataFrame, fuente: str):
+    """
+    Valida cada posición con las reglas de `validate_inputs` (como en las calculadoras)
+    más el tipo de bono, las opciones de cada lista y la fuente de tasas.
+
+    Parámetros:
+    bloque (pd.DataFrame): Bloque de `leer_posiciones_por_bloques`.
+    fuente (str): "proyecciones" (archivo de proyecciones) o "banrep" (en línea).
+
+    Retorna:
+    tuple[pd.DataFrame, pd.DataFrame]: Posiciones válidas (normalizadas) y fallas
+    (columnas "fila", "tipo" y "error").
+    """
+    if "tipo" not in bloque.columns:
+        raise ValueError("❌ Falta la columna 'tipo' (Tasa Fija, IBR o IPC).")
+
+    posiciones = _normalizar(bloque)
+    radio_data = "Online" if fuente == "banrep" else "Excel de Proyecciones"
+    errores = []
+    for fila in posiciones.to_dict("records"):
+        tipo = fila["tipo"]
+        if tipo not in TIPOS_BONO:
+            errores.append(f"❌ Tipo de bono no válido: {tipo}")
+            continue
+        faltantes = [c for c in COLUMNAS_LOTE[tipo] if c not in fila]
+        if faltantes:
+            errores.append(f"❌ Faltan columnas: {', '.join(faltantes)}")
+            continue
+
+        mensajes = list(
+            validate_inputs(
+                fila["valor_nominal"],
+                fila["fecha_emision"],
+                fila["fecha_vencimiento"],
+                fila["periodo_cupon"],
+                fila["tasa_cupon"],
+                fila["base_intereses"],
+                fila["fecha_negociacion"],
+                fila["tasa_mercado"],
+                fila["valor_nominal_base"],
+                radio_data if tipo != "Tasa Fija" else None,
+            ).values()
+        )
+        for col in COLUMNAS_LOTE[tipo]:
+            if col in VALORES_VALIDOS and fila[col] not in VALORES_VALIDOS[col]:
+                mensajes.append(f"❌ Valor no válido en '{col}': {fila[col]}")
+        if tipo == "IPC" and fuente == "banrep":
+            mensajes.append("❌ Los bonos IPC requieren el archivo de proyecciones.")
+        errores.append(" | ".join(mensajes))
+
+    con_error = pd.Series([bool(e) for e in errores], index=posiciones.index)
+    fallas = _columnas_llave(posiciones[con_error])
+    fallas["error"] = [e for e in errores if e]
+    return posiciones[~con_error], fallas
+
+
+def _columnas_llave(posiciones: pd.DataFrame):
+    """
+    Columnas que identifican cada posición en los archivos de salida.
+    """
+    llaves = [c for c in ("fila", "id", "tipo") if c in posiciones.columns]
+    return posiciones[llaves].reset_index(drop=True)
+
+
+def _valorar_indexado(fila: dict, archivo):
+    """
+    Valora una posición IBR o IPC con las funciones de las calculadoras.
+    """
+    comunes = {
+        "fecha_emision": fila["fecha_emision"],
+        "fecha_vencimiento": fila["fecha_vencimiento"],
+        "fecha_negociacion": fila["fecha_negociacion"],
+        "periodo_cupon": fila["periodo_cupon"],
+        "base_intereses": fila["base_intereses"],
+        "tasa_cupon": fila["tasa_cupon"],
+        "valor_nominal_base": fila["valor_nominal_base"],
+        "valor_nominal": fila["valor_nominal"],
+        "modalidad": fila["modalidad_tasa_cupon"],
+    }
+    if fila["tipo"] == "IBR":
+        df = generar_cashflows_df_ibr(
+            **comunes,
+            tasa_mercado=fila["tasa_mercado"],
+            archivo_subido=archivo,
+            archivo=archivo,
+        )
+        df_flujos = generar_flujos_real_df_ibr(**comunes, archivo=archivo)
+    else:
+        df = generar_cashflows_df_ipc(
+            **comunes,
+            tasa_mercado=fila["tasa_mercado"],
+            archivo_subido=archivo,
+            modo_ipc=fila["modo_ipc"],
+        )
+        df_flujos = generar_flujos_real_df_ipc(
+            **comunes, archivo_subido=archivo, modo_ipc=fila["modo_ipc"]
+        )
+    for resultado in (df, df_flujos):
+        if isinstance(resultado, dict) and "error" in resultado:
+            raise ValueError(resultado["error"])
+
+    metricas = calcular_metricas_bono(
+        df=df,
+        fecha_negociacion=fila["fecha_negociacion"],
+        periodo_cupon=fila["periodo_cupon"],
+        base_intereses=fila["base_intereses"],
+        tasa_negociacion=df.attrs["tasa_negociacion_ea"],
+        valor_nominal=fila["valor_nominal"],
+        valor_nominal_base=fila["valor_nominal_base"],
+        # Como en las calculadoras IBR/IPC: convexidad con el spread ingresado
+        tasa_convexidad=fila["tasa_mercado"],
+    )
+    metricas["TIR Inversión"] = calcular_tir_desde_df(
+        df=df_flujos,
+        columna_flujos="Flujo Pesos Reales(COP$)",
+        valor_giro=metricas["Valor Giro"],
+        fecha_negociacion=fila["fecha_negociacion"],
+    )
+    return metricas
+
+
+def argumentos_calculadora(fila: dict):
+    """
+    Argumentos de `generar_cashflows_df_tf`, `generar_cashflows_df_ibr` o
+    `generar_cashflows_df_ipc` (según "tipo") para una posición validada, sin el
+    archivo de proyecciones.
+    """
+    if fila["tipo"] == "Tasa Fija":
+        return {col: fila[col] for col in COLUMNAS_TF}
+    argumentos = {
+        col: fila[col] for col in COLUMNAS_TF if col != "modalidad_tasa_cupon"
+    }
+    argumentos["modalidad"] = fila["modalidad_tasa_cupon"]
+    if fila["tipo"] == "IPC":
+        argumentos["modo_ipc"] = fila["modo_ipc"]
+    return argumentos
+
+
+def valorar_bloque(posiciones: pd.DataFrame, archivo=None):
+    """
+    Valora un bloque de posiciones ya validadas. Los bonos de tasa fija se valoran
+    juntos con `valorar_portafolio_tf` (y uno a uno si el lote falla, para aislar la
+    posición con error); los IBR e IPC con las funciones de cada calculadora.
+
+    Retorna:
+    tuple[pd.DataFrame, pd.DataFrame]: Resultados (llaves + `COLUMNAS_METRICAS`) y fallas.
+    """
+    resultados = []
+    fallas = []
+
+    tasa_fija = posiciones[posiciones["tipo"] == "Tasa Fija"]
+    if not tasa_fija.empty:
+        try:
+            grupos = [(tasa_fija, valorar_portafolio_tf(tasa_fija))]
+        except Exception:
+            grupos = []
+            for indice in tasa_fija.index:
+                fila = tasa_fija.loc[[indice]]
+                try:
+                    grupos.append((fila, valorar_portafolio_tf(fila)))
+                except Exception as e:
+                    falla = _columnas_llave(fila)
+                    falla["error"] = str(e)
+                    fallas.append(falla)
+        for grupo, metricas in grupos:
+            resultados.append(
+                pd.concat(
+                    [_columnas_llave(grupo), metricas.reset_index(drop=True)], axis=1
+                )
+            )
+
+    for fila in posiciones[posiciones["tipo"] != "Tasa Fija"].to_dict("records"):
+        llave = _columnas_llave(pd.DataFrame([fila]))
+        try:
+            metricas = _valorar_indexado(fila, archivo)
+        except Exception as e:
+            llave["error"] = str(e)
+            fallas.append(llave)
+            continue
+        resultados.append(pd.concat([llave, pd.DataFrame([metricas])], axis=1))
+
+    resultados = (
+        pd.concat(resultados, ignore_index=True).sort_values("fila", ignore_index=True)
+        if resultados
+        else pd.DataFrame(columns=[*_columnas_llave(posiciones).columns])
+    )
+    fallas = (
+        pd.concat(fallas, ignore_index=True)
+        if fallas
+        else pd.DataFrame(columns=[*_columnas_llave(posiciones).columns, "error"])
+    )
+    resultados = resultados.reindex(
+        columns=[*_columnas_llave(posiciones).columns, *COLUMNAS_METRICAS]
+    ).astype({col: float for col in COLUMNAS_METRICAS})
+    return resultados, fallas
+
+
+def abrir_escritor(ruta, formato: str = None):
+    """
+    Abre un archivo de salida (Parquet, CSV o xlsx) que se escribe por bloques, sin
+    acumular los bloques en memoria. `ruta` puede ser una ruta o un archivo binario
+    abierto (p. ej. BytesIO); en ese caso `formato` ("parquet", "csv" o "xlsx") es
+    obligatorio.
+
+    Retorna:
+    tuple[Callable, Callable]: `escribir(df)` agrega un bloque y `cerrar()` termina el archivo.
+    """
+    es_ruta = isinstance(ruta, (str, Path))
+    extension = f".{formato}" if formato else Path(ruta).suffix.lower()
+    if extension not in (".parquet", ".csv", ".xlsx"):
+        raise ValueError(
+            "❌ Formato de salida no soportado. Usa .parquet, .csv o .xlsx."
+        )
+    if es_ruta:
+        ruta = Path(ruta)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+    if extension == ".xlsx":
+        return _abrir_escritor_xlsx(ruta)
+    estado = {"escritor": None, "esquema": None, "iniciado": False, "vacio": None}
+
+    def escribir(df: pd.DataFrame):
+        if extension == ".csv":
+            if es_ruta:
+                df.to_csv(
+                    ruta,
+                    mode="a" if estado["iniciado"] else "w",
+                    header=not estado["iniciado"],
+                    index=False,
+                )
+            else:
+                df.to_csv(ruta, header=not estado["iniciado"], index=False)
+            estado["iniciado"] = True
+            return
+        if df.empty:
+            # Sin filas no se conoce el tipo de cada columna; se usa solo si no llega nada más
+            estado["vacio"] = df
+            return
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        if estado["escritor"] is None:
+            estado["esquema"] = tabla.schema
+            estado["escritor"] = pq.ParquetWriter(ruta, tabla.schema)
+        else:
+            tabla = tabla.cast(estado["esquema"])
+        estado["escritor"].write_table(tabla)
+
+    def cerrar():
+        if estado["escritor"] is not None:
+            estado["escritor"].close()
+        elif extension == ".parquet" and estado["vacio"] is not None:
+            pq.write_table(
+                pa.Table.from_pandas(estado["vacio"], preserve_index=False), ruta
+            )
+
+    return escribir, cerrar
+
+
+# Filas por hoja de Excel (incluido el encabezado); al llenarse se continúa en otra hoja
+MAX_FILAS_XLSX = 1_048_576
+
+
+def _abrir_escritor_xlsx(ruta):
+    """
+    Escritor xlsx en modo de solo escritura de openpyxl: las filas se vuelcan a disco
+    a medida que llegan, con memoria constante.
+    """
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    estado = {"hoja": None, "filas": 0, "columnas": None}
+
+    def nueva_hoja():
+        numero = len(libro.worksheets) + 1
+        estado["hoja"] = libro.create_sheet(
+            "Datos" if numero == 1 else f"Datos {numero}"
+        )
+        estado["hoja"].append(estado["columnas"])
+        estado["filas"] = 1
+
+    def escribir(df: pd.DataFrame):
+        if estado["columnas"] is None:
+            estado["columnas"] = [str(col) for col in df.columns]
+            nueva_hoja()
+        for fila in df.itertuples(index=False, name=None):
+            if estado["filas"] == MAX_FILAS_XLSX:
+                nueva_hoja()
+            estado["hoja"].append([None if pd.isna(v) else v for v in fila])
+            estado["filas"] += 1
+
+    def cerrar():
+        if not libro.worksheets:
+            libro.create_sheet("Datos")
+        libro.save(ruta)
+
+    return escribir, cerrar
+
+
+def preparar_trabajador(fuente: str, ruta_proyecciones=None, calentar: bool = False):
+    """
+    Prepara el proceso que valora bloques con `procesar_bloque`: fuente de tasas
+    ("proyecciones" o "banrep", que usa el histórico local de IBR) y archivo de
+    proyecciones leído una sola vez.
+
+    Con `calentar` deja cargados los calendarios de festivos, las hojas del archivo
+    de proyecciones y el histórico local de IBR, para que la primera valoración no
+    pague esos costos.
+    """
+    _trabajador["fuente"] = fuente
+    if fuente == "banrep":
+        configuracion.FUENTE_IBR = "local"
+    if ruta_proyecciones:
+        _trabajador["archivo"] = compartir_archivo(
+            io.BytesIO(Path(ruta_proyecciones).read_bytes())
+        )
+
+    if not calentar:
+        return
+    calentar_calendario()
+    if _trabajador["archivo"] is not None:
+        for hoja in HOJAS_PROYECCIONES:
+            try:
+                leer_datos_excel(_trabajador["archivo"], hoja)
+            except ValueError:
+                pass  # La hoja no es obligatoria si no hay bonos de ese tipo
+    if fuente == "banrep":
+        leer_historico_local_ibr()
+
+
+def procesar_bloque(bloque: pd.DataFrame):
+    """
+    Valida y valora un bloque de posiciones en el proceso preparado con
+    `preparar_trabajador`; las fallas de ambas etapas se entregan juntas.
+
+    Retorna:
+    tuple[pd.DataFrame, pd.DataFrame]: Resultados y fallas, ordenados por "fila".
+    """
+    validas, fallas = validar_posiciones(bloque, fuente=_trabajador["fuente"])
+    resultados, fallas_valoracion = valorar_bloque(
+        validas, archivo=_trabajador["archivo"]
+    )
+    if not fallas_valoracion.empty:
+        fallas = pd.concat(
+            [f for f in (fallas, fallas_valoracion) if not f.empty], ignore_index=True
+        ).sort_values("fila", ignore_index=True)
+    return resultados, fallas
+
+
+def valorar_en_segundo_plano(
+    posiciones, fuente: str, archivo=None, filas_por_bloque: int = 5000
+):
+    """
+    Lee, valida y valora las posiciones por bloques en un hilo aparte, para que la
+    interfaz siga respondiendo mientras se leen y valoran miles de bonos. Los bloques
+    se procesan en orden y la cancelación se revisa entre bloques.
+
+    Parámetros:
+    posiciones: Ruta o archivo subido de posiciones (ver `leer_posiciones_por_bloques`).
+    fuente (str): "proyecciones" o "banrep" (tasas de la fuente en línea configurada).
+    archivo: Archivo de proyecciones (IBR/IPC) o None.
+    filas_por_bloque (int): Filas leídas y valoradas por bloque.
+
+    Retorna:
+    dict: Estado compartido con el hilo: "hechas" y "total" (filas; el total es None
+    hasta terminar de leer el archivo), "posiciones" (validadas), "resultados" y
+    "fallas" (listas de bloques), "cancelar" (threading.Event), "terminado", "error",
+    "archivo" (referencia usada en la valoración) y "desactualizado" (alguna posición
+    usó datos viejos de la IBR).
+    """
+    # Referencias propias (posición de lectura aparte): la interfaz también lee los archivos subidos
+    archivo = compartir_archivo(archivo)
+    if hasattr(posiciones, "getvalue"):
+        nombre = posiciones.name
+        posiciones = io.BytesIO(posiciones.getvalue())
+        posiciones.name = nombre
+    estado = {
+        "hechas": 0,
+        "total": None,
+        "posiciones": [],
+        "resultados": [],
+        "fallas": [],
+        "cancelar": threading.Event(),
+        "terminado": False,
+        "error": None,
+        "archivo": archivo,
+        "desactualizado": False,
+    }
+
+    def trabajar():
+        try:
+            for bloque in leer_posiciones_por_bloques(posiciones, filas_por_bloque):
+                if estado["cancelar"].is_set():
+                    break
+                validas, fallas = validar_posiciones(bloque, fuente=fuente)
+                with registrar_datos_desactualizados() as registro:
+                    resultados, fallas_valoracion = valorar_bloque(
+                        validas, archivo=archivo
+                    )
+                if registro["desactualizado"]:
+                    estado["desactualizado"] = True
+                estado["posiciones"].append(validas)
+                estado["resultados"].append(resultados)
+                estado["fallas"].extend(
+                    f for f in (fallas, fallas_valoracion) if not f.empty
+                )
+                estado["hechas"] += len(bloque)
+            else:
+                estado["total"] = estado["hechas"]  # Archivo leído completo
+        except Exception as e:
+            estado["error"] = str(e)
+        finally:
+            estado["terminado"] = True
+
+    threading.Thread(target=trabajar, name="valoracion-portafolio", daemon=True).start()
+    return estado
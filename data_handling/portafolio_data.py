@@ -0,0 +1,325 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from data_handling.shared_data import (
+    calcular_convexidad,
+    calcular_cupon_corrido,
+    calcular_duracion_mod,
+    calcular_dv01,
+    calcular_macaulay,
+    calcular_precio_sucio_desde_VP,
+)
+from data_handling.tasa_fija_data import etapa_cupones_vigentes_tf
+from logic.cupon_corrido_logic import calcular_cupon_corrido_lote
+from logic.fechas_logic import descomponer_fechas
+from logic.kernels_logic import valorar_lote_tf
+from logic.shared_logic import calcular_fecha_anterior, generar_fechas
+from logic.tir_logic import calcular_xirr_batch
+from utils.configuracion import BACKEND_CALCULO
+
+COLUMNAS_TF = [
+    "fecha_emision",
+    "fecha_vencimiento",
+    "fecha_negociacion",
+    "periodo_cupon",
+    "base_intereses",
+    "modalidad_tasa_cupon",
+    "tasa_cupon",
+    "valor_nominal_base",
+    "tasa_mercado",
+    "valor_nominal",
+]
+
+COLUMNAS_CUPON_CORRIDO = [
+    "fecha_emision",
+    "fecha_vencimiento",
+    "periodo_cupon",
+    "base_intereses",
+    "modalidad_tasa_cupon",
+    "tasa_cupon",
+    "valor_nominal_base",
+]
+
+PERIODOS_POR_ANIO = {"Mensual": 12, "Trimestral": 4, "Semestral": 2, "Anual": 1}
+
+# Días del período de cupón que usa `calcular_convexidad` por base y periodicidad
+DIAS_CUPON_CONVEXIDAD = {
+    "365/365": {"Mensual": 30, "Trimestral": 92, "Semestral": 182, "Anual": 365},
+    "30/360": {"Mensual": 30, "Trimestral": 90, "Semestral": 180, "Anual": 360},
+}
+
+
+def calcular_metricas_bono(
+    df: pd.DataFrame,
+    fecha_negociacion,
+    periodo_cupon: str,
+    base_intereses: str,
+    tasa_negociacion: float,
+    valor_nominal: float,
+    valor_nominal_base: float,
+    tasa_convexidad: float = None,
+):
+    """
+    Calcula las métricas de un bono a partir de su DataFrame de flujos,
+    con las mismas fórmulas de las calculadoras (sin la TIR, que se calcula en lote).
+    La convexidad usa `tasa_convexidad` si se entrega (las calculadoras IBR e IPC
+    usan el spread de mercado ingresado) o, si no, la tasa de negociación.
+
+    Retorna:
+    dict: Precio sucio, cupón corrido, precio limpio, valor de giro, duraciones, DV01 y convexidad.
+    """
+    precio_sucio = calcular_precio_sucio_desde_VP(df)
+    valor_giro = (precio_sucio / 100) * valor_nominal
+    cupon_corrido = calcular_cupon_corrido(
+        df=df.copy(),
+        date_negociacion=fecha_negociacion,
+        periodicidad=periodo_cupon,
+        base_intereses=base_intereses,
+        valor_nominal_base=valor_nominal_base,
+    )
+    d_macaulay = calcular_macaulay(df=df, columna="t*PV CF", precio_sucio=precio_sucio)
+    d_mod = calcular_duracion_mod(macaulay=d_macaulay, tasa=tasa_negociacion)
+
+    return {
+        "Precio Sucio": precio_sucio,
+        "Cupón Corrido": cupon_corrido,
+        "Precio Limpio": precio_sucio - cupon_corrido,
+        "Valor Giro": valor_giro,
+        "Duración Macaulay": d_macaulay,
+        "Duración Modificada": d_mod,
+        "DV01": calcular_dv01(d_mod=d_mod, valor_giro=valor_giro),
+        "Convexidad": calcular_convexidad(
+            df=df,
+            columna="(t*PV CF)*(t+1)",
+            tasa_mercado=(
+                tasa_negociacion if tasa_convexidad is None else tasa_convexidad
+            ),
+            precio_sucio=precio_sucio,
+            periodicidad=periodo_cupon,
+            base_intereses=base_intereses,
+        ),
+    }
+
+
+def armar_lote_tf(posiciones: pd.DataFrame):
+    """
+    Arma los arreglos que consume `valorar_lote_tf` a partir de las posiciones
+    (columnas de `COLUMNAS_TF`, fechas como `datetime.date`).
+
+    Solo el calendario de pagos se genera bono a bono; días, tasas y descuento se
+    calculan dentro del kernel.
+    """
+    for col in ("periodo_cupon", "base_intereses", "modalidad_tasa_cupon"):
+        validos = {
+            "periodo_cupon": PERIODOS_POR_ANIO,
+            "base_intereses": DIAS_CUPON_CONVEXIDAD,
+            "modalidad_tasa_cupon": ("EA", "Nominal"),
+        }[col]
+        invalidos = set(posiciones[col]) - set(validos)
+        if invalidos:
+            raise ValueError(f"❌ Valores no válidos en '{col}': {sorted(invalidos)}")
+
+    calendarios = []
+    for fila in posiciones.itertuples(index=False):
+        fechas = [
+            datetime.datetime.strptime(f, "%d/%m/%Y")
+            for f in generar_fechas(
+                fecha_inicio=fila.fecha_emision,
+                fecha_fin=fila.fecha_vencimiento,
+                fecha_negociacion=fila.fecha_negociacion,
+                periodicidad=fila.periodo_cupon,
+            )
+        ]
+        if not fechas:
+            raise ValueError(
+                f"❌ El bono con vencimiento {fila.fecha_vencimiento} no tiene cupones "
+                "posteriores a la fecha de negociación."
+            )
+        inicio = calcular_fecha_anterior(
+            fecha=fechas[0],
+            periodicidad=fila.periodo_cupon,
+            base_intereses=fila.base_intereses,
+            num_per=1,
+        )
+        calendarios.append([inicio, *fechas])
+
+    n_bonos = len(calendarios)
+    n_columnas = max(len(c) for c in calendarios)
+    fechas = np.zeros((3, n_bonos, n_columnas), dtype=np.int64)
+    # Relleno con una fecha válida; las columnas sobrantes se enmascaran en el kernel
+    fechas[:, :, :] = np.array([2000, 1, 1])[:, None, None]
+    for i, calendario in enumerate(calendarios):
+        fechas[:, i, : len(calendario)] = np.array(
+            [(f.year, f.month, f.day) for f in calendario]
+        ).T
+
+    negociacion = np.array(
+        [(f.year, f.month, f.day) for f in posiciones["fecha_negociacion"]],
+        dtype=np.int64,
+    ).reshape(-1, 3)
+
+    return {
+        "anio": fechas[0],
+        "mes": fechas[1],
+        "dia": fechas[2],
+        "n_cupones": np.array([len(c) - 1 for c in calendarios], dtype=np.int64),
+        "neg_anio": negociacion[:, 0],
+        "neg_mes": negociacion[:, 1],
+        "neg_dia": negociacion[:, 2],
+        "tasa_cupon": posiciones["tasa_cupon"].to_numpy(dtype=float),
+        "es_ea": (posiciones["modalidad_tasa_cupon"] == "EA").to_numpy(),
+        "periodos": posiciones["periodo_cupon"].map(PERIODOS_POR_ANIO).to_numpy(float),
+        "tasa_mercado": posiciones["tasa_mercado"].to_numpy(dtype=float),
+        "base_360": (posiciones["base_intereses"] == "30/360").to_numpy(),
+        "valor_nominal_base": posiciones["valor_nominal_base"].to_numpy(dtype=float),
+        "dias_convexidad": np.array(
+            [
+                DIAS_CUPON_CONVEXIDAD[base][periodo]
+                for base, periodo in zip(
+                    posiciones["base_intereses"], posiciones["periodo_cupon"]
+                )
+            ],
+            dtype=float,
+        ),
+    }
+
+
+def valorar_portafolio_tf(df_posiciones: pd.DataFrame, backend: str = BACKEND_CALCULO):
+    """
+    Valora un portafolio de bonos de tasa fija.
+
+    Cada fila de `df_posiciones` contiene las condiciones de un bono con las columnas
+    de `COLUMNAS_TF`. Las métricas de todos los bonos se calculan en un solo kernel
+    por lote (`valorar_lote_tf`, con Numba si está disponible) y la TIR de todo el
+    portafolio se resuelve en una sola llamada vectorizada.
+
+    Retorna:
+    pd.DataFrame: Una fila por posición con sus métricas, en el mismo índice de entrada.
+    """
+    faltantes = [col for col in COLUMNAS_TF if col not in df_posiciones.columns]
+    if faltantes:
+        raise ValueError(f"❌ Faltan columnas en el portafolio: {faltantes}")
+
+    posiciones = df_posiciones[COLUMNAS_TF].copy()
+    for col in ("fecha_emision", "fecha_vencimiento", "fecha_negociacion"):
+        posiciones[col] = pd.to_datetime(posiciones[col], dayfirst=True).dt.date
+
+    lote = valorar_lote_tf(armar_lote_tf(posiciones), backend=backend)
+
+    valor_nominal = posiciones["valor_nominal"].to_numpy(dtype=float)
+    valor_giro = lote["precio_sucio"] / 100 * valor_nominal
+    resultados = pd.DataFrame(
+        {
+            "Precio Sucio": lote["precio_sucio"],
+            "Cupón Corrido": lote["cupon_corrido"],
+            "Precio Limpio": lote["precio_sucio"] - lote["cupon_corrido"],
+            "Valor Giro": valor_giro,
+            "Duración Macaulay": lote["macaulay"],
+            "Duración Modificada": lote["duracion_mod"],
+            "DV01": lote["duracion_mod"] * valor_giro / 10000,
+            "Convexidad": lote["convexidad"],
+        },
+        index=df_posiciones.index,
+    )
+
+    # TIR: inversión (-valor de giro) en la negociación y flujos en pesos
+    tiempos = np.hstack([np.zeros((len(valor_giro), 1)), lote["dias_calendario"] / 365])
+    flujos = np.hstack(
+        [-valor_giro[:, None], lote["flujos"] / 100 * valor_nominal[:, None]]
+    )
+    resultados["TIR Inversión"] = calcular_xirr_batch(tiempos, flujos) * 100
+
+    return resultados
+
+
+def calcular_cupon_corrido_posiciones(df_posiciones: pd.DataFrame, fechas_liquidacion):
+    """
+    Cupón corrido de cada posición en cada fecha de liquidación (por ejemplo, todos
+    los días hábiles de un mes), con las reglas de `calcular_cupon_corrido`.
+
+    El calendario de cada bono se genera una sola vez (desde la primera liquidación)
+    y todas las parejas bono x fecha se resuelven con `calcular_cupon_corrido_lote`.
+
+    Parámetros:
+    df_posiciones (pd.DataFrame): Una fila por bono con las columnas de `COLUMNAS_CUPON_CORRIDO`.
+    fechas_liquidacion (list[datetime.date]): Fechas de liquidación.
+
+    Retorna:
+    pd.DataFrame: Posiciones x fechas de liquidación, en las unidades del valor nominal
+    base (%). NaN cuando la fecha está fuera de la vida del bono; los bonos ya
+    vencidos en la primera liquidación quedan con NaN en todas las fechas.
+    """
+    faltantes = [
+        col for col in COLUMNAS_CUPON_CORRIDO if col not in df_posiciones.columns
+    ]
+    if faltantes:
+        raise ValueError(f"❌ Faltan columnas en el portafolio: {faltantes}")
+
+    posiciones = df_posiciones[COLUMNAS_CUPON_CORRIDO].copy()
+    for col in ("fecha_emision", "fecha_vencimiento"):
+        posiciones[col] = pd.to_datetime(posiciones[col], dayfirst=True).dt.date
+    fechas_liquidacion = list(fechas_liquidacion)
+    desde = min(fechas_liquidacion)
+
+    etapas = [
+        etapa_cupones_vigentes_tf(**fila._asdict(), fecha_desde=desde)
+        for fila in posiciones.itertuples(index=False)
+    ]
+    n_cupones = np.array([len(e["fechas_cupon"]) for e in etapas], dtype=np.int64)
+    n_columnas = max(int(n_cupones.max(initial=0)), 1)
+
+    def rellenar(valores, relleno):
+        return list(valores) + [relleno] * (n_columnas - len(valores))
+
+    ordinal_cupon = np.array([rellenar(e["ordinal_cupon"], 0) for e in etapas])
+    ordinal_inicio = np.array([rellenar(e["ordinal_inicio"], 0) for e in etapas])
+
+    cupon_corrido = calcular_cupon_corrido_lote(
+        fechas_cupon=descomponer_fechas(ordinal_cupon),
+        inicios_periodo=descomponer_fechas(ordinal_inicio),
+        cf_primero=np.array([rellenar(e["cf_primero"], 0.0) for e in etapas]),
+        dias_primero=np.array([rellenar(e["dias_primero"], 0) for e in etapas]),
+        n_cupones=n_cupones,
+        fechas_liquidacion=descomponer_fechas(fechas_liquidacion),
+        base_360=(posiciones["base_intereses"] == "30/360").to_numpy(),
+        valor_nominal_base=posiciones["valor_nominal_base"].to_numpy(dtype=float),
+    )
+
+    return pd.DataFrame(
+        cupon_corrido, index=df_posiciones.index, columns=fechas_liquidacion
+    )
+
+
+def agregar_metricas_portafolio(resultados: pd.DataFrame):
+    """
+    Métricas agregadas de un portafolio a partir de las métricas por posición
+    (`COLUMNAS_METRICAS` de `data_handling.lote_data`).
+
+    Las duraciones, la convexidad y la TIR se ponderan por valor de giro; el valor de
+    giro y el DV01 se suman, ya que están en pesos.
+
+    Retorna:
+    dict: "Valor Giro", "Duración Macaulay", "Duración Modificada", "DV01",
+    "Convexidad", "TIR Inversión" y "Posiciones".
+    """
+    valor_giro = resultados["Valor Giro"].to_numpy(dtype=float)
+    total = valor_giro.sum()
+
+    def ponderada(columna):
+        if total == 0:
+            return float("nan")
+        return float(
+            (resultados[columna].to_numpy(dtype=float) * valor_giro).sum() / total
+        )
+
+    return {
+        "Valor Giro": float(total),
+        "Duración Macaulay": ponderada("Duración Macaulay"),
+        "Duración Modificada": ponderada("Duración Modificada"),
+        "DV01": float(resultados["DV01"].sum()),
+        "Convexidad": ponderada("Convexidad"),
+        "TIR Inversión": ponderada("TIR Inversión"),
+        "Posiciones": len(resultados),
+    }
@@ -0,0 +1,227 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from data_handling.historico_data import obtener_historico_ibr
+from data_handling.portafolio_data import PERIODOS_POR_ANIO
+from logic.fechas_logic import descomponer_fechas, dias_30_360, dias_sin_29_febrero
+from logic.ibr_logic import es_dia_habil_bancario, fecha_publicacion_ibr
+from logic.serie_logic import valorar_serie
+from logic.shared_logic import (
+    calcular_fecha_anterior,
+    convertir_tasa_nominal_a_efectiva_anual,
+    generar_fechas,
+    sumar_tasas,
+)
+
+COLUMNAS_IBR = [
+    "fecha_emision",
+    "fecha_vencimiento",
+    "periodo_cupon",
+    "base_intereses",
+    "tasa_cupon",
+    "valor_nominal_base",
+    "tasa_mercado",
+    "valor_nominal",
+    "modalidad_tasa_cupon",
+]
+
+
+def _calendario_ibr(bono: dict, fecha_desde: datetime.date):
+    """
+    Cupones posteriores a `fecha_desde` con el inicio del período con que los ve la
+    calculadora cuando son el próximo cupón (`calcular_fecha_anterior`).
+    """
+    fechas = [
+        datetime.datetime.strptime(f, "%d/%m/%Y").date()
+        for f in generar_fechas(
+            fecha_inicio=bono["fecha_emision"],
+            fecha_fin=bono["fecha_vencimiento"],
+            fecha_negociacion=fecha_desde,
+            periodicidad=bono["periodo_cupon"],
+        )
+    ]
+    inicios = [
+        calcular_fecha_anterior(
+            fecha=f,
+            periodicidad=bono["periodo_cupon"],
+            base_intereses=bono["base_intereses"],
+            num_per=1,
+        )
+        for f in fechas
+    ]
+    return fechas, inicios
+
+
+def _tasas_publicadas(historico: pd.DataFrame, fechas_publicacion: list):
+    """
+    IBR (%) publicada en cada fecha; error si alguna no está en el histórico.
+    """
+    serie = historico.set_index("Fecha")["Tasa_ibr_mes_nominal"]
+    tasas = serie.reindex(pd.to_datetime(fechas_publicacion))
+    faltantes = tasas.index[tasas.isna()]
+    if len(faltantes):
+        raise ValueError(f"No existen datos para la fecha {faltantes[0].date()}")
+    return tasas.to_numpy(dtype=float)
+
+
+def serie_mtm_ibr(
+    df_posiciones: pd.DataFrame,
+    fecha_inicio: datetime.date,
+    fecha_fin: datetime.date,
+    archivo=None,
+    solo_dias_habiles: bool = True,
+):
+    """
+    Serie diaria de valoración (mark-to-market) de uno o varios bonos IBR.
+
+    Descarga una sola vez el histórico de IBR de toda la ventana (`obtener_historico_ibr`)
+    y genera un solo calendario de pagos por bono; el corte de la negociación avanza día
+    a día sobre ese calendario. Cada día replica `generar_cashflows_df_ibr`: el próximo
+    cupón usa la IBR publicada para el inicio de su período, los demás y la tasa de
+    negociación la IBR publicada para el día, más el spread correspondiente.
+
+    Parámetros:
+    df_posiciones (pd.DataFrame): Una fila por bono con las columnas de `COLUMNAS_IBR`
+        (las fechas pueden venir como fechas, Timestamp o texto DD/MM/AAAA).
+    fecha_inicio, fecha_fin (datetime.date): Ventana de valoración.
+    archivo (opcional): Archivo de proyecciones; si es None se usa el histórico de BanRep.
+    solo_dias_habiles (bool): Si True, valora únicamente los días hábiles bancarios.
+
+    Retorna:
+    pd.DataFrame: Una fila por bono y fecha (antes del vencimiento y desde la emisión).
+    """
+    faltantes = [c for c in COLUMNAS_IBR if c not in df_posiciones.columns]
+    if faltantes:
+        raise ValueError(f"❌ Faltan columnas: {', '.join(faltantes)}")
+    if fecha_fin < fecha_inicio:
+        raise ValueError("❌ La fecha final debe ser posterior a la fecha inicial.")
+
+    posiciones = df_posiciones[COLUMNAS_IBR].copy()
+    for col in ("fecha_emision", "fecha_vencimiento"):
+        posiciones[col] = pd.to_datetime(posiciones[col], dayfirst=True).dt.date
+
+    dias = [
+        d.date()
+        for d in pd.date_range(fecha_inicio, fecha_fin, freq="D")
+        if not solo_dias_habiles or es_dia_habil_bancario(d.date())
+    ]
+    publicacion = {d: fecha_publicacion_ibr(d) for d in dias}
+
+    # Calendario de cada bono y fechas de publicación que usa, para un solo histórico
+    preparados = []
+    for indice, bono in zip(posiciones.index, posiciones.to_dict("records")):
+        fechas, inicios = _calendario_ibr(
+            bono, fecha_inicio - datetime.timedelta(days=1)
+        )
+        dias_bono = [
+            d for d in dias if bono["fecha_emision"] <= d < bono["fecha_vencimiento"]
+        ]
+        if not dias_bono or not fechas:
+            continue
+        partes_cupon = descomponer_fechas(fechas)
+        partes_dia = descomponer_fechas(dias_bono)
+        proximo = np.searchsorted(partes_cupon[0], partes_dia[0], side="right")
+        # Solo los cupones que son el próximo en algún día fijan su tasa en la ventana
+        usados = np.unique(proximo)
+        preparados.append(
+            {
+                "indice": indice,
+                "bono": bono,
+                "fechas": fechas,
+                "inicios": inicios,
+                "dias": dias_bono,
+                "partes_cupon": partes_cupon,
+                "partes_dia": partes_dia,
+                "proximo": proximo,
+                "usados": usados,
+                "publicacion_inicios": [
+                    fecha_publicacion_ibr(inicios[j]) for j in usados
+                ],
+            }
+        )
+    if not preparados:
+        return pd.DataFrame()
+
+    todas = [
+        *(publicacion[d] for p in preparados for d in p["dias"]),
+        *(f for p in preparados for f in p["publicacion_inicios"]),
+    ]
+    historico = obtener_historico_ibr(
+        fecha_inicio=min(todas), fecha_fin=max(todas), archivo=archivo
+    )
+
+    series = []
+    for p in preparados:
+        bono = p["bono"]
+        fechas = p["fechas"]
+        dias_bono = p["dias"]
+        partes_cupon = p["partes_cupon"]
+        partes_dia = p["partes_dia"]
+        proximo = p["proximo"]
+        periodos = PERIODOS_POR_ANIO[bono["periodo_cupon"]]
+        modalidad = bono["modalidad_tasa_cupon"]
+        spread = bono["tasa_cupon"]
+        vn_base = bono["valor_nominal_base"]
+
+        ibr_dia = _tasas_publicadas(historico, [publicacion[d] for d in dias_bono])
+        ibr_inicio = np.full(len(fechas), np.nan)
+        ibr_inicio[p["usados"]] = _tasas_publicadas(historico, p["publicacion_inicios"])
+
+        # Flujos vistos desde cada día: el próximo cupón ya fijó su tasa
+        partes_inicio = descomponer_fechas(p["inicios"])
+        principal = np.zeros(len(fechas))
+        principal[-1] = vn_base
+        cf_primero = (
+            vn_base * sumar_tasas(ibr_inicio, spread, modalidad) / 100 / periodos
+            + principal
+        )
+        cupon_dia = vn_base * sumar_tasas(ibr_dia, spread, modalidad) / 100 / periodos
+        cf_resto = cupon_dia[:, None] + principal[None, :]
+        es_proximo = np.arange(len(fechas))[None, :] == proximo[:, None]
+        flujos = np.where(es_proximo, cf_primero[None, :], cf_resto)
+
+        contar_dias = (
+            dias_30_360 if bono["base_intereses"] == "30/360" else dias_sin_29_febrero
+        )
+        tasa_negociacion = convertir_tasa_nominal_a_efectiva_anual(
+            tasa_nominal_negociacion=sumar_tasas(
+                ibr_dia, bono["tasa_mercado"], modalidad
+            ),
+            periodo=bono["periodo_cupon"],
+        )
+        valores = valorar_serie(
+            fechas_cupon=partes_cupon,
+            inicios_periodo=partes_inicio,
+            cf_primero=cf_primero,
+            dias_primero=contar_dias(partes_inicio, partes_cupon),
+            fechas_valoracion=partes_dia,
+            flujos=flujos,
+            tasas_descuento=tasa_negociacion,
+            base_intereses=bono["base_intereses"],
+            valor_nominal_base=vn_base,
+        )
+
+        valor_giro = valores["precio_sucio"] / 100 * bono["valor_nominal"]
+        series.append(
+            pd.DataFrame(
+                {
+                    "Bono": p["indice"],
+                    "Fecha": dias_bono,
+                    "IBR (%)": ibr_dia,
+                    "Tasa Negociación EA": tasa_negociacion,
+                    "Precio Sucio": valores["precio_sucio"],
+                    "Cupón Corrido": valores["cupon_corrido"],
+                    "Precio Limpio": valores["precio_sucio"] - valores["cupon_corrido"],
+                    "Valor Giro": valor_giro,
+                    "Duración Macaulay": valores["macaulay"],
+                    "Duración Modificada": valores["duracion_mod"],
+                    "DV01": valores["duracion_mod"] * valor_giro / 10000,
+                }
+            )
+        )
+
+    if not series:
+        return pd.DataFrame()
+    return pd.concat(series, ignore_index=True)
@@ -1,18 +1,112 @@
 import datetime
+import threading
 from datetime import date
 
+import numpy as np
 import pandas as pd
-from pyxirr import xirr
+from cachetools import LRUCache, cached
+from cachetools.keys import hashkey
+
+from logic.curva_logic import descontar_con_curva
+from logic.shared_logic import (
+    calcular_fecha_anterior,
+    calcular_t_pv_cf,
+    calcular_t_pv_cf_t1,
+    calcular_vp_cfs,
+)
+from logic.tir_logic import armar_matrices_flujos, calcular_xirr_batch
+from utils.helper_functions import clave_con_archivo, truncate
+
+
+def construir_df_cashflows(
+    etapa: dict,
+    tasa_mercado: float,
+    columna_pesos: str,
+    curva: dict = None,
+    fecha_negociacion: datetime.date = None,
+):
+    """
+    Construye el DataFrame de flujos a partir de la etapa de flujos ya calculada
+    (fechas, días y cupones), aplicando únicamente el descuento a la tasa de mercado
+    o, si se entrega una curva cero, con los factores de descuento de la curva.
+
+    Parámetros:
+    -----------
+    etapa : dict
+        Resultado de la etapa de flujos con las llaves "fechas_cupon", "dias_cupon",
+        "dias_descuento_cupon", "cf_t" y "flujo_pesos".
+    tasa_mercado : float
+        Tasa efectiva anual de descuento en porcentaje.
+    columna_pesos : str
+        Nombre de la columna del flujo en pesos.
+    curva : dict, opcional
+        Curva cero de `data_handling.curva_data.obtener_curva_cero`.
+    fecha_negociacion : date, opcional
+        Fecha de negociación, requerida cuando se descuenta con curva.
 
-from logic.shared_logic import calcular_fecha_anterior
-from utils.helper_functions import truncate
+    Retorna:
+    --------
+    pd.DataFrame
+        DataFrame completo de flujos del bono.
+    """
+    dias_descuento_cupon = etapa["dias_descuento_cupon"]
+    if curva is None:
+        vp_cfs = calcular_vp_cfs(
+            lista_cfs=etapa["cf_t"],
+            tasa_mercado=tasa_mercado,
+            lista_dias_descuento=dias_descuento_cupon,
+        )
+    else:
+        vp_cfs = descontar_con_curva(
+            curva=curva,
+            fecha_negociacion=fecha_negociacion,
+            lista_cfs=etapa["cf_t"],
+            lista_dias_descuento=dias_descuento_cupon,
+        )
+        # Tasa EA única equivalente al descuento con la curva (para duración y convexidad)
+        tiempos, flujos = armar_matrices_flujos(
+            [[0, *dias_descuento_cupon]], [[-sum(vp_cfs), *etapa["cf_t"]]]
+        )
+        tasa_mercado = float(calcular_xirr_batch(tiempos, flujos)[0] * 100)
+    t_pv_cf = calcular_t_pv_cf(
+        vp_cft=vp_cfs, conteo_dias_descuento=dias_descuento_cupon
+    )
+    t_pv_cf_t1 = calcular_t_pv_cf_t1(
+        t_vp_cft=t_pv_cf, conteo_dias_descuento=dias_descuento_cupon
+    )
+    cashflows = {
+        "Fechas Cupón": list(etapa["fechas_cupon"]),
+        "Días Cupón": list(etapa["dias_cupon"]),
+        "Días Dcto Cupón": list(dias_descuento_cupon),
+        "CFt": list(etapa["cf_t"]),
+        "VP CF": vp_cfs,
+        "t*PV CF": t_pv_cf,
+        "(t*PV CF)*(t+1)": t_pv_cf_t1,
+        columna_pesos: list(etapa["flujo_pesos"]),
+    }
+
+    # 🔍 Ensure all columns have the same length
+    for key, value in cashflows.items():
+        if len(value) != len(etapa["dias_cupon"]):
+            raise ValueError(f"Column '{key}' has inconsistent length!")
+
+    df = pd.DataFrame(cashflows)
+    df.attrs["tasa_negociacion_ea"] = tasa_mercado
+
+    return df
 
 
 def calcular_cupon_corrido(
-    df: pd.DataFrame, date_negociacion: date, periodicidad: str, base_intereses: str
+    df: pd.DataFrame,
+    date_negociacion: date,
+    periodicidad: str,
+    base_intereses: str,
+    valor_nominal_base: float,
 ):
     """
     Calcula el cupón corrido de un bono en función de la fecha de negociación.
+    Si el próximo cupón es el último, su CFt incluye el nominal, que no causa
+    intereses: solo se causa la parte del cupón.
 
     Parámetros:
     -----------
@@ -31,6 +125,9 @@ def calcular_cupon_corrido(
     base_intereses : str
         Base Intereses (str): Base Intereses del cálculo ('30/360' o '365/365' días).
 
+    valor_nominal_base : float
+        Valor nominal base del bono (incluido en el CFt del último cupón).
+
     Retorna:
     --------
     float
@@ -46,8 +143,10 @@ def calcular_cupon_corrido(
     # Obtener la fecha del próximo cupón
     fecha_prox_cupon = df["Fechas Cupón"].min()
 
-    # Obtener la tasa del próximo cupón
+    # Obtener la tasa del próximo cupón (sin el nominal si es el último)
     min_cft = df.loc[df["Fechas Cupón"].idxmin(), "CFt"]
+    if df["Fechas Cupón"].idxmin() == df["Fechas Cupón"].idxmax():
+        min_cft -= valor_nominal_base
 
     # Obtener la cantidad de días entre cupones
     min_cupon_dias = df.loc[df["Fechas Cupón"].idxmin(), "Días Cupón"]
@@ -168,8 +267,31 @@ def leer_datos_excel(archivo_subido, nombre_hoja: str):
     if archivo_subido is None:
         raise ValueError("❌ No se ha subido ningún archivo.")
 
+    if _lector_excel is not None:
+        return _lector_excel(nombre_hoja, archivo_subido)
+    # Copia: la hoja leída se comparte entre llamadas a través de la caché
+    return _leer_hoja_excel(nombre_hoja, archivo=archivo_subido).copy()
+
+
+# Lector de hojas alternativo (p. ej. con caché de Streamlit) registrado por la interfaz
+_lector_excel = None
+
+
+def registrar_lector_excel(funcion):
+    """
+    Reemplaza la lectura de hojas por `funcion(nombre_hoja, archivo)`, que debe
+    retornar un DataFrame propio del llamador (no compartido) ya validado.
+    """
+    global _lector_excel
+    _lector_excel = funcion
+
+
+def leer_hoja_excel(nombre_hoja: str, archivo=None):
+    """
+    Lee y valida la hoja de Excel, sin caché (ver `leer_datos_excel`).
+    """
     try:
-        df = pd.read_excel(archivo_subido, sheet_name=nombre_hoja)
+        df = pd.read_excel(archivo, sheet_name=nombre_hoja)
         df.columns = (
             df.columns.str.strip()
         )  # Eliminar espacios en los nombres de las columnas
@@ -199,6 +321,26 @@ def leer_datos_excel(archivo_subido, nombre_hoja: str):
     return df  # ✅ Retorna el DataFrame con las columnas originales
 
 
+# Una sola lectura por contenido de archivo y hoja
+_leer_hoja_excel = cached(
+    cache=LRUCache(maxsize=16), key=clave_con_archivo, lock=threading.Lock()
+)(leer_hoja_excel)
+
+# Hojas del archivo de proyecciones
+HOJAS_PROYECCIONES = ("IBR Estimada", "IPC Estimado")
+
+
+def liberar_hojas_excel(huella: str):
+    """
+    Descarta las hojas ya leídas del archivo con la huella indicada.
+    """
+    with _leer_hoja_excel.cache_lock:
+        for nombre_hoja in HOJAS_PROYECCIONES:
+            _leer_hoja_excel.cache.pop(
+                hashkey(nombre_hoja, huella_archivo=huella), None
+            )
+
+
 def filtrar_por_fecha(archivo, nombre_hoja: str, fechas_filtro: list):
     """
     Filtra un DataFrame cargado desde un archivo por una lista de fechas.
@@ -221,6 +363,19 @@ def filtrar_por_fecha(archivo, nombre_hoja: str, fechas_filtro: list):
     return df_filtrado
 
 
+def _dias_desde_negociacion(df: pd.DataFrame, fecha_negociacion: datetime.date):
+    """
+    Días de cada "Fechas Cupón" contados desde la fecha de negociación.
+    """
+    fechas = pd.to_datetime(df["Fechas Cupón"], format="%d/%m/%Y")
+
+    # Verificar si hay valores nulos después de la conversión
+    if fechas.isna().any():
+        raise ValueError("❌ La columna 'Fechas Cupón' contiene valores no válidos.")
+
+    return (fechas - pd.Timestamp(fecha_negociacion)).dt.days.to_numpy()
+
+
 def calcular_tir_desde_df(
     df: pd.DataFrame,
     columna_flujos: str,
@@ -230,30 +385,50 @@ def calcular_tir_desde_df(
     """
     Calcula la Tasa Interna de Retorno (TIR) a partir de un DataFrame con flujos de efectivo.
     """
+    return calcular_tir_batch(
+        lista_df=[df],
+        columna_flujos=columna_flujos,
+        valores_giro=[valor_giro],
+        fechas_negociacion=[fecha_negociacion],
+    )[0]
 
-    # Convertir la columna de fechas a datetime (si no lo es ya)
-    df["Fechas Cupón"] = pd.to_datetime(df["Fechas Cupón"], format="%d/%m/%Y")
 
-    # Verificar si hay valores nulos después de la conversión
-    if df["Fechas Cupón"].isna().any():
-        raise ValueError("❌ La columna 'Fechas Cupón' contiene valores no válidos.")
+def calcular_tir_batch(
+    lista_df: list[pd.DataFrame],
+    columna_flujos: str,
+    valores_giro: list[float],
+    fechas_negociacion: list[datetime.date],
+):
+    """
+    Calcula la TIR de varios bonos en una sola pasada vectorizada.
 
-    fechas = df["Fechas Cupón"].dt.strftime("%d/%m/%Y").tolist()
+    Cada bono aporta la inversión inicial (-valor de giro) en su fecha de negociación
+    y sus flujos en "Fechas Cupón". Las fechas repetidas se conservan como flujos
+    independientes (no se colapsan).
 
-    # agregar fecha de negociacion
-    fechas.insert(0, fecha_negociacion.strftime("%d/%m/%Y"))
-    fechas_cupones = [datetime.datetime.strptime(f, "%d/%m/%Y").date() for f in fechas]
+    Parámetros:
+    - lista_df: DataFrames de flujos, uno por bono.
+    - columna_flujos: Nombre de la columna con los flujos en pesos.
+    - valores_giro: Valor de giro de cada bono.
+    - fechas_negociacion: Fecha de negociación de cada bono.
 
-    # Convertir la columna de flujos de caja en una lista
-    cash_flows = df[columna_flujos].tolist()
-    # Agregar la inversión inicial negativa al inicio
-    cash_flows.insert(0, -valor_giro)
-    # Crea la lista de tuplas (fecha, monto):
-    lista_de_tuplas = dict(zip(fechas_cupones, cash_flows))
+    Retorna:
+    - np.ndarray: TIR de cada bono en porcentaje (NaN si no existe solución).
+    """
+    lista_dias = []
+    lista_flujos = []
+    for df, valor_giro, fecha_negociacion in zip(
+        lista_df, valores_giro, fechas_negociacion
+    ):
+        dias = _dias_desde_negociacion(df, fecha_negociacion)
+        lista_dias.append(np.concatenate(([0], dias)))
+        lista_flujos.append(
+            np.concatenate(([-valor_giro], df[columna_flujos].to_numpy(dtype=float)))
+        )
 
-    tir = xirr(lista_de_tuplas)
+    tiempos, flujos = armar_matrices_flujos(lista_dias, lista_flujos)
 
-    return tir * 100
+    return calcular_xirr_batch(tiempos, flujos) * 100
 
 
 def calcular_macaulay(df, columna, precio_sucio):
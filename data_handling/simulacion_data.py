@@ -0,0 +1,316 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from data_handling.historico_data import (
+    obtener_historico_ibr,
+    obtener_historico_ipc_mensual,
+)
+from data_handling.ibr_data import etapa_flujos_ibr, tasa_ibr_real_cache
+from data_handling.ipc_data import etapa_flujos_ipc, tasa_ipc_real_cache
+from logic.ibr_logic import fecha_publicacion_ibr
+from logic.shared_logic import (
+    calcular_fecha_anterior,
+    convertir_tasa_nominal_a_efectiva_anual,
+    sumar_tasas,
+)
+from logic.simulacion_logic import (
+    ajustar_ar,
+    calibrar_vasicek,
+    resumir_distribucion,
+    simular_ar,
+    simular_vasicek,
+)
+
+PERIODOS_POR_ANIO = {"Mensual": 12, "Trimestral": 4, "Semestral": 2, "Anual": 1}
+
+
+def simular_precios_ibr(
+    fecha_emision,
+    fecha_vencimiento,
+    fecha_negociacion,
+    periodo_cupon,
+    base_intereses,
+    tasa_cupon,
+    valor_nominal_base,
+    tasa_mercado,
+    valor_nominal,
+    modalidad,
+    archivo=None,
+    n_trayectorias: int = 10000,
+    anios_calibracion: int = 5,
+    tamano_bloque: int = 5000,
+    semilla=None,
+):
+    """
+    Valora un bono IBR bajo N trayectorias simuladas de la tasa IBR (modelo de Vasicek
+    calibrado con el histórico de la ventana `anios_calibracion` previa a la negociación,
+    sincronizado con BanRep). El archivo de proyecciones solo aporta la IBR conocida del
+    primer cupón y de la negociación.
+
+    El primer cupón usa la IBR conocida del inicio del período, como en
+    `procesar_tasa_cupon_ibr_datos`; cada cupón siguiente usa la IBR simulada en la fecha
+    de publicación del inicio de su período. Todos los flujos se descuentan a la tasa de
+    negociación EA (IBR de negociación + spread), igual que en `generar_cashflows_df_ibr`.
+
+    Las trayectorias se procesan en bloques de `tamano_bloque` para acotar la memoria:
+    solo se conserva el precio de cada trayectoria.
+
+    Retorna:
+    dict: "precios" (np.ndarray de precios sucios), "valores_giro", "resumen" (media,
+    desviación y percentiles del precio) y "parametros" del modelo calibrado.
+    """
+    if periodo_cupon not in PERIODOS_POR_ANIO:
+        raise ValueError(
+            "Periodicidad no válida. Usa: 'Mensual', 'Trimestral', 'Semestral' o 'Anual'."
+        )
+
+    etapa = etapa_flujos_ibr(
+        fecha_emision=fecha_emision,
+        fecha_vencimiento=fecha_vencimiento,
+        fecha_negociacion=fecha_negociacion,
+        periodo_cupon=periodo_cupon,
+        base_intereses=base_intereses,
+        tasa_cupon=tasa_cupon,
+        valor_nominal_base=valor_nominal_base,
+        valor_nominal=valor_nominal,
+        modalidad=modalidad,
+        archivo=archivo,
+    )
+    fechas_cupon = [
+        datetime.datetime.strptime(f, "%d/%m/%Y").date() for f in etapa["fechas_cupon"]
+    ]
+    dias_descuento = np.asarray(etapa["dias_descuento_cupon"], dtype=float)
+
+    # IBR conocida: inicio del cupón vigente y fecha de negociación
+    fecha_per_anterior = calcular_fecha_anterior(
+        fecha=min(fechas_cupon),
+        periodicidad=periodo_cupon,
+        base_intereses=base_intereses,
+        num_per=1,
+    )
+    ibr_per_anterior = tasa_ibr_real_cache(fecha=fecha_per_anterior, archivo=archivo)
+    ibr_negociacion = tasa_ibr_real_cache(fecha=fecha_negociacion, archivo=archivo)
+
+    tasa_negociacion_efectiva = convertir_tasa_nominal_a_efectiva_anual(
+        tasa_nominal_negociacion=sumar_tasas(
+            tasa1=ibr_negociacion, tasa2=tasa_mercado, modalidad=modalidad
+        ),
+        periodo=periodo_cupon,
+    )
+    factores_descuento = 1 / (1 + tasa_negociacion_efectiva / 100) ** (
+        dias_descuento / 365
+    )
+
+    # Calibración siempre sobre el histórico observado (BanRep), no sobre la hoja
+    # "IBR Estimada" del archivo, que es una proyección
+    historico = obtener_historico_ibr(
+        fecha_inicio=fecha_negociacion - relativedelta(years=anios_calibracion),
+        fecha_fin=fecha_negociacion,
+    )
+    paso_anios = historico["Fecha"].diff().dt.days.mean() / 365
+    a, b, sigma = calibrar_vasicek(
+        historico["Tasa_ibr_mes_nominal"].to_numpy(), paso_anios
+    )
+
+    # Tiempos (años) de publicación de la IBR que fija cada cupón desde el segundo
+    tiempos_reset = np.array(
+        [
+            max((fecha_publicacion_ibr(f) - fecha_negociacion).days, 0) / 365
+            for f in fechas_cupon[:-1]
+        ]
+    )
+
+    rng = np.random.default_rng(semilla)
+    periodos = PERIODOS_POR_ANIO[periodo_cupon]
+    precios = np.empty(n_trayectorias)
+
+    for inicio in range(0, n_trayectorias, tamano_bloque):
+        n_bloque = min(tamano_bloque, n_trayectorias - inicio)
+        trayectorias = np.empty((n_bloque, len(fechas_cupon)))
+        trayectorias[:, 0] = ibr_per_anterior
+        trayectorias[:, 1:] = simular_vasicek(
+            tasa_inicial=ibr_negociacion,
+            a=a,
+            b=b,
+            sigma=sigma,
+            tiempos=tiempos_reset,
+            n_trayectorias=n_bloque,
+            rng=rng,
+        )
+        tasas = (
+            sumar_tasas(tasa1=trayectorias, tasa2=tasa_cupon, modalidad=modalidad)
+            / 100
+            / periodos
+        )
+        cf_t = valor_nominal_base * tasas
+        cf_t[:, -1] += valor_nominal_base
+        precios[inicio : inicio + n_bloque] = cf_t @ factores_descuento
+
+    return {
+        "precios": precios,
+        "valores_giro": precios / 100 * valor_nominal,
+        "resumen": resumir_distribucion(precios),
+        "parametros": {
+            "a": a,
+            "b": b,
+            "sigma": sigma,
+            "IBR Negociación": ibr_negociacion,
+            "Tasa Negociación EA": tasa_negociacion_efectiva,
+        },
+    }
+
+
+def simular_escenarios_ipc(
+    fecha_emision,
+    fecha_vencimiento,
+    fecha_negociacion,
+    periodo_cupon,
+    base_intereses,
+    tasa_cupon,
+    valor_nominal_base,
+    tasa_mercado,
+    valor_nominal,
+    archivo,
+    modalidad,
+    modo_ipc,
+    n_trayectorias: int = 5000,
+    orden_ar: int = 2,
+    tamano_bloque: int = 5000,
+    semilla=None,
+):
+    """
+    Genera escenarios mensuales de inflación con un AR(p) ajustado a la serie histórica
+    del archivo de proyecciones y valora el bono IPC en todos a la vez.
+
+    En cada escenario se aplican las reglas de `procesar_tasa_flujos_real_ipc`: con
+    `modo_ipc` "Inicio" cada cupón usa el IPC del inicio de su período (el primero, el
+    del período anterior, ya conocido) y con "Final" el IPC de la fecha de pago. El
+    spread se suma con `sumar_tasas` y los flujos se descuentan a la tasa de negociación
+    EA (IPC de negociación + spread), igual que en `generar_cashflows_df_ipc`.
+
+    Retorna:
+    dict: "precios" (precio sucio por escenario), "resumen" del precio,
+    "flujos_reales" (media y percentiles del flujo en pesos por fecha de cupón)
+    y "parametros" del AR ajustado.
+    """
+    base = {"30/360": 360, "365/365": 365}
+    if base_intereses not in base:
+        raise ValueError("Base no válida. Usa '30/360' o '365/365'.")
+
+    etapa = etapa_flujos_ipc(
+        fecha_emision=fecha_emision,
+        fecha_vencimiento=fecha_vencimiento,
+        fecha_negociacion=fecha_negociacion,
+        periodo_cupon=periodo_cupon,
+        base_intereses=base_intereses,
+        tasa_cupon=tasa_cupon,
+        valor_nominal_base=valor_nominal_base,
+        valor_nominal=valor_nominal,
+        modalidad=modalidad,
+        modo_ipc=modo_ipc,
+        archivo=archivo,
+    )
+    fechas_cupon = [
+        datetime.datetime.strptime(f, "%d/%m/%Y").date() for f in etapa["fechas_cupon"]
+    ]
+    exponentes = np.asarray(etapa["dias_cupon"], dtype=float) / base[base_intereses]
+    dias_descuento = np.asarray(etapa["dias_descuento_cupon"], dtype=float)
+
+    # Fecha de IPC que fija cada cupón según el modo
+    if modo_ipc == "Inicio":
+        fecha_per_anterior = calcular_fecha_anterior(
+            fecha=min(fechas_cupon),
+            periodicidad=periodo_cupon,
+            base_intereses=base_intereses,
+            num_per=1,
+        )
+        fechas_ipc = [fecha_per_anterior, *fechas_cupon[:-1]]
+    else:
+        fechas_ipc = fechas_cupon
+
+    ipc_negociacion = tasa_ipc_real_cache(fecha=fecha_negociacion, archivo=archivo)
+    tasa_negociacion_efectiva = sumar_tasas(
+        tasa1=ipc_negociacion, tasa2=tasa_mercado, modalidad=modalidad
+    )
+    factores_descuento = 1 / (1 + tasa_negociacion_efectiva / 100) ** (
+        dias_descuento / 365
+    )
+
+    # Ajuste del AR(p) sobre la serie mensual hasta la negociación
+    historico = obtener_historico_ipc_mensual(
+        fecha_fin=fecha_negociacion, archivo=archivo
+    ).to_numpy()
+    constante, coeficientes, sigma = ajustar_ar(historico, orden=orden_ar)
+
+    # Mes simulado (desde el mes de negociación) de cada fecha; 0 = IPC ya conocido
+    meses = np.array(
+        [
+            (f.year - fecha_negociacion.year) * 12 + f.month - fecha_negociacion.month
+            for f in fechas_ipc
+        ]
+    )
+    conocidos = np.array([f <= fecha_negociacion for f in fechas_ipc])
+    ipc_conocido = np.array(
+        [
+            tasa_ipc_real_cache(fecha=f, archivo=archivo) if es_conocido else np.nan
+            for f, es_conocido in zip(fechas_ipc, conocidos)
+        ]
+    )
+    n_meses = max(int(meses.max()), 1)
+
+    rng = np.random.default_rng(semilla)
+    precios = np.empty(n_trayectorias)
+    flujos_pesos = np.empty((n_trayectorias, len(fechas_cupon)))
+
+    for inicio in range(0, n_trayectorias, tamano_bloque):
+        n_bloque = min(tamano_bloque, n_trayectorias - inicio)
+        escenarios = np.empty((n_bloque, n_meses + 1))
+        escenarios[:, 0] = historico[-1]
+        escenarios[:, 1:] = simular_ar(
+            historia=historico,
+            constante=constante,
+            coeficientes=coeficientes,
+            sigma=sigma,
+            n_pasos=n_meses,
+            n_trayectorias=n_bloque,
+            rng=rng,
+        )
+        ipc_cupones = np.where(
+            conocidos, ipc_conocido, escenarios[:, np.clip(meses, 0, None)]
+        )
+        tasas_cupon = sumar_tasas(
+            tasa1=ipc_cupones, tasa2=tasa_cupon, modalidad=modalidad
+        )
+        tasas = np.round((1 + tasas_cupon / 100) ** exponentes - 1, 5)
+        cf_t = valor_nominal_base * tasas
+        cf_t[:, -1] += valor_nominal_base
+
+        precios[inicio : inicio + n_bloque] = cf_t @ factores_descuento
+        flujos_pesos[inicio : inicio + n_bloque] = cf_t / 100 * valor_nominal
+
+    flujos_reales = pd.DataFrame(
+        {
+            "Fechas Cupón": list(etapa["fechas_cupon"]),
+            "Media (COP$)": flujos_pesos.mean(axis=0),
+            **{
+                f"P{p} (COP$)": np.percentile(flujos_pesos, p, axis=0)
+                for p in (5, 50, 95)
+            },
+        }
+    )
+
+    return {
+        "precios": precios,
+        "resumen": resumir_distribucion(precios),
+        "flujos_reales": flujos_reales,
+        "parametros": {
+            "Constante": constante,
+            "Coeficientes": coeficientes.tolist(),
+            "Sigma": sigma,
+            "IPC Negociación": ipc_negociacion,
+            "Tasa Negociación EA": tasa_negociacion_efectiva,
+        },
+    }
@@ -1,19 +1,24 @@
-import pandas as pd
+import datetime
+import threading
 
+from cachetools import LRUCache, cached
+
+from data_handling.cache_disco_data import cache_en_disco
+from data_handling.shared_data import construir_df_cashflows
+from logic.fechas_logic import descomponer_fechas, dias_30_360, dias_sin_29_febrero
 from logic.shared_logic import (
     calcular_cupones_futuros_cf,
     calcular_diferencias_fechas_pago_cupon,
+    calcular_fecha_anterior,
     calcular_flujo_pesos,
     calcular_numero_dias_descuento_cupon,
-    calcular_t_pv_cf,
-    calcular_t_pv_cf_t1,
-    calcular_vp_cfs,
     generar_fechas,
 )
 from logic.tasa_fija_logic import convertir_tasa_cupon_tf
 
 
-def generar_cashflows_df_tf(
+@cached(cache=LRUCache(maxsize=256), lock=threading.Lock())
+def etapa_flujos_tf(
     fecha_emision,
     fecha_vencimiento,
     fecha_negociacion,
@@ -22,11 +27,12 @@ def generar_cashflows_df_tf(
     modalidad_tasa_cupon,
     tasa_cupon,
     valor_nominal_base,
-    tasa_mercado,
     valor_nominal,
 ):
     """
-    Returns a complete bond cash flow DataFrame.
+    Calcula (y guarda en caché) la etapa de flujos del bono: fechas, días y cupones.
+    Ninguno de estos valores depende de la tasa de mercado, por lo que un cambio
+    únicamente en la tasa reutiliza la etapa y solo recalcula el descuento.
     """
     fechas_cupon = generar_fechas(
         fecha_inicio=fecha_emision,
@@ -52,33 +58,127 @@ def generar_cashflows_df_tf(
     cf_t = calcular_cupones_futuros_cf(
         valor_nominal_base=valor_nominal_base, tasas_periodicas=tasa_convertida
     )
-    vp_cfs = calcular_vp_cfs(
-        lista_cfs=cf_t,
-        tasa_mercado=tasa_mercado,
-        lista_dias_descuento=dias_descuento_cupon,
-    )
     flujo_pesos = calcular_flujo_pesos(valor_nominal=valor_nominal, lista_cfs=cf_t)
-    t_pv_cf = calcular_t_pv_cf(
-        vp_cft=vp_cfs, conteo_dias_descuento=dias_descuento_cupon
+
+    return {
+        "fechas_cupon": tuple(fechas_cupon),
+        "dias_cupon": tuple(dias_cupon),
+        "dias_descuento_cupon": tuple(dias_descuento_cupon),
+        "cf_t": tuple(cf_t),
+        "flujo_pesos": tuple(flujo_pesos),
+    }
+
+
+@cached(cache=LRUCache(maxsize=4096), lock=threading.Lock())
+def etapa_cupones_vigentes_tf(
+    fecha_emision,
+    fecha_vencimiento,
+    fecha_desde,
+    periodo_cupon,
+    base_intereses,
+    modalidad_tasa_cupon,
+    tasa_cupon,
+    valor_nominal_base,
+):
+    """
+    Calcula (y guarda en caché), para cada cupón posterior a `fecha_desde`, el período
+    y el flujo con que lo ve la calculadora cuando es el próximo cupón a pagar: inicio
+    del período con `calcular_fecha_anterior`, sus días y su flujo (CFt).
+
+    Es la información que usa `calcular_cupon_corrido` para cualquier fecha de
+    liquidación entre `fecha_desde` y el vencimiento. Si el bono no tiene cupones
+    posteriores a `fecha_desde` (ya venció), todas las entradas quedan vacías.
+    """
+    fechas_cupon = generar_fechas(
+        fecha_inicio=fecha_emision,
+        fecha_fin=fecha_vencimiento,
+        fecha_negociacion=fecha_desde,
+        periodicidad=periodo_cupon,
     )
-    t_pv_cf_t1 = calcular_t_pv_cf_t1(
-        t_vp_cft=t_pv_cf, conteo_dias_descuento=dias_descuento_cupon
+    if not fechas_cupon:
+        return {
+            "fechas_cupon": (),
+            "inicios_periodo": (),
+            "ordinal_cupon": (),
+            "ordinal_inicio": (),
+            "dias_primero": (),
+            "cf_primero": (),
+        }
+    fechas = [datetime.datetime.strptime(f, "%d/%m/%Y").date() for f in fechas_cupon]
+    inicios_periodo = [
+        calcular_fecha_anterior(
+            fecha=f,
+            periodicidad=periodo_cupon,
+            base_intereses=base_intereses,
+            num_per=1,
+        )
+        for f in fechas
+    ]
+    # Mismos conteos de `calcular_diferencias_fechas_pago_cupon` para el primer cupón
+    if base_intereses == "365/365":
+        contar_dias = dias_sin_29_febrero
+    elif base_intereses == "30/360":
+        contar_dias = dias_30_360
+    else:
+        raise ValueError("Base Intereses no válida. Usa '30/360' o '365/365'.")
+    partes_inicio = descomponer_fechas(inicios_periodo)
+    partes_cupon = descomponer_fechas(fechas)
+    dias_primero = contar_dias(partes_inicio, partes_cupon).tolist()
+    cf_primero = calcular_cupones_futuros_cf(
+        valor_nominal_base=valor_nominal_base,
+        tasas_periodicas=convertir_tasa_cupon_tf(
+            modalidad_tasa=modalidad_tasa_cupon,
+            periodicidad=periodo_cupon,
+            tasa_anual_cupon=tasa_cupon,
+            dias_pago_entre_cupon=dias_primero,
+        ),
     )
 
-    cashflows = {
-        "Fechas Cupón": fechas_cupon,
-        "Días Cupón": dias_cupon,
-        "Días Dcto Cupón": dias_descuento_cupon,
-        "CFt": cf_t,
-        "VP CF": vp_cfs,
-        "t*PV CF": t_pv_cf,
-        "(t*PV CF)*(t+1)": t_pv_cf_t1,
-        "Flujo Pesos ($)": flujo_pesos,
+    return {
+        "fechas_cupon": tuple(fechas_cupon),
+        "inicios_periodo": tuple(inicios_periodo),
+        # Días desde 1970-01-01, para armar lotes sin volver a convertir fechas
+        "ordinal_cupon": tuple(partes_cupon[0].tolist()),
+        "ordinal_inicio": tuple(partes_inicio[0].tolist()),
+        "dias_primero": tuple(dias_primero),
+        "cf_primero": tuple(cf_primero),
     }
 
-    # 🔍 Ensure all columns have the same length
-    for key, value in cashflows.items():
-        if len(value) != len(dias_cupon):
-            raise ValueError(f"Column '{key}' has inconsistent length!")
 
-    return pd.DataFrame(cashflows)
+@cache_en_disco("generar_cashflows_df_tf")
+def generar_cashflows_df_tf(
+    fecha_emision,
+    fecha_vencimiento,
+    fecha_negociacion,
+    periodo_cupon,
+    base_intereses,
+    modalidad_tasa_cupon,
+    tasa_cupon,
+    valor_nominal_base,
+    tasa_mercado,
+    valor_nominal,
+    curva=None,
+):
+    """
+    Returns a complete bond cash flow DataFrame.
+    Si se entrega `curva` (curva cero), los flujos se descuentan con ella en lugar de la tasa.
+    """
+    etapa = etapa_flujos_tf(
+        fecha_emision=fecha_emision,
+        fecha_vencimiento=fecha_vencimiento,
+        fecha_negociacion=fecha_negociacion,
+        periodo_cupon=periodo_cupon,
+        base_intereses=base_intereses,
+        modalidad_tasa_cupon=modalidad_tasa_cupon,
+        tasa_cupon=tasa_cupon,
+        valor_nominal_base=valor_nominal_base,
+        valor_nominal=valor_nominal,
+    )
+
+    return construir_df_cashflows(
+        etapa=etapa,
+        tasa_mercado=tasa_mercado,
+        columna_pesos="Flujo Pesos ($)",
+        curva=curva,
+        fecha_negociacion=fecha_negociacion,
+    )
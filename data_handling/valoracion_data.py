@@ -0,0 +1,127 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from data_handling.portafolio_data import calcular_metricas_bono
+from data_handling.shared_data import calcular_tir_desde_df, clasificar_precio_limpio
+
+# Valoraciones de las calculadoras en un ejecutor de fondo, por etapas: entre una
+# etapa y la siguiente se revisa la cancelación, y cada resultado queda disponible
+# apenas está listo para que la página lo muestre sin esperar a las demás.
+
+# Valoraciones simultáneas en el proceso (las demás esperan turno)
+TRABAJADORES_VALORACION = 4
+
+# Descripción de cada etapa para el progreso en la interfaz
+ETIQUETAS_ETAPAS = {
+    "datos": "Flujos del bono",
+    "metricas": "Métricas",
+    "flujos": "Flujos reales",
+    "tir_inversion": "TIR de inversión",
+    "simulacion": "Simulación",
+}
+
+_ejecutor = ThreadPoolExecutor(
+    max_workers=TRABAJADORES_VALORACION, thread_name_prefix="valoracion"
+)
+
+
+def valorar_por_etapas(etapas: dict):
+    """
+    Ejecuta las etapas en orden en el ejecutor de fondo.
+
+    Parámetros:
+    etapas (dict): Nombre -> función que recibe los resultados de las etapas
+    anteriores (dict) y retorna el de la suya. Un dict con "error" detiene la valoración.
+
+    Retorna:
+    dict: Estado compartido con el hilo: "resultados" (por etapa, a medida que
+    terminan), "etapa" (en curso), "total" (de etapas), "cancelar" (threading.Event,
+    se revisa entre etapas), "terminado", "error" y "futuro".
+    """
+    estado = {
+        "resultados": {},
+        "etapa": None,
+        "total": len(etapas),
+        "cancelar": threading.Event(),
+        "terminado": False,
+        "error": None,
+    }
+
+    def trabajar():
+        try:
+            for nombre, etapa in etapas.items():
+                if estado["cancelar"].is_set():
+                    break
+                estado["etapa"] = nombre
+                resultado = etapa(estado["resultados"])
+                if isinstance(resultado, dict) and "error" in resultado:
+                    estado["error"] = resultado["error"]
+                    break
+                estado["resultados"][nombre] = resultado
+        except Exception as e:
+            estado["error"] = str(e)
+        finally:
+            estado["terminado"] = True
+
+    estado["futuro"] = _ejecutor.submit(trabajar)
+    return estado
+
+
+def cancelar_valoracion(estado: dict):
+    """
+    Pide detener una valoración: si aún no empezó no se ejecuta, y si está en curso
+    se detiene al terminar la etapa actual.
+    """
+    estado["cancelar"].set()
+    if estado["futuro"].cancel():
+        estado["terminado"] = True
+
+
+def metricas_calculadora(
+    df_datos: pd.DataFrame,
+    fecha_negociacion,
+    periodo_cupon: str,
+    base_intereses: str,
+    valor_nominal: float,
+    valor_nominal_base: float,
+    tasa_mercado: float = None,
+):
+    """
+    Métricas de las calculadoras a partir de la tabla de flujos, sin la TIR de
+    inversión (en IBR e IPC requiere los flujos reales). IBR e IPC entregan
+    `tasa_mercado` (el spread ingresado) para la convexidad; Tasa Fija usa la tasa
+    de negociación.
+
+    Retorna:
+    dict: Las de `calcular_metricas_bono` más "Tasa Negociación EA" y "Clasificación"
+    (texto de `clasificar_precio_limpio`).
+    """
+    # Tasa de negociación EA usada en el descuento (sin recalcular la IBR/IPC)
+    tasa_negociacion = df_datos.attrs["tasa_negociacion_ea"]
+    metricas = calcular_metricas_bono(
+        df_datos,
+        fecha_negociacion=fecha_negociacion,
+        periodo_cupon=periodo_cupon,
+        base_intereses=base_intereses,
+        tasa_negociacion=tasa_negociacion,
+        valor_nominal=valor_nominal,
+        valor_nominal_base=valor_nominal_base,
+        tasa_convexidad=tasa_mercado,
+    )
+    metricas["Tasa Negociación EA"] = tasa_negociacion
+    metricas["Clasificación"] = clasificar_precio_limpio(metricas["Precio Limpio"])
+    return metricas
+
+
+def tir_inversion(df_flujos: pd.DataFrame, valor_giro: float, fecha_negociacion):
+    """
+    TIR de inversión a partir de los flujos reales y el valor de giro.
+    """
+    return calcular_tir_desde_df(
+        df=df_flujos.copy(),
+        columna_flujos="Flujo Pesos Reales(COP$)",
+        valor_giro=valor_giro,
+        fecha_negociacion=fecha_negociacion,
+    )
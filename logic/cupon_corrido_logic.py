@@ -0,0 +1,81 @@
+import numpy as np
+
+from logic.fechas_logic import dias_30_360_us
+
+
+def calcular_cupon_corrido_lote(
+    fechas_cupon: tuple,
+    inicios_periodo: tuple,
+    cf_primero: np.ndarray,
+    dias_primero: np.ndarray,
+    n_cupones: np.ndarray,
+    fechas_liquidacion: tuple,
+    base_360: np.ndarray,
+    valor_nominal_base: np.ndarray,
+):
+    """
+    Cupón corrido de varios bonos en varias fechas de liquidación, sin DataFrames.
+
+    Aplica las reglas de `calcular_cupon_corrido`: el período vigente es el del
+    primer cupón posterior a la liquidación (ubicado con una sola búsqueda
+    `searchsorted` para todos los bonos), y los días de intereses desde su inicio se
+    cuentan con `day_count` (30/360 US o días calendario para 365/365).
+
+    Parámetros:
+    fechas_cupon (tuple): Fechas de pago descompuestas (`descomponer_fechas`) en
+        matrices bonos x cupones, en orden por fila y rellenas a la derecha.
+    inicios_periodo (tuple): Inicio del período de cada cupón, descompuesto (misma forma).
+    cf_primero (np.ndarray): Flujo de cada cupón cuando es el próximo a pagar (base 100);
+        el del último incluye el nominal, que no causa intereses.
+    dias_primero (np.ndarray): Días de cada período cuando es el próximo a pagar.
+    n_cupones (np.ndarray): Cupones válidos de cada bono; el resto es relleno.
+    fechas_liquidacion (tuple): Fechas de liquidación (f,) descompuestas.
+    base_360 (np.ndarray): Por bono, True si la base es 30/360.
+    valor_nominal_base (np.ndarray): Por bono, nominal incluido en su último flujo.
+
+    Retorna:
+    np.ndarray: Matriz bonos x fechas de liquidación. NaN si la fecha no cae dentro
+    de un período de cupón del calendario (antes de su inicio o desde el vencimiento).
+    """
+    ordinal_cupon = fechas_cupon[0]
+    n_bonos, n_columnas = ordinal_cupon.shape
+    columnas = np.arange(n_columnas)
+    validos = columnas[None, :] < n_cupones[:, None]
+
+    # Una sola búsqueda: cada fila se desplaza a su propio rango de valores
+    tramo = int(
+        max(ordinal_cupon.max(initial=0), fechas_liquidacion[0].max(initial=0))
+        - min(ordinal_cupon.min(initial=0), fechas_liquidacion[0].min(initial=0))
+        + 2
+    )
+    desplazamiento = np.arange(n_bonos, dtype=np.int64)[:, None] * tramo
+    base = min(ordinal_cupon.min(initial=0), fechas_liquidacion[0].min(initial=0))
+    claves = np.where(validos, ordinal_cupon - base, tramo - 1) + desplazamiento
+    buscadas = (fechas_liquidacion[0][None, :] - base) + desplazamiento
+    proximo = (
+        np.searchsorted(claves.ravel(), buscadas.ravel(), side="right").reshape(
+            buscadas.shape
+        )
+        - desplazamiento // tramo * n_columnas
+    )
+
+    vigente = proximo < n_cupones[:, None]
+    indice = np.minimum(proximo, n_columnas - 1)
+    filas = np.arange(n_bonos)[:, None]
+    inicio = tuple(parte[filas, indice] for parte in inicios_periodo)
+    liquidacion = tuple(parte[None, :] for parte in fechas_liquidacion)
+
+    dias_intereses = np.where(
+        base_360[:, None],
+        dias_30_360_us(inicio, liquidacion),
+        liquidacion[0] - inicio[0],
+    )
+    vigente &= dias_intereses >= 0
+
+    # Solo la parte del cupón: el nominal del último flujo no causa intereses
+    cupon = cf_primero[filas, indice] - np.where(
+        indice == n_cupones[:, None] - 1, valor_nominal_base[:, None], 0.0
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cupon_corrido = cupon / dias_primero[filas, indice]
+    return np.where(vigente, cupon_corrido * dias_intereses, np.nan)
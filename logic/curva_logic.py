@@ -0,0 +1,185 @@
+import numpy as np
+
+from logic.shared_logic import calcular_numero_dias_descuento_cupon
+
+
+def _resolver_nodo(
+    dias: np.ndarray,
+    flujos: np.ndarray,
+    precio: float,
+    nodo_dias: np.ndarray,
+    nodo_log_df: np.ndarray,
+    log_df_inicial: float,
+    tol: float = 1e-12,
+    max_iter: int = 100,
+):
+    """
+    Encuentra el log-factor de descuento al vencimiento de un instrumento tal que la suma
+    de sus flujos descontados sobre la curva iguale su precio.
+
+    Los flujos anteriores al último nodo se descuentan con la curva existente; los
+    posteriores se interpolan linealmente en log-DF entre el último nodo y el nuevo.
+    """
+    ultimo_dia = nodo_dias[-1]
+    ultimo_log_df = nodo_log_df[-1]
+    vencimiento = dias.max()
+
+    conocidos = dias <= ultimo_dia
+    vp_conocido = np.sum(
+        flujos[conocidos]
+        * np.exp(interpolar_log_df(nodo_dias, nodo_log_df, dias[conocidos]))
+    )
+
+    peso = (dias[~conocidos] - ultimo_dia) / (vencimiento - ultimo_dia)
+    flujos_nuevos = flujos[~conocidos]
+
+    x = log_df_inicial
+    for _ in range(max_iter):
+        log_df = ultimo_log_df + (x - ultimo_log_df) * peso
+        vp_nuevos = flujos_nuevos * np.exp(log_df)
+        error = vp_conocido + vp_nuevos.sum() - precio
+        derivada = np.sum(vp_nuevos * peso)
+        paso = error / derivada
+        x -= paso
+        if abs(paso) < tol:
+            return x
+
+    raise ValueError("❌ El bootstrapping de la curva no convergió.")
+
+
+def _pendientes(nodo_dias: np.ndarray, nodo_log_df: np.ndarray):
+    """
+    Pendiente de log-DF de cada tramo; el último tramo se extiende (forward plano).
+    """
+    pendientes = np.diff(nodo_log_df) / np.diff(nodo_dias)
+    return np.append(pendientes, pendientes[-1] if len(pendientes) else 0.0)
+
+
+def interpolar_log_df(
+    nodo_dias: np.ndarray, nodo_log_df: np.ndarray, dias, pendientes=None
+):
+    """
+    Interpola linealmente el logaritmo del factor de descuento (forwards constantes por
+    tramo) en los días indicados, con búsqueda vectorizada del tramo (`searchsorted`).
+    Más allá del último nodo se extrapola con el forward del último tramo.
+    """
+    if pendientes is None:
+        pendientes = _pendientes(nodo_dias, nodo_log_df)
+    dias = np.asarray(dias, dtype=float)
+    tramo = np.clip(np.searchsorted(nodo_dias, dias, side="right") - 1, 0, None)
+    return nodo_log_df[tramo] + pendientes[tramo] * (dias - nodo_dias[tramo])
+
+
+def bootstrap_curva_cero(instrumentos: list[dict], desde: int = 0, nodos=None):
+    """
+    Construye los nodos de una curva cero a partir de instrumentos ordenados por vencimiento.
+
+    Parámetros:
+    instrumentos (list[dict]): Cada uno con "dias" (días de descuento de cada flujo),
+        "flujos" (CFt) y "precio" (precio sucio objetivo).
+    desde (int): Primer instrumento a resolver. Los nodos anteriores se toman de `nodos`,
+        lo que permite reconstruir la curva de forma incremental cuando solo cambia la
+        cotización de un instrumento.
+    nodos (tuple[np.ndarray, np.ndarray], opcional): Días y log-DF de una curva previa.
+
+    Retorna:
+    tuple[np.ndarray, np.ndarray]: Días de los nodos (empezando en 0) y su log-DF.
+    """
+    if desde and nodos is not None:
+        nodo_dias = list(nodos[0][: desde + 1])
+        nodo_log_df = list(nodos[1][: desde + 1])
+    else:
+        nodo_dias, nodo_log_df = [0.0], [0.0]
+        desde = 0
+
+    for instrumento in instrumentos[desde:]:
+        dias = np.asarray(instrumento["dias"], dtype=float)
+        flujos = np.asarray(instrumento["flujos"], dtype=float)
+        vencimiento = dias.max()
+
+        if vencimiento <= nodo_dias[-1]:
+            raise ValueError(
+                "❌ Los instrumentos de la curva tienen vencimientos repetidos."
+            )
+
+        # Punto de partida: descuento a la tasa de mercado del instrumento
+        log_df_inicial = -vencimiento / 365 * np.log1p(instrumento["tasa"] / 100)
+        log_df = _resolver_nodo(
+            dias=dias,
+            flujos=flujos,
+            precio=instrumento["precio"],
+            nodo_dias=np.asarray(nodo_dias),
+            nodo_log_df=np.asarray(nodo_log_df),
+            log_df_inicial=log_df_inicial,
+        )
+        nodo_dias.append(vencimiento)
+        nodo_log_df.append(log_df)
+
+    return np.asarray(nodo_dias), np.asarray(nodo_log_df)
+
+
+def factores_descuento_curva(curva: dict, dias):
+    """
+    Factores de descuento de la curva para cualquier conteo de días (vectorizado).
+
+    Parámetros:
+    curva (dict): Curva con los nodos "dias", "log_df" y sus "pendientes" precalculadas.
+    dias (array-like): Días desde la fecha de valoración de la curva.
+
+    Retorna:
+    np.ndarray: Factores de descuento.
+    """
+    return np.exp(
+        interpolar_log_df(curva["dias"], curva["log_df"], dias, curva["pendientes"])
+    )
+
+
+def tasas_cero_curva(curva: dict, dias):
+    """
+    Tasas cero EA (en porcentaje) de la curva para los días indicados.
+    """
+    dias = np.asarray(dias, dtype=float)
+    factores = factores_descuento_curva(curva, dias)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tasas = (factores ** (-365 / dias) - 1) * 100
+    # En el día 0 se reporta la tasa del primer tramo
+    return np.where(dias > 0, tasas, (np.exp(-curva["pendientes"][0] * 365) - 1) * 100)
+
+
+def armar_curva(nodo_dias: np.ndarray, nodo_log_df: np.ndarray, **datos):
+    """
+    Empaqueta los nodos de la curva con sus pendientes precalculadas.
+    """
+    return {
+        "dias": nodo_dias,
+        "log_df": nodo_log_df,
+        "pendientes": _pendientes(nodo_dias, nodo_log_df),
+        **datos,
+    }
+
+
+def descontar_con_curva(
+    curva: dict, fecha_negociacion, lista_cfs, lista_dias_descuento
+):
+    """
+    Valor presente de los flujos descontados con la curva cero.
+
+    Si la negociación es posterior a la fecha de valoración de la curva, se usan los
+    factores forward DF(t) / DF(negociación).
+
+    Retorna:
+    list[float]: Valor presente de cada flujo.
+    """
+    if fecha_negociacion < curva["fecha_valoracion"]:
+        raise ValueError(
+            "❌ La fecha de negociación no puede ser anterior a la fecha de la curva."
+        )
+    desfase = calcular_numero_dias_descuento_cupon(
+        fecha_negociacion=curva["fecha_valoracion"].strftime("%d/%m/%Y"),
+        lista_fechas=[fecha_negociacion.strftime("%d/%m/%Y")],
+    )[0]
+    dias = np.asarray(lista_dias_descuento, dtype=float) + desfase
+    factores = factores_descuento_curva(curva, dias) / factores_descuento_curva(
+        curva, desfase
+    )
+    return (np.asarray(lista_cfs, dtype=float) * factores).tolist()
@@ -0,0 +1,93 @@
+import threading
+
+import numpy as np
+from cachetools import LRUCache
+
+from utils.configuracion import MEMORIA_FACTORES_DESCUENTO
+
+# Tablas densas de divisores de descuento por (tasa EA, base de días).
+# El tamaño de cada entrada se mide en bytes para acotar la memoria total.
+_tablas = LRUCache(maxsize=MEMORIA_FACTORES_DESCUENTO, getsizeof=lambda t: t.nbytes)
+_tablas_lock = threading.Lock()
+
+# Tasas vistas una sola vez: la tabla se construye cuando la tasa se repite. Es un
+# conjunto simple que se vacía al llenarse (más barato que un LRU por cada tasa nueva)
+_tasas_vistas = set()
+_MAX_TASAS_VISTAS = 4096
+
+
+def _construir_tabla(tasa_mercado: float, base_dias: int, max_dias: int):
+    """
+    Divisores (1 + tasa)^(días/base) para todos los días 0..max_dias.
+    """
+    dias = np.arange(max_dias + 1, dtype=float)
+    return np.power(1 + tasa_mercado / 100, dias / base_dias)
+
+
+def divisores_descuento(tasa_mercado: float, lista_dias, base_dias: int = 365):
+    """
+    Retorna los divisores de descuento (1 + tasa)^(días/base) de cada día como una
+    lectura indexada sobre una tabla densa compartida por todos los bonos con la misma tasa.
+
+    La primera vez que se ve una tasa los divisores se calculan directamente (la
+    mayoría de tasas de negociación no se repiten). Si la tasa vuelve a pedirse, su
+    tabla (tasa, base) se construye sobre los días 0..max_días y se amplía (al menos al
+    doble) cuando se pide un día mayor. Las tablas viven en un LRU acotado por memoria
+    (`MEMORIA_FACTORES_DESCUENTO`), por lo que con muchas tasas distintas se descartan
+    las menos usadas.
+
+    Parámetros:
+    tasa_mercado (float): Tasa efectiva anual en porcentaje.
+    lista_dias (array-like): Días de descuento de cada flujo.
+    base_dias (int): Días del año para el exponente (365 por defecto).
+
+    Retorna:
+    np.ndarray: Divisores de descuento de cada flujo.
+    """
+    if len(lista_dias) == 0:
+        return np.empty(0)
+    dias = np.asarray(lista_dias)
+    minimo, maximo = (
+        (min(lista_dias), max(lista_dias))
+        if isinstance(lista_dias, (list, tuple))
+        else (dias.min(), dias.max())
+    )
+
+    # Días fraccionarios o negativos no tienen posición en la tabla
+    if dias.dtype.kind not in "iu" or minimo < 0:
+        return np.power(1 + tasa_mercado / 100, dias.astype(float) / base_dias)
+
+    clave = (tasa_mercado, base_dias)
+    max_dias = int(maximo)
+
+    with _tablas_lock:
+        tabla = _tablas.get(clave)
+        if tabla is None and clave not in _tasas_vistas:
+            if len(_tasas_vistas) >= _MAX_TASAS_VISTAS:
+                _tasas_vistas.clear()
+            _tasas_vistas.add(clave)
+            primera_vez = True
+        else:
+            primera_vez = False
+    if primera_vez:
+        return np.power(1 + tasa_mercado / 100, dias / base_dias)
+    if tabla is None or len(tabla) <= max_dias:
+        largo = max(max_dias, 2 * len(tabla) if tabla is not None else 0)
+        tabla = _construir_tabla(tasa_mercado, base_dias, largo)
+        with _tablas_lock:
+            try:
+                _tablas[clave] = tabla
+            except ValueError:
+                # La tabla sola supera el límite de memoria: se usa sin guardarla
+                pass
+
+    return tabla[dias]
+
+
+def limpiar_tablas_descuento():
+    """
+    Vacía las tablas de divisores de descuento en memoria.
+    """
+    with _tablas_lock:
+        _tablas.clear()
+        _tasas_vistas.clear()
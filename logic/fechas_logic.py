@@ -0,0 +1,80 @@
+import numpy as np
+
+
+def descomponer_fechas(fechas):
+    """
+    Convierte fechas (date, Timestamp, datetime64, texto ISO o enteros como días desde
+    1970-01-01) en arreglos enteros.
+
+    Retorna:
+    tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Ordinal (días desde
+    1970-01-01), año, mes y día de cada fecha, con la misma forma de la entrada.
+    """
+    dias = np.asarray(fechas, dtype="datetime64[D]")
+    meses = dias.astype("datetime64[M]")
+    ordinal = dias.astype(np.int64)
+    anio = dias.astype("datetime64[Y]").astype(np.int64) + 1970
+    mes = meses.astype(np.int64) % 12 + 1
+    dia = (dias - meses).astype(np.int64) + 1
+    return ordinal, anio, mes, dia
+
+
+def ordinal_fecha(anio, mes, dia):
+    """
+    Número de días desde una época fija (calendario gregoriano proléptico), vectorizado.
+    """
+    anio = anio - (mes <= 2)
+    era = anio // 400
+    anio_era = anio - era * 400
+    dia_anio = (153 * np.where(mes > 2, mes - 3, mes + 9) + 2) // 5 + dia - 1
+    return era * 146097 + anio_era * 365 + anio_era // 4 - anio_era // 100 + dia_anio
+
+
+def bisiestos_hasta(anio, mes, dia, incluir_dia: bool):
+    """
+    Cantidad de 29 de febrero anteriores a la fecha (o hasta ella si `incluir_dia`).
+    """
+    previos = (anio - 1) // 4 - (anio - 1) // 100 + (anio - 1) // 400
+    es_bisiesto = (anio % 4 == 0) & ((anio % 100 != 0) | (anio % 400 == 0))
+    pasado = (mes > 2) | (incluir_dia & (mes == 2) & (dia >= 29))
+    return previos + (es_bisiesto & pasado)
+
+
+def dias_sin_29_febrero(inicio: tuple, fin: tuple):
+    """
+    Días reales entre dos fechas descompuestas, restando cada 29 de febrero del rango
+    [inicio, fin] (regla de `calcular_numero_dias_descuento_cupon`). Admite difusión.
+    """
+    ordinal_inicio, anio_inicio, mes_inicio, dia_inicio = inicio
+    ordinal_fin, anio_fin, mes_fin, dia_fin = fin
+    return (
+        ordinal_fin
+        - ordinal_inicio
+        - bisiestos_hasta(anio_fin, mes_fin, dia_fin, True)
+        + bisiestos_hasta(anio_inicio, mes_inicio, dia_inicio, False)
+    )
+
+
+def dias_30_360(inicio: tuple, fin: tuple):
+    """
+    Días 30/360 entre dos fechas descompuestas con los días limitados a 30, como en
+    `calcular_diferencias_fechas_pago_cupon`.
+    """
+    _, anio_inicio, mes_inicio, dia_inicio = inicio
+    _, anio_fin, mes_fin, dia_fin = fin
+    return (
+        (anio_fin - anio_inicio) * 360
+        + (mes_fin - mes_inicio) * 30
+        + (np.minimum(dia_fin, 30) - np.minimum(dia_inicio, 30))
+    )
+
+
+def dias_30_360_us(inicio: tuple, fin: tuple):
+    """
+    Días 30/360 US (Bond Basis) entre dos fechas descompuestas, como en `day_count`.
+    """
+    _, anio_inicio, mes_inicio, dia_inicio = inicio
+    _, anio_fin, mes_fin, dia_fin = fin
+    d1 = np.where(dia_inicio == 31, 30, dia_inicio)
+    d2 = np.where((dia_fin == 31) & (d1 == 30), 30, dia_fin)
+    return (anio_fin - anio_inicio) * 360 + (mes_fin - mes_inicio) * 30 + (d2 - d1)
@@ -0,0 +1,107 @@
+import numpy as np
+
+from logic.cupon_corrido_logic import calcular_cupon_corrido_lote
+from logic.curva_logic import factores_descuento_curva
+from logic.fechas_logic import dias_sin_29_febrero
+
+
+def valorar_horizonte(
+    fechas_cupon: tuple,
+    inicios_periodo: tuple,
+    cf_t,
+    dias_cupon,
+    horizonte: tuple,
+    base_intereses: str,
+    valor_nominal_base: float,
+    tasa_mercado: float = None,
+    curva: dict = None,
+    cf_primero=None,
+    dias_primero=None,
+    bloque: int = 2048,
+):
+    """
+    Valora un mismo calendario de pagos en muchas fechas de valoración a la vez.
+
+    Las fechas llegan descompuestas (`descomponer_fechas`). En cada fecha del horizonte
+    solo cuentan los cupones posteriores a ella; se descuentan a la tasa constante
+    (`tasa_mercado`, EA %) o con la curva cero estática por plazo (`curva`), con los
+    días de descuento sin 29 de febrero de `calcular_numero_dias_descuento_cupon`.
+    El cupón corrido se calcula con `calcular_cupon_corrido_lote`.
+
+    Parámetros:
+    fechas_cupon (tuple): Fechas de pago (n,) descompuestas, en orden.
+    inicios_periodo (tuple): Inicio del período de cada cupón (n,) descompuesto.
+    cf_t (array-like): Flujo de cada cupón (base 100).
+    dias_cupon (array-like): Días de cada período de cupón.
+    horizonte (tuple): Fechas de valoración (h,) descompuestas, anteriores al vencimiento.
+    base_intereses (str): '30/360' o '365/365'.
+    valor_nominal_base (float): Nominal incluido en el último flujo (no causa intereses).
+    cf_primero, dias_primero (array-like, opcional): Flujo y días de cada cupón cuando es
+        el primero por pagar. Las calculadoras miden ese período desde
+        `calcular_fecha_anterior`, que puede diferir en un día del cupón anterior del
+        calendario (fin de mes); por defecto se usan `cf_t` y `dias_cupon`.
+    bloque (int): Fechas del horizonte por bloque de la matriz horizonte x cupones.
+
+    Retorna:
+    dict: Arreglos (h,) "precio_sucio" (truncado a 3 decimales, como en las
+    calculadoras), "cupon_corrido" y "cupones_recibidos" (acumulado de cupones pagados
+    hasta cada fecha, sin reinversión).
+    """
+    if base_intereses not in ("30/360", "365/365"):
+        raise ValueError("Base de conteo no soportada. Use '30/360' o '365/365'.")
+    if (tasa_mercado is None) == (curva is None):
+        raise ValueError("Indica la tasa de mercado o la curva cero, no ambas.")
+
+    cf_t = np.asarray(cf_t, dtype=float)
+    dias_cupon = np.asarray(dias_cupon, dtype=float)
+    cf_primero = cf_t if cf_primero is None else np.asarray(cf_primero, dtype=float)
+    dias_primero = (
+        dias_cupon if dias_primero is None else np.asarray(dias_primero, dtype=float)
+    )
+    ordinal_cupon = fechas_cupon[0]
+    ordinal_horizonte = horizonte[0]
+
+    if ordinal_horizonte.size and ordinal_horizonte.max() >= ordinal_cupon[-1]:
+        raise ValueError(
+            "❌ Las fechas del horizonte deben ser anteriores al vencimiento."
+        )
+
+    # Matriz horizonte x cupones (por bloques de fechas para acotar la memoria):
+    # flujos y días de descuento de los cupones vigentes
+    proximo = np.searchsorted(ordinal_cupon, ordinal_horizonte, side="right")
+    cupon = tuple(parte[None, :] for parte in fechas_cupon)
+    columnas = np.arange(len(cf_t))[None, :]
+    precio_sucio = np.empty(len(ordinal_horizonte))
+    for inicio in range(0, len(ordinal_horizonte), bloque):
+        tramo = slice(inicio, inicio + bloque)
+        fechas = tuple(parte[tramo, None] for parte in horizonte)
+        vigente = ordinal_cupon[None, :] > fechas[0]
+        es_proximo = columnas == proximo[tramo, None]
+        flujos = np.where(es_proximo, cf_primero[None, :], cf_t[None, :])
+        dias = np.where(vigente, dias_sin_29_febrero(fechas, cupon), 0)
+        if curva is None:
+            factores = (1 + tasa_mercado / 100) ** (-dias / 365)
+        else:
+            factores = factores_descuento_curva(curva, dias)
+        precio_sucio[tramo] = (
+            np.floor((flujos * factores * vigente).sum(axis=1) * 1000) / 1000
+        )
+
+    # Cupón vigente de cada fecha del horizonte y cupones ya pagados
+    cupon_corrido = calcular_cupon_corrido_lote(
+        fechas_cupon=cupon,
+        inicios_periodo=tuple(parte[None, :] for parte in inicios_periodo),
+        cf_primero=cf_primero[None, :],
+        dias_primero=dias_primero[None, :],
+        n_cupones=np.array([len(cf_t)]),
+        fechas_liquidacion=horizonte,
+        base_360=np.array([base_intereses == "30/360"]),
+        valor_nominal_base=np.array([valor_nominal_base], dtype=float),
+    )[0]
+    cupones_recibidos = np.concatenate(([0.0], np.cumsum(cf_t)))[proximo]
+
+    return {
+        "precio_sucio": precio_sucio,
+        "cupon_corrido": cupon_corrido,
+        "cupones_recibidos": cupones_recibidos,
+    }
@@ -1,8 +1,8 @@
 import datetime
+import threading
 
-import holidays
 import pandas as pd
-import requests
+from cachetools import LRUCache, cached
 
 from data_handling.shared_data import filtrar_por_fecha
 from logic.shared_logic import (
@@ -10,9 +10,31 @@ from logic.shared_logic import (
     convertir_tasa_nominal_a_efectiva_anual,
     sumar_tasas,
 )
+from utils import configuracion
+from utils.cache_tasas import consultar_una_vez, vigencia_ventana
 from utils.helper_functions import shift_list_with_replacement
+from utils.proteccion_banrep import (
+    marcar_datos_desactualizados,
+    permitir_consulta_banrep,
+    registrar_exito_banrep,
+    registrar_falla_banrep,
+)
+
+# Festivos en Colombia; se crea en el primer uso (ver `festivos_colombia`)
+co_holidays = None
+
+
+def festivos_colombia():
+    """
+    Calendario de festivos de Colombia. Importar `holidays` y armar el calendario
+    toma cerca de 0.1 s, así que se hace solo cuando se consulta un día hábil.
+    """
+    global co_holidays
+    if co_holidays is None:
+        import holidays
 
-co_holidays = holidays.Colombia()  # Festivos en Colombia
+        co_holidays = holidays.Colombia()
+    return co_holidays
 
 
 def fetch_ibr_data_banrep(fecha_inicio: datetime.date, fecha_fin: datetime.date):
@@ -41,25 +63,130 @@ def fetch_ibr_data_banrep(fecha_inicio: datetime.date, fecha_fin: datetime.date)
 
     headers = {"Content-Type": "application/json"}
 
+    # Importación diferida: solo la consulta en línea necesita la pila HTTP
+    import requests
+
+    # Límite de consultas salientes e interruptor ante fallas seguidas de BanRep
+    if not permitir_consulta_banrep():
+        raise Exception("Sorry, something went wrong, try again later")
+
     try:
         # Make the POST request
-        response = requests.post(url, json=payload, headers=headers)
+        response = requests.post(
+            url, json=payload, headers=headers, timeout=configuracion.BANREP_TIMEOUT
+        )
         response.raise_for_status()
 
         # Extract and transform the data field into a DataFrame
         json_response = response.json()
         data = json_response[0].get("data", []) if json_response else []
+    except (requests.RequestException, ValueError):
+        registrar_falla_banrep()
+        raise Exception("Sorry, something went wrong, try again later")
+    registrar_exito_banrep()
+
+    if not data:
+        return pd.DataFrame(columns=["Fecha", "Tasa_ibr_mes_nominal"])
+
+    df = pd.DataFrame(data, columns=["Unix_Timestamp", "Tasa_ibr_mes_nominal"])
+    df["Fecha"] = pd.to_datetime(df["Unix_Timestamp"], unit="ms").dt.normalize()
+    df = df[["Fecha", "Tasa_ibr_mes_nominal"]]
 
-        if not data:
-            return pd.DataFrame(columns=["Fecha", "Tasa_ibr_mes_nominal"])
+    return df
 
-        df = pd.DataFrame(data, columns=["Unix_Timestamp", "Tasa_ibr_mes_nominal"])
-        df["Fecha"] = pd.to_datetime(df["Unix_Timestamp"], unit="ms").dt.normalize()
-        df = df[["Fecha", "Tasa_ibr_mes_nominal"]]
 
+def consultar_ibr_banrep(fecha_inicio: datetime.date, fecha_fin: datetime.date):
+    """
+    Serie IBR de BanRep para la ventana, desde la API en línea (con la caché de
+    `utils.cache_tasas`) o desde el histórico local según `configuracion.FUENTE_IBR`
+    (se lee en cada llamada). Si BanRep no responde, se usan los últimos datos
+    conocidos (`serie_ibr_conocida`), con `df.attrs["datos_desactualizados"]` y la
+    marca en los registros activos (`registrar_datos_desactualizados`).
+    """
+    if configuracion.FUENTE_IBR == "local":
+        # Importación diferida: historico_data depende de este módulo
+        from data_handling.historico_data import obtener_historico_ibr
+
+        return obtener_historico_ibr(fecha_inicio=fecha_inicio, fecha_fin=fecha_fin)
+    # Una sola consulta en vuelo por ventana, compartida por todas las sesiones
+    try:
+        df = consultar_una_vez(
+            ("ibr_banrep", fecha_inicio, fecha_fin),
+            lambda: fetch_ibr_data_banrep(fecha_inicio, fecha_fin),
+            vigencia=vigencia_ventana(fecha_fin),
+        )
+    except Exception:
+        # BanRep no responde (o el interruptor está abierto): últimos datos conocidos
+        df = serie_ibr_conocida(fecha_inicio, fecha_fin)
+        if df.empty:
+            raise
+        df.attrs["datos_desactualizados"] = True
+        marcar_datos_desactualizados()
         return df
-    except requests.RequestException:
-        raise Exception("Sorry, something went wrong, try again later")
+    _recordar_serie_ibr(df)
+    return df.copy()  # Quien llama puede modificarla
+
+
+# Serie IBR obtenida en línea durante la vida del proceso (respaldo si BanRep falla)
+_serie_conocida = {"df": pd.DataFrame(columns=["Fecha", "Tasa_ibr_mes_nominal"])}
+_candado_serie = threading.Lock()
+
+
+def _recordar_serie_ibr(df: pd.DataFrame):
+    if df.empty:
+        return
+    with _candado_serie:
+        conocida = _serie_conocida["df"]
+        if not df["Fecha"].isin(conocida["Fecha"]).all():
+            _serie_conocida["df"] = _unir_series([conocida, df])
+
+
+def _unir_series(series: list):
+    """
+    Une series IBR (sin vacías), ordenadas por fecha y con la última tasa por fecha.
+    """
+    series = [df for df in series if not df.empty]
+    if not series:
+        return pd.DataFrame(columns=["Fecha", "Tasa_ibr_mes_nominal"])
+    return (
+        pd.concat(series, ignore_index=True)
+        .drop_duplicates(subset="Fecha", keep="last")
+        .sort_values("Fecha", ignore_index=True)
+    )
+
+
+def serie_ibr_conocida(fecha_inicio: datetime.date, fecha_fin: datetime.date):
+    """
+    Serie IBR de respaldo para la ventana, con los datos ya obtenidos de BanRep en
+    este proceso y el histórico local: cada día toma el último dato conocido en o
+    antes de esa fecha.
+
+    Retorna:
+        pd.DataFrame: Columnas "Fecha" y "Tasa_ibr_mes_nominal" (vacío si no hay
+        ningún dato anterior al fin de la ventana).
+    """
+    # Importación diferida: historico_data depende de este módulo
+    from data_handling.historico_data import leer_historico_local_ibr
+
+    conocida = _unir_series([leer_historico_local_ibr(), _serie_conocida["df"]])
+    conocida = conocida[conocida["Fecha"] <= pd.Timestamp(fecha_fin)]
+    if conocida.empty:
+        return conocida
+
+    dias = pd.date_range(
+        max(pd.Timestamp(fecha_inicio), conocida["Fecha"].iloc[0]),
+        pd.Timestamp(fecha_fin),
+    )
+    tasas = conocida.set_index("Fecha")["Tasa_ibr_mes_nominal"].astype(float)
+    return pd.DataFrame(
+        {
+            "Fecha": dias,
+            "Tasa_ibr_mes_nominal": tasas.reindex(tasas.index.union(dias))
+            .ffill()
+            .loc[dias]
+            .to_numpy(),
+        }
+    )
 
 
 def obtener_tasa_ibr_real(fecha: datetime.date, archivo):
@@ -76,7 +203,7 @@ def obtener_tasa_ibr_real(fecha: datetime.date, archivo):
     if archivo:
         df = filtrar_por_fecha(archivo, "IBR Estimada", [ibr_fecha_real])
     else:
-        df = fetch_ibr_data_banrep(ibr_fecha_real, ibr_fecha_real)
+        df = consultar_ibr_banrep(ibr_fecha_real, ibr_fecha_real)
 
     if df.empty:
         raise ValueError(f"No existen datos para la fecha {ibr_fecha_real}")
@@ -100,7 +227,7 @@ def obtener_tasa_ibr_real_batch(lista_fechas: list[datetime.date], archivo):
     if archivo:
         df = filtrar_por_fecha(archivo, "IBR Estimada", ibr_fechas_reales)
     else:
-        df = fetch_ibr_data_banrep(min(ibr_fechas_reales), max(ibr_fechas_reales))
+        df = consultar_ibr_banrep(min(ibr_fechas_reales), max(ibr_fechas_reales))
 
     if df.empty:
         raise ValueError(f"No existen datos para las fechas {ibr_fechas_reales}")
@@ -400,7 +527,7 @@ def es_dia_habil_bancario(fecha: datetime.date) -> bool:
     if fecha.weekday() in (5, 6):  # Sábados (5) y Domingos (6) no son hábiles
         return False
     # Festivos según el calendario de Colombia
-    if fecha in co_holidays:
+    if fecha in festivos_colombia():
         return False
     return True
 
@@ -447,6 +574,7 @@ def viernes_habil_anterior(fecha: datetime.date) -> datetime.date:
     return fecha_aux
 
 
+@cached(cache=LRUCache(maxsize=16384), lock=threading.Lock())
 def fecha_publicacion_ibr(fecha_objetivo: datetime.date) -> datetime.date:
     dia_semana = fecha_objetivo.weekday()  # Lunes=0, Martes=1, ...
 
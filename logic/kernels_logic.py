@@ -0,0 +1,316 @@
+import numpy as np
+
+from logic.fechas_logic import bisiestos_hasta, ordinal_fecha
+from utils.configuracion import BACKEND_CALCULO
+
+try:
+    import numba
+except ImportError:  # Dependencia opcional: sin Numba se usa el backend NumPy
+    numba = None
+
+BACKENDS = ("auto", "numba", "numpy")
+
+
+# ---------------------------------------------------------------------------
+# Backend NumPy (vectorizado sobre la matriz bonos x cupones)
+# ---------------------------------------------------------------------------
+
+
+def _valorar_lote_numpy(
+    anio,
+    mes,
+    dia,
+    n_cupones,
+    neg_anio,
+    neg_mes,
+    neg_dia,
+    tasa_cupon,
+    es_ea,
+    periodos,
+    tasa_mercado,
+    base_360,
+    valor_nominal_base,
+    dias_convexidad,
+):
+    n_bonos, n_columnas = anio.shape
+    columnas = np.arange(1, n_columnas)
+    validos = columnas[None, :] <= n_cupones[:, None]
+    ultimo = columnas[None, :] == n_cupones[:, None]
+    base_360 = base_360.astype(bool)
+
+    ordinal = ordinal_fecha(anio, mes, dia)
+    ordinal_neg = ordinal_fecha(neg_anio, neg_mes, neg_dia)
+    bisiestos_fin = bisiestos_hasta(anio[:, 1:], mes[:, 1:], dia[:, 1:], True)
+
+    # Días entre cupones: 365/365 sin 29 de febrero o 30/360
+    dias_365 = (
+        ordinal[:, 1:]
+        - ordinal[:, :-1]
+        - (
+            bisiestos_fin
+            - bisiestos_hasta(anio[:, :-1], mes[:, :-1], dia[:, :-1], False)
+        )
+    )
+    dia_30 = np.minimum(dia, 30)
+    dias_360 = (
+        (anio[:, 1:] - anio[:, :-1]) * 360
+        + (mes[:, 1:] - mes[:, :-1]) * 30
+        + (dia_30[:, 1:] - dia_30[:, :-1])
+    )
+    dias_cupon = np.where(base_360[:, None], dias_360, dias_365)
+
+    # Días de descuento desde la negociación, sin 29 de febrero
+    bisiestos_neg = bisiestos_hasta(neg_anio, neg_mes, neg_dia, False)
+    dias_calendario = ordinal[:, 1:] - ordinal_neg[:, None]
+    dias_descuento = dias_calendario - (bisiestos_fin - bisiestos_neg[:, None])
+
+    # Tasas del cupón, flujos y descuento
+    tasa = tasa_cupon[:, None] / 100
+    tasas_periodicas = np.where(
+        es_ea.astype(bool)[:, None],
+        (1 + tasa) ** (dias_cupon / 365) - 1,
+        tasa / periodos[:, None],
+    )
+    flujos = valor_nominal_base[:, None] * tasas_periodicas
+    flujos = np.where(validos, flujos + ultimo * valor_nominal_base[:, None], 0.0)
+
+    uno_mas_r = 1 + tasa_mercado / 100
+    vp = flujos / uno_mas_r[:, None] ** (dias_descuento / 365)
+    # t siempre en base 365 y precio sucio truncado a 3 decimales, como en las calculadoras
+    t = dias_descuento / 365
+    t_vp = vp * t
+
+    precio_sucio = np.floor(vp.sum(axis=1) * 1000) / 1000
+    macaulay = t_vp.sum(axis=1) / precio_sucio
+    convexidad = (t_vp * (t + 1)).sum(axis=1) / (
+        precio_sucio * (uno_mas_r ** (dias_convexidad / 365)) ** 2
+    )
+
+    # Cupón corrido desde el inicio del cupón vigente (30/360 US o días reales)
+    d1 = np.where(dia[:, 0] == 31, 30, dia[:, 0])
+    d2 = np.where((neg_dia == 31) & (d1 == 30), 30, neg_dia)
+    dias_intereses = np.where(
+        base_360,
+        (neg_anio - anio[:, 0]) * 360 + (neg_mes - mes[:, 0]) * 30 + (d2 - d1),
+        ordinal_neg - ordinal[:, 0],
+    )
+    # Sin el nominal si el cupón vigente es el último (no causa intereses)
+    cupon_vigente = flujos[:, 0] - np.where(n_cupones == 1, valor_nominal_base, 0.0)
+    cupon_corrido = cupon_vigente / dias_cupon[:, 0] * dias_intereses
+
+    return (
+        precio_sucio,
+        cupon_corrido,
+        macaulay,
+        macaulay / uno_mas_r,
+        convexidad,
+        flujos,
+        np.where(validos, dias_calendario, 0),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Backend de bucles (compilado con Numba cuando está disponible)
+# ---------------------------------------------------------------------------
+
+
+def _ordinal_escalar(anio, mes, dia):
+    if mes <= 2:
+        anio -= 1
+    era = anio // 400
+    anio_era = anio - era * 400
+    dia_anio = (153 * (mes - 3 if mes > 2 else mes + 9) + 2) // 5 + dia - 1
+    return era * 146097 + anio_era * 365 + anio_era // 4 - anio_era // 100 + dia_anio
+
+
+def _bisiestos_hasta_escalar(anio, mes, dia, incluir_dia):
+    previos = (anio - 1) // 4 - (anio - 1) // 100 + (anio - 1) // 400
+    es_bisiesto = anio % 4 == 0 and (anio % 100 != 0 or anio % 400 == 0)
+    pasado = mes > 2 or (incluir_dia and mes == 2 and dia >= 29)
+    return previos + (1 if es_bisiesto and pasado else 0)
+
+
+def _valorar_lote_bucle(
+    anio,
+    mes,
+    dia,
+    n_cupones,
+    neg_anio,
+    neg_mes,
+    neg_dia,
+    tasa_cupon,
+    es_ea,
+    periodos,
+    tasa_mercado,
+    base_360,
+    valor_nominal_base,
+    dias_convexidad,
+):
+    n_bonos, n_columnas = anio.shape
+    precio_sucio = np.zeros(n_bonos)
+    cupon_corrido = np.zeros(n_bonos)
+    macaulay = np.zeros(n_bonos)
+    duracion_mod = np.zeros(n_bonos)
+    convexidad = np.zeros(n_bonos)
+    flujos = np.zeros((n_bonos, n_columnas - 1))
+    dias_calendario = np.zeros((n_bonos, n_columnas - 1), dtype=np.int64)
+
+    for i in range(n_bonos):
+        ordinal_neg = _ordinal_escalar(neg_anio[i], neg_mes[i], neg_dia[i])
+        bisiestos_neg = _bisiestos_hasta_escalar(
+            neg_anio[i], neg_mes[i], neg_dia[i], False
+        )
+        uno_mas_r = 1 + tasa_mercado[i] / 100
+        tasa = tasa_cupon[i] / 100
+        suma_vp = 0.0
+        suma_t_vp = 0.0
+        suma_t_vp_t1 = 0.0
+        dias_primer_cupon = 1
+
+        ordinal_anterior = _ordinal_escalar(anio[i, 0], mes[i, 0], dia[i, 0])
+        for j in range(1, n_cupones[i] + 1):
+            ordinal_actual = _ordinal_escalar(anio[i, j], mes[i, j], dia[i, j])
+            bisiestos_fin = _bisiestos_hasta_escalar(
+                anio[i, j], mes[i, j], dia[i, j], True
+            )
+            if base_360[i]:
+                dias_cupon = (
+                    (anio[i, j] - anio[i, j - 1]) * 360
+                    + (mes[i, j] - mes[i, j - 1]) * 30
+                    + (min(dia[i, j], 30) - min(dia[i, j - 1], 30))
+                )
+            else:
+                dias_cupon = (
+                    ordinal_actual
+                    - ordinal_anterior
+                    - bisiestos_fin
+                    + _bisiestos_hasta_escalar(
+                        anio[i, j - 1], mes[i, j - 1], dia[i, j - 1], False
+                    )
+                )
+            if j == 1:
+                dias_primer_cupon = dias_cupon
+
+            dias_calendario[i, j - 1] = ordinal_actual - ordinal_neg
+            dias_descuento = (
+                ordinal_actual - ordinal_neg - bisiestos_fin + bisiestos_neg
+            )
+
+            if es_ea[i]:
+                tasa_periodica = (1 + tasa) ** (dias_cupon / 365) - 1
+            else:
+                tasa_periodica = tasa / periodos[i]
+            flujo = valor_nominal_base[i] * tasa_periodica
+            if j == n_cupones[i]:
+                flujo += valor_nominal_base[i]
+            flujos[i, j - 1] = flujo
+
+            vp = flujo / uno_mas_r ** (dias_descuento / 365)
+            t = dias_descuento / 365
+            suma_vp += vp
+            suma_t_vp += vp * t
+            suma_t_vp_t1 += vp * t * (t + 1)
+            ordinal_anterior = ordinal_actual
+
+        precio_sucio[i] = np.floor(suma_vp * 1000) / 1000
+        macaulay[i] = suma_t_vp / precio_sucio[i]
+        duracion_mod[i] = macaulay[i] / uno_mas_r
+        convexidad[i] = suma_t_vp_t1 / (
+            precio_sucio[i] * (uno_mas_r ** (dias_convexidad[i] / 365)) ** 2
+        )
+
+        if base_360[i]:
+            d1 = 30 if dia[i, 0] == 31 else dia[i, 0]
+            d2 = 30 if neg_dia[i] == 31 and d1 == 30 else neg_dia[i]
+            dias_intereses = (
+                (neg_anio[i] - anio[i, 0]) * 360
+                + (neg_mes[i] - mes[i, 0]) * 30
+                + d2
+                - d1
+            )
+        else:
+            dias_intereses = ordinal_neg - _ordinal_escalar(
+                anio[i, 0], mes[i, 0], dia[i, 0]
+            )
+        cupon_vigente = flujos[i, 0]
+        if n_cupones[i] == 1:
+            cupon_vigente -= valor_nominal_base[i]
+        cupon_corrido[i] = cupon_vigente / dias_primer_cupon * dias_intereses
+
+    return (
+        precio_sucio,
+        cupon_corrido,
+        macaulay,
+        duracion_mod,
+        convexidad,
+        flujos,
+        dias_calendario,
+    )
+
+
+if numba is not None:
+    _ordinal_escalar = numba.njit(cache=True)(_ordinal_escalar)
+    _bisiestos_hasta_escalar = numba.njit(cache=True)(_bisiestos_hasta_escalar)
+    _valorar_lote_numba = numba.njit(cache=True)(_valorar_lote_bucle)
+else:
+    _valorar_lote_numba = None
+
+
+def backend_activo(backend: str = BACKEND_CALCULO):
+    """
+    Backend que se usará para `backend` ('auto', 'numba' o 'numpy'): sin Numba
+    instalado siempre se usa 'numpy'.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend no válido. Usa uno de: {', '.join(BACKENDS)}.")
+    if backend == "numpy" or _valorar_lote_numba is None:
+        return "numpy"
+    return "numba"
+
+
+def valorar_lote_tf(lote: dict, backend: str = BACKEND_CALCULO):
+    """
+    Valora un lote de bonos de tasa fija en una sola pasada: días entre cupones,
+    tasas del cupón, flujos, descuento, duración, convexidad y cupón corrido, con las
+    mismas convenciones que las calculadoras.
+
+    Parámetros:
+    lote (dict): Arreglos del lote (ver `armar_lote_tf`). Las fechas van en matrices
+        bonos x (1 + cupones) de año, mes y día; la columna 0 es el inicio del cupón vigente.
+    backend (str): 'auto' (Numba si está instalado), 'numba' o 'numpy'.
+
+    Retorna:
+    dict: Arreglos por bono ("precio_sucio", "cupon_corrido", "macaulay",
+    "duracion_mod", "convexidad") y matrices "flujos" (CFt) y "dias_calendario".
+    """
+    kernel = (
+        _valorar_lote_numba
+        if backend_activo(backend) == "numba"
+        else _valorar_lote_numpy
+    )
+    resultados = kernel(
+        lote["anio"],
+        lote["mes"],
+        lote["dia"],
+        lote["n_cupones"],
+        lote["neg_anio"],
+        lote["neg_mes"],
+        lote["neg_dia"],
+        lote["tasa_cupon"],
+        lote["es_ea"],
+        lote["periodos"],
+        lote["tasa_mercado"],
+        lote["base_360"],
+        lote["valor_nominal_base"],
+        lote["dias_convexidad"],
+    )
+    claves = (
+        "precio_sucio",
+        "cupon_corrido",
+        "macaulay",
+        "duracion_mod",
+        "convexidad",
+        "flujos",
+        "dias_calendario",
+    )
+    return dict(zip(claves, resultados))
@@ -0,0 +1,92 @@
+import numpy as np
+
+from logic.cupon_corrido_logic import calcular_cupon_corrido_lote
+from logic.fechas_logic import dias_sin_29_febrero
+
+
+def valorar_serie(
+    fechas_cupon: tuple,
+    inicios_periodo: tuple,
+    cf_primero,
+    dias_primero,
+    fechas_valoracion: tuple,
+    flujos,
+    tasas_descuento,
+    base_intereses: str,
+    valor_nominal_base: float,
+    bloque: int = 2048,
+):
+    """
+    Valora un mismo calendario de pagos en una serie de fechas con flujos y tasas de
+    descuento propios de cada fecha (p. ej. cupones indexados al IBR del día).
+
+    En cada fecha solo cuentan los cupones posteriores a ella, así que el corte del
+    calendario avanza con la fecha sin volver a generarlo. Se aplican las convenciones
+    de las calculadoras: días de descuento sin 29 de febrero, t en base 365, precio
+    sucio truncado a 3 decimales y cupón corrido con `calcular_cupon_corrido_lote`.
+    Las fechas se procesan por bloques de `bloque` filas para acotar la memoria.
+
+    Parámetros:
+    fechas_cupon (tuple): Fechas de pago (n,) descompuestas (`descomponer_fechas`), en orden.
+    inicios_periodo (tuple): Inicio del período de cada cupón (n,) descompuesto.
+    cf_primero (array-like): Flujo (n,) de cada cupón cuando es el próximo a pagar.
+    dias_primero (array-like): Días (n,) de cada período cuando es el próximo a pagar.
+    fechas_valoracion (tuple): Fechas (d,) descompuestas, anteriores al vencimiento.
+    flujos (array-like): Matriz d x n con el flujo (base 100) de cada cupón visto desde
+        cada fecha; solo se usan los cupones posteriores a la fecha.
+    tasas_descuento (array-like): Tasa EA (%) de descuento de cada fecha (d,).
+    base_intereses (str): '30/360' o '365/365'.
+    valor_nominal_base (float): Nominal incluido en el último flujo (no causa intereses).
+
+    Retorna:
+    dict: Arreglos (d,) "precio_sucio", "cupon_corrido", "macaulay" y "duracion_mod".
+    """
+    if base_intereses not in ("30/360", "365/365"):
+        raise ValueError("Base de conteo no soportada. Use '30/360' o '365/365'.")
+
+    flujos = np.asarray(flujos, dtype=float)
+    tasas_descuento = np.asarray(tasas_descuento, dtype=float)
+    cf_primero = np.asarray(cf_primero, dtype=float)
+    dias_primero = np.asarray(dias_primero, dtype=float)
+    ordinal_cupon = fechas_cupon[0]
+    n_fechas = len(fechas_valoracion[0])
+
+    if n_fechas and fechas_valoracion[0].max() >= ordinal_cupon[-1]:
+        raise ValueError(
+            "❌ Las fechas de valoración deben ser anteriores al vencimiento."
+        )
+
+    precio_sucio = np.empty(n_fechas)
+    suma_t_vp = np.empty(n_fechas)
+    cupon = tuple(parte[None, :] for parte in fechas_cupon)
+    for inicio in range(0, n_fechas, bloque):
+        tramo = slice(inicio, inicio + bloque)
+        fechas = tuple(parte[tramo, None] for parte in fechas_valoracion)
+        vigente = ordinal_cupon[None, :] > fechas[0]
+        t = np.where(vigente, dias_sin_29_febrero(fechas, cupon), 0) / 365
+        vp = np.where(
+            vigente,
+            flujos[tramo] / (1 + tasas_descuento[tramo, None] / 100) ** t,
+            0.0,
+        )
+        precio_sucio[tramo] = np.floor(vp.sum(axis=1) * 1000) / 1000
+        suma_t_vp[tramo] = (vp * t).sum(axis=1)
+
+    cupon_corrido = calcular_cupon_corrido_lote(
+        fechas_cupon=cupon,
+        inicios_periodo=tuple(parte[None, :] for parte in inicios_periodo),
+        cf_primero=cf_primero[None, :],
+        dias_primero=dias_primero[None, :],
+        n_cupones=np.array([len(cf_primero)]),
+        fechas_liquidacion=fechas_valoracion,
+        base_360=np.array([base_intereses == "30/360"]),
+        valor_nominal_base=np.array([valor_nominal_base], dtype=float),
+    )[0]
+    macaulay = suma_t_vp / precio_sucio
+
+    return {
+        "precio_sucio": precio_sucio,
+        "cupon_corrido": cupon_corrido,
+        "macaulay": macaulay,
+        "duracion_mod": macaulay / (1 + tasas_descuento / 100),
+    }
@@ -1,10 +1,12 @@
 import calendar
 from datetime import datetime
-from math import pow
 
+import numpy as np
 import pandas as pd
 from dateutil.relativedelta import relativedelta
 
+from logic.descuento_logic import divisores_descuento
+
 
 def generar_fechas(
     fecha_inicio: datetime,
@@ -75,11 +77,12 @@ def calcular_diferencias_fechas_pago_cupon(
     Returns:
         list[int]: Lista de diferencias en días entre fechas consecutivas.
     """
-    if len(lista_fechas) < 2:
+    if not lista_fechas:
         return []
 
-    # Convertimos la lista de fechas a objetos datetime
-    fechas = [pd.to_datetime(fecha, format="%d/%m/%Y") for fecha in lista_fechas]
+    # Convertimos la lista de fechas a objetos datetime (strptime: mucho más rápido
+    # que pd.to_datetime elemento a elemento)
+    fechas = [datetime.strptime(fecha, "%d/%m/%Y") for fecha in lista_fechas]
 
     diferencias_list = []
 
@@ -104,7 +107,7 @@ def calcular_diferencias_fechas_pago_cupon(
             if ignorar_bisiesto:
                 for año in range(fecha_anterior.year, fecha_actual.year + 1):
                     if calendar.isleap(año):  # Verifica si es bisiesto
-                        fecha_bisiesto = pd.Timestamp(year=año, month=2, day=29)
+                        fecha_bisiesto = datetime(año, 2, 29)
                         if fecha_anterior <= fecha_bisiesto <= fecha_actual:
                             diferencia -= 1  # Resta un día
 
@@ -145,7 +148,7 @@ def calcular_numero_dias_descuento_cupon(fecha_negociacion, lista_fechas):
     # Convertimos la fecha de negociación a datetime
     fecha_negociacion = pd.to_datetime(fecha_negociacion, format="%d/%m/%Y")
     # Convertimos las fechas de la lista a datetime
-    fechas = [pd.to_datetime(fecha, format="%d/%m/%Y") for fecha in lista_fechas]
+    fechas = [datetime.strptime(fecha, "%d/%m/%Y") for fecha in lista_fechas]
 
     diferencias_list = []
 
@@ -155,7 +158,7 @@ def calcular_numero_dias_descuento_cupon(fecha_negociacion, lista_fechas):
         # Verificar si el rango de fechas incluye un 29 de febrero en un año bisiesto
         for año in range(fecha_negociacion.year, fecha_actual.year + 1):
             if calendar.isleap(año):  # Verifica si el año es bisiesto
-                fecha_29_febrero = pd.Timestamp(year=año, month=2, day=29)
+                fecha_29_febrero = datetime(año, 2, 29)
                 if fecha_negociacion <= fecha_29_febrero <= fecha_actual:
                     diferencia -= (
                         1  # Restar un día si el período abarca el 29 de febrero
@@ -193,6 +196,7 @@ def calcular_vp_cfs(
 ):
     """
     Calcula el valor presente de una lista de cupones futuros descontados a la fecha de negociación.
+    Los divisores de descuento se leen de la tabla compartida por tasa (`divisores_descuento`).
 
     Parámetros:
     - lista_cfs (list[float]): Lista de flujos de caja futuros.
@@ -203,13 +207,13 @@ def calcular_vp_cfs(
     - list[float]: Lista con los valores presentes de cada flujo de caja.
     """
 
-    tasa_mercado = tasa_mercado / 100
-
-    vp_cfs = [
-        CFt
-        / pow(1 + tasa_mercado, dias / 365)  # siempre por 365 ya sea 365/365 o 30/360
-        for CFt, dias in zip(lista_cfs, lista_dias_descuento)
-    ]
+    # siempre por 365 ya sea 365/365 o 30/360
+    vp_cfs = (
+        np.asarray(lista_cfs, dtype=float)
+        / divisores_descuento(
+            tasa_mercado=tasa_mercado, lista_dias=lista_dias_descuento
+        )
+    ).tolist()
 
     return vp_cfs
 
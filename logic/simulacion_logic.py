@@ -0,0 +1,147 @@
+import numpy as np
+
+
+def calibrar_vasicek(tasas: np.ndarray, paso_anios: float):
+    """
+    Calibra un modelo de Vasicek dr = a(b - r)dt + sigma dW con una regresión AR(1)
+    sobre una serie histórica de tasas observadas a intervalos regulares.
+
+    Parámetros:
+    tasas (np.ndarray): Serie histórica de tasas (en porcentaje).
+    paso_anios (float): Intervalo entre observaciones en años.
+
+    Retorna:
+    tuple[float, float, float]: Velocidad de reversión (a), media de largo plazo (b) y volatilidad (sigma).
+    """
+    tasas = np.asarray(tasas, dtype=float)
+    tasas = tasas[np.isfinite(tasas)]
+
+    if len(tasas) < 3:
+        raise ValueError("Se requieren al menos 3 observaciones para calibrar.")
+
+    x, y = tasas[:-1], tasas[1:]
+    beta, alfa = np.polyfit(x, y, 1)
+    residuos = y - (alfa + beta * x)
+
+    # Sin reversión a la media observable: se limita beta para mantener el modelo estable
+    beta = float(np.clip(beta, 1e-6, 1 - 1e-6))
+
+    a = -np.log(beta) / paso_anios
+    b = alfa / (1 - beta)
+    sigma = np.std(residuos, ddof=1) * np.sqrt(2 * a / (1 - beta**2))
+
+    return a, b, sigma
+
+
+def simular_vasicek(
+    tasa_inicial: float,
+    a: float,
+    b: float,
+    sigma: float,
+    tiempos: np.ndarray,
+    n_trayectorias: int,
+    rng: np.random.Generator,
+):
+    """
+    Simula trayectorias de Vasicek con la discretización exacta sobre una grilla
+    de tiempos (en años desde hoy) no necesariamente regular.
+
+    Retorna:
+    np.ndarray: Matriz (trayectorias x tiempos) con la tasa simulada en cada tiempo.
+    """
+    tiempos = np.asarray(tiempos, dtype=float)
+    pasos = np.diff(tiempos, prepend=0.0)
+
+    decaimiento = np.exp(-a * pasos)
+    desviacion = sigma * np.sqrt((1 - np.exp(-2 * a * pasos)) / (2 * a))
+
+    trayectorias = np.empty((n_trayectorias, len(tiempos)))
+    tasa = np.full(n_trayectorias, float(tasa_inicial))
+    for k in range(len(tiempos)):
+        tasa = (
+            tasa * decaimiento[k]
+            + b * (1 - decaimiento[k])
+            + desviacion[k] * rng.standard_normal(n_trayectorias)
+        )
+        trayectorias[:, k] = tasa
+
+    return trayectorias
+
+
+def resumir_distribucion(valores: np.ndarray, percentiles=(1, 5, 25, 50, 75, 95, 99)):
+    """
+    Resume una distribución simulada en media, desviación estándar y percentiles.
+
+    Retorna:
+    dict: {"Media", "Desv. Estándar", "P1", "P5", ...}
+    """
+    resumen = {
+        "Media": float(np.mean(valores)),
+        "Desv. Estándar": float(np.std(valores, ddof=1)) if len(valores) > 1 else 0.0,
+    }
+    for p, valor in zip(percentiles, np.percentile(valores, percentiles)):
+        resumen[f"P{p}"] = float(valor)
+    return resumen
+
+
+def ajustar_ar(serie: np.ndarray, orden: int = 1):
+    """
+    Ajusta por mínimos cuadrados un modelo autorregresivo AR(p) con intercepto:
+    x_t = c + phi_1 x_{t-1} + ... + phi_p x_{t-p} + e_t
+
+    Parámetros:
+    serie (np.ndarray): Serie histórica (por ejemplo, inflación anual mensual en porcentaje).
+    orden (int): Número de rezagos p.
+
+    Retorna:
+    tuple[float, np.ndarray, float]: Intercepto c, coeficientes (phi_1..phi_p) y desviación de los residuos.
+    """
+    serie = np.asarray(serie, dtype=float)
+    serie = serie[np.isfinite(serie)]
+
+    if len(serie) <= orden + 2:
+        raise ValueError(
+            f"Se requieren más de {orden + 2} observaciones para ajustar un AR({orden})."
+        )
+
+    y = serie[orden:]
+    rezagos = np.column_stack(
+        [serie[orden - k : len(serie) - k] for k in range(1, orden + 1)]
+    )
+    x = np.column_stack([np.ones(len(y)), rezagos])
+    beta, *_ = np.linalg.lstsq(x, y, rcond=None)
+    residuos = y - x @ beta
+
+    return beta[0], beta[1:], np.std(residuos, ddof=orden + 1)
+
+
+def simular_ar(
+    historia: np.ndarray,
+    constante: float,
+    coeficientes: np.ndarray,
+    sigma: float,
+    n_pasos: int,
+    n_trayectorias: int,
+    rng: np.random.Generator,
+):
+    """
+    Simula trayectorias de un AR(p) partiendo de las últimas p observaciones de `historia`.
+
+    Retorna:
+    np.ndarray: Matriz (trayectorias x n_pasos) con los valores simulados.
+    """
+    orden = len(coeficientes)
+    ultimos = np.asarray(historia, dtype=float)[-orden:][::-1]  # x_{t-1}, ..., x_{t-p}
+    rezagos = np.tile(ultimos, (n_trayectorias, 1))
+
+    trayectorias = np.empty((n_trayectorias, n_pasos))
+    for k in range(n_pasos):
+        valor = (
+            constante
+            + rezagos @ coeficientes
+            + sigma * rng.standard_normal(n_trayectorias)
+        )
+        trayectorias[:, k] = valor
+        rezagos = np.column_stack([valor, rezagos[:, :-1]])
+
+    return trayectorias
@@ -0,0 +1,141 @@
+import numpy as np
+
+
+def armar_matrices_flujos(lista_dias: list, lista_flujos: list):
+    """
+    Construye las matrices rellenadas (bonos x flujos) que usa `calcular_xirr_batch`.
+
+    Parámetros:
+    lista_dias (list[array-like]): Por cada bono, los días de cada flujo contados desde
+        su primer flujo (la fecha de negociación). Se admiten días repetidos.
+    lista_flujos (list[array-like]): Por cada bono, los montos de cada flujo (mismo largo).
+
+    Retorna:
+    tuple[np.ndarray, np.ndarray]: Matriz de tiempos en años (días / 365) y matriz de flujos.
+    Las posiciones de relleno quedan en cero y no aportan al valor presente.
+    """
+    if len(lista_dias) != len(lista_flujos):
+        raise ValueError("Las listas de días y flujos deben tener la misma longitud.")
+
+    n_bonos = len(lista_flujos)
+    n_max = max((len(flujos) for flujos in lista_flujos), default=0)
+
+    tiempos = np.zeros((n_bonos, n_max))
+    flujos = np.zeros((n_bonos, n_max))
+
+    for i, (dias, montos) in enumerate(zip(lista_dias, lista_flujos)):
+        if len(dias) != len(montos):
+            raise ValueError(
+                f"El bono {i} tiene un número distinto de fechas y de flujos."
+            )
+        tiempos[i, : len(dias)] = np.asarray(dias, dtype=float) / 365
+        flujos[i, : len(montos)] = np.asarray(montos, dtype=float)
+
+    return tiempos, flujos
+
+
+def _vpn_y_derivada(tasa: np.ndarray, tiempos: np.ndarray, flujos: np.ndarray):
+    """
+    Valor presente neto y su derivada respecto a la tasa, por fila.
+    """
+    base = 1 + tasa[:, None]
+    descuento = base**-tiempos
+    vpn = (flujos * descuento).sum(axis=1)
+    derivada = (-tiempos * flujos * descuento / base).sum(axis=1)
+    return vpn, derivada
+
+
+def _biseccion(tiempos, flujos, tol, max_iter):
+    """
+    Bisección vectorizada en [-0.9999, cota] donde la cota se amplía hasta encontrar
+    cambio de signo. Las filas sin cambio de signo, o con flujos, tiempos o VPN no
+    finitos, retornan NaN.
+    """
+    n_bonos = flujos.shape[0]
+    bajo = np.full(n_bonos, -0.9999)
+    alto = np.full(n_bonos, 1.0)
+
+    vpn_bajo, _ = _vpn_y_derivada(bajo, tiempos, flujos)
+    vpn_alto, _ = _vpn_y_derivada(alto, tiempos, flujos)
+    for _ in range(20):  # Ampliar la cota superior hasta ~1e6 (100.000.000%)
+        sin_cambio = np.sign(vpn_bajo) == np.sign(vpn_alto)
+        if not sin_cambio.any():
+            break
+        alto = np.where(sin_cambio, alto * 2 + 1, alto)
+        vpn_alto, _ = _vpn_y_derivada(alto, tiempos, flujos)
+
+    # np.sign(nan) != np.sign(nan) es True: las filas no finitas se descartan aparte
+    finitos = np.isfinite(flujos).all(axis=1) & np.isfinite(tiempos).all(axis=1)
+    valido = (
+        finitos
+        & np.isfinite(vpn_bajo)
+        & np.isfinite(vpn_alto)
+        & (np.sign(vpn_bajo) != np.sign(vpn_alto))
+    )
+
+    for _ in range(max_iter):
+        medio = (bajo + alto) / 2
+        vpn_medio, _ = _vpn_y_derivada(medio, tiempos, flujos)
+        mismo_signo = np.sign(vpn_medio) == np.sign(vpn_bajo)
+        bajo = np.where(mismo_signo, medio, bajo)
+        vpn_bajo = np.where(mismo_signo, vpn_medio, vpn_bajo)
+        alto = np.where(mismo_signo, alto, medio)
+        if np.all(alto - bajo < tol):
+            break
+
+    return np.where(valido, (bajo + alto) / 2, np.nan)
+
+
+def calcular_xirr_batch(
+    tiempos: np.ndarray,
+    flujos: np.ndarray,
+    tasa_inicial: float = 0.1,
+    tol: float = 1e-10,
+    max_iter: int = 50,
+):
+    """
+    Resuelve la TIR (XIRR, base 365) de muchos bonos a la vez.
+
+    Usa Newton-Raphson vectorizado sobre todas las filas y, para las filas que no
+    convergen (derivada nula, tasa <= -100% o valores no finitos), una bisección
+    vectorizada como respaldo.
+
+    Parámetros:
+    tiempos (np.ndarray): Matriz (bonos x flujos) de tiempos en años desde el primer flujo.
+    flujos (np.ndarray): Matriz (bonos x flujos) de montos; el relleno debe ser cero.
+    tasa_inicial (float): Punto de partida de Newton en decimal.
+    tol (float): Tolerancia sobre el cambio de la tasa.
+    max_iter (int): Iteraciones máximas de Newton.
+
+    Retorna:
+    np.ndarray: TIR en decimal por bono (NaN si no existe solución).
+    """
+    tiempos = np.atleast_2d(np.asarray(tiempos, dtype=float))
+    flujos = np.atleast_2d(np.asarray(flujos, dtype=float))
+
+    if tiempos.shape != flujos.shape:
+        raise ValueError("Las matrices de tiempos y flujos deben tener la misma forma.")
+
+    tasa = np.full(flujos.shape[0], tasa_inicial)
+    convergido = np.zeros(flujos.shape[0], dtype=bool)
+
+    with np.errstate(all="ignore"):
+        for _ in range(max_iter):
+            activos = ~convergido
+            if not activos.any():
+                break
+            vpn, derivada = _vpn_y_derivada(
+                tasa[activos], tiempos[activos], flujos[activos]
+            )
+            paso = vpn / derivada
+            nueva = tasa[activos] - paso
+            tasa[activos] = nueva
+            convergido[activos] = np.isfinite(nueva) & (np.abs(paso) < tol)
+
+        fallidos = ~convergido | ~np.isfinite(tasa) | (tasa <= -1)
+        if fallidos.any():
+            tasa[fallidos] = _biseccion(
+                tiempos[fallidos], flujos[fallidos], tol=tol, max_iter=200
+            )
+
+    return tasa
@@ -0,0 +1,225 @@
+"""
+Servicio HTTP local de valoración de bonos (tasa fija, IBR e IPC).
+
+Expone las calculadoras a otros sistemas sobre un grupo de procesos ya preparados
+(festivos, hojas del archivo de proyecciones e histórico local de IBR cargados), de
+modo que las solicitudes no pagan el costo de importación ni de carga.
+
+Endpoints:
+    GET  /salud     Estado del servicio y valoraciones en curso.
+    POST /valorar   Una posición (objeto JSON), varias (lista JSON) o una tabla Arrow
+                    (Content-Type application/vnd.apache.arrow.stream), con las
+                    columnas de `valorar_lote.py`.
+
+La respuesta tiene una fila por posición con sus métricas y la columna "error"; es
+Arrow si la solicitud lo pide (Accept o Content-Type Arrow) y JSON en otro caso.
+Con todos los cupos ocupados responde 503 (con Retry-After) y si la valoración supera
+el tiempo límite, 504.
+
+Uso:
+    python servidor_precios.py --proyecciones proyecciones.xlsx --trabajadores 4
+"""
+
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as TiempoAgotado
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pyarrow as pa
+
+from data_handling.lote_data import preparar_trabajador, procesar_bloque
+
+TIPO_ARROW = "application/vnd.apache.arrow.stream"
+TIPO_JSON = "application/json"
+
+
+def leer_solicitud(cuerpo: bytes, tipo_contenido: str):
+    """
+    Convierte el cuerpo de la solicitud (JSON u Arrow) en un bloque de posiciones con
+    la columna "fila" (posición dentro de la solicitud).
+    """
+    if tipo_contenido.startswith(TIPO_ARROW):
+        posiciones = pa.ipc.open_stream(cuerpo).read_all().to_pandas()
+    else:
+        datos = json.loads(cuerpo)
+        posiciones = pd.DataFrame([datos] if isinstance(datos, dict) else datos)
+    posiciones.insert(0, "fila", range(len(posiciones)))
+    return posiciones
+
+
+def armar_respuesta(resultados: pd.DataFrame, fallas: pd.DataFrame, arrow: bool):
+    """
+    Une resultados y fallas en una sola tabla ordenada por "fila" y la serializa.
+
+    Retorna:
+    tuple[bytes, str]: Cuerpo y tipo de contenido.
+    """
+    tabla = pd.concat(
+        [df for df in (resultados, fallas) if not df.empty] or [resultados],
+        ignore_index=True,
+    ).sort_values("fila", ignore_index=True)
+    if "error" not in tabla.columns:
+        tabla["error"] = None
+    if arrow:
+        sumidero = pa.BufferOutputStream()
+        arrow_tabla = pa.Table.from_pandas(tabla, preserve_index=False)
+        with pa.ipc.new_stream(sumidero, arrow_tabla.schema) as escritor:
+            escritor.write_table(arrow_tabla)
+        return sumidero.getvalue().to_pybytes(), TIPO_ARROW
+    cuerpo = tabla.to_json(
+        orient="records", force_ascii=False, date_format="iso", double_precision=15
+    )
+    return cuerpo.encode("utf-8"), f"{TIPO_JSON}; charset=utf-8"
+
+
+def crear_manejador(
+    pool: ProcessPoolExecutor,
+    max_en_curso: int,
+    tiempo_limite: float,
+    max_filas: int,
+    max_bytes: int,
+):
+    """
+    Manejador HTTP que reparte las valoraciones en `pool`, con un máximo de
+    `max_en_curso` simultáneas (contrapresión) y `tiempo_limite` segundos por solicitud.
+    """
+    estado = {"en_curso": 0, "atendidas": 0, "rechazadas": 0}
+    candado = threading.Lock()
+
+    def liberar(_):
+        with candado:
+            estado["en_curso"] -= 1
+
+    class Manejador(BaseHTTPRequestHandler):
+        # Tiempo máximo de espera del socket al leer la solicitud
+        timeout = tiempo_limite
+
+        def _responder(self, codigo: int, cuerpo: bytes, tipo: str, extra=None):
+            self.send_response(codigo)
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(cuerpo)))
+            for nombre, valor in (extra or {}).items():
+                self.send_header(nombre, valor)
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def _error(self, codigo: int, mensaje: str, extra=None):
+            cuerpo = json.dumps({"error": mensaje}, ensure_ascii=False).encode("utf-8")
+            self._responder(codigo, cuerpo, f"{TIPO_JSON}; charset=utf-8", extra)
+
+        def do_GET(self):
+            if self.path != "/salud":
+                return self._error(404, "Ruta no encontrada.")
+            with candado:
+                cuerpo = {"estado": "ok", "max_en_curso": max_en_curso, **estado}
+            self._responder(200, json.dumps(cuerpo).encode("utf-8"), TIPO_JSON)
+
+        def do_POST(self):
+            if self.path != "/valorar":
+                return self._error(404, "Ruta no encontrada.")
+            longitud = int(self.headers.get("Content-Length") or 0)
+            if longitud > max_bytes:
+                return self._error(413, f"El cuerpo supera {max_bytes} bytes.")
+            tipo_contenido = self.headers.get("Content-Type", TIPO_JSON)
+            arrow = TIPO_ARROW in (self.headers.get("Accept") or tipo_contenido)
+            try:
+                posiciones = leer_solicitud(self.rfile.read(longitud), tipo_contenido)
+            except (ValueError, pa.ArrowInvalid) as e:
+                return self._error(400, f"Cuerpo no válido: {e}")
+            if len(posiciones) > max_filas:
+                return self._error(413, f"La solicitud supera {max_filas} posiciones.")
+
+            with candado:
+                if estado["en_curso"] >= max_en_curso:
+                    estado["rechazadas"] += 1
+                    saturado = True
+                else:
+                    estado["en_curso"] += 1
+                    estado["atendidas"] += 1
+                    saturado = False
+            if saturado:
+                return self._error(
+                    503, "Servicio saturado, intenta de nuevo.", {"Retry-After": "1"}
+                )
+
+            futuro = pool.submit(procesar_bloque, posiciones)
+            # El cupo se libera cuando el proceso termina, aunque la solicitud expire
+            futuro.add_done_callback(liberar)
+            try:
+                resultados, fallas = futuro.result(timeout=tiempo_limite)
+            except TiempoAgotado:
+                futuro.cancel()
+                return self._error(504, "La valoración superó el tiempo límite.")
+            except ValueError as e:
+                return self._error(400, str(e))
+            except Exception as e:
+                return self._error(500, f"Error interno: {e}")
+
+            self._responder(200, *armar_respuesta(resultados, fallas, arrow))
+
+    return Manejador
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8600)
+    parser.add_argument("--trabajadores", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--fuente",
+        choices=("proyecciones", "banrep"),
+        default="proyecciones",
+        help="Tasas IBR/IPC del archivo de proyecciones o del histórico local de BanRep.",
+    )
+    parser.add_argument("--proyecciones", help="Excel de proyecciones (IBR/IPC).")
+    parser.add_argument(
+        "--cola",
+        type=int,
+        default=2,
+        help="Valoraciones en curso por trabajador antes de responder 503.",
+    )
+    parser.add_argument("--tiempo-limite", type=float, default=30.0)
+    parser.add_argument("--max-filas", type=int, default=10000)
+    parser.add_argument("--max-mb", type=float, default=32.0)
+    args = parser.parse_args()
+
+    if args.fuente == "proyecciones" and not args.proyecciones:
+        parser.error("--fuente proyecciones requiere --proyecciones <archivo.xlsx>.")
+    if args.trabajadores < 1 or args.cola < 1:
+        parser.error("--trabajadores y --cola deben ser mayores a cero.")
+
+    ruta_proyecciones = args.proyecciones if args.fuente == "proyecciones" else None
+    with ProcessPoolExecutor(
+        max_workers=args.trabajadores,
+        initializer=preparar_trabajador,
+        initargs=(args.fuente, ruta_proyecciones, True),
+    ) as pool:
+        # Arranca y prepara todos los procesos antes de aceptar solicitudes
+        for futuro in [pool.submit(int) for _ in range(args.trabajadores)]:
+            futuro.result()
+
+        servidor = ThreadingHTTPServer(
+            (args.host, args.puerto),
+            crear_manejador(
+                pool,
+                max_en_curso=args.trabajadores * args.cola,
+                tiempo_limite=args.tiempo_limite,
+                max_filas=args.max_filas,
+                max_bytes=int(args.max_mb * 1024 * 1024),
+            ),
+        )
+        print(f"Servicio de valoración en http://{args.host}:{args.puerto}")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
 import streamlit as st
 
+from data_handling.calentamiento_data import iniciar_calentamiento
+from utils.cache_streamlit import activar_cache_streamlit
+from utils.configuracion import CALENTAR_AL_INICIO
+
 st.set_page_config(
     page_title="Calculadora Financiera Interactiva",
     layout="wide",
@@ -12,6 +16,21 @@ tasa_fija_page = st.Page(
 )
 ibr_page = st.Page("app_pages/ibr_page.py", title="IBR", icon=":material/attach_money:")
 ipc_page = st.Page("app_pages/ipc_page.py", title="IPC", icon=":material/money_bag:")
+portafolio_page = st.Page(
+    "app_pages/portafolio_page.py", title="Portafolio", icon=":material/work:"
+)
+
+# Lecturas del archivo de proyecciones con caché compartida
+activar_cache_streamlit()
 
-pg = st.navigation({"Calculadoras": [tasa_fija_page, ibr_page, ipc_page]})
+# Calendario, histórico de IBR y fechas de publicación, en segundo plano (una vez por proceso)
+if CALENTAR_AL_INICIO:
+    iniciar_calentamiento()
+
+pg = st.navigation(
+    {
+        "Calculadoras": [tasa_fija_page, ibr_page, ipc_page],
+        "Portafolio": [portafolio_page],
+    }
+)
 pg.run()
@@ -0,0 +1,130 @@
+import streamlit as st
+
+from data_handling.archivos_data import registrar_liberacion_archivo
+from data_handling.exportacion_data import exportar_tabla
+from data_handling.ibr_data import generar_cashflows_df_ibr, generar_flujos_real_df_ibr
+from data_handling.ipc_data import generar_cashflows_df_ipc, generar_flujos_real_df_ipc
+from data_handling.shared_data import (
+    HOJAS_PROYECCIONES,
+    leer_hoja_excel,
+    registrar_lector_excel,
+)
+from data_handling.tasa_fija_data import generar_cashflows_df_tf
+from utils.configuracion import MAX_ENTRADAS_CACHE, TTL_DATOS_EN_LINEA
+from utils.helper_functions import huella_archivo
+from utils.proteccion_banrep import registrar_recuperacion_banrep
+
+# Cachés de Streamlit compartidas entre reruns, páginas y sesiones. Las llaves se
+# arman con los valores de entrada y, en lugar del archivo subido (argumento con
+# guion bajo, que Streamlit no convierte en llave), con la huella de su contenido.
+
+
+@st.cache_resource
+def activar_cache_streamlit():
+    """
+    Registra (una vez por proceso) la lectura del archivo de proyecciones con caché
+    de Streamlit, para que la usen todas las calculadoras. La consulta a BanRep tiene
+    su propia caché por proceso (`utils.cache_tasas`).
+    """
+    registrar_lector_excel(leer_hoja_excel_cache)
+    registrar_liberacion_archivo(liberar_hojas_excel_cache)
+    # Valoraciones IBR hechas con datos de respaldo mientras BanRep no respondía
+    registrar_recuperacion_banrep(_cashflows_ibr.clear)
+    registrar_recuperacion_banrep(_flujos_real_ibr.clear)
+
+
+def leer_hoja_excel_cache(nombre_hoja: str, archivo):
+    """
+    Hoja validada del archivo de proyecciones, leída una vez por contenido y hoja.
+    """
+    return _leer_hoja_excel(huella_archivo(archivo), nombre_hoja, archivo)
+
+
+@st.cache_data(max_entries=MAX_ENTRADAS_CACHE, show_spinner=False)
+def _leer_hoja_excel(huella, nombre_hoja, _archivo):
+    return leer_hoja_excel(nombre_hoja, archivo=_archivo)
+
+
+def liberar_hojas_excel_cache(huella: str):
+    """
+    Descarta las hojas leídas de un archivo que ya no referencia ninguna sesión.
+    """
+    for nombre_hoja in HOJAS_PROYECCIONES:
+        _leer_hoja_excel.clear(huella, nombre_hoja, None)
+
+
+@st.cache_data(max_entries=MAX_ENTRADAS_CACHE, show_spinner=False)
+def exportar_tabla_cache(df, formato):
+    """
+    `exportar_tabla` con caché por contenido de la tabla y formato: los reruns de los
+    paneles de resultados no vuelven a serializarla.
+    """
+    return exportar_tabla(df, formato)
+
+
+def generar_cashflows_df_tf_cache(**parametros):
+    """
+    `generar_cashflows_df_tf` con caché por valores de entrada.
+    """
+    return _cashflows_tf(**parametros)
+
+
+@st.cache_data(max_entries=MAX_ENTRADAS_CACHE, show_spinner=False)
+def _cashflows_tf(**parametros):
+    return generar_cashflows_df_tf(**parametros)
+
+
+def generar_cashflows_df_ibr_cache(archivo=None, **parametros):
+    """
+    `generar_cashflows_df_ibr` con caché por valores de entrada y huella del archivo
+    de proyecciones (sin archivo, la IBR de BanRep vence tras `TTL_DATOS_EN_LINEA`).
+    """
+    return _cashflows_ibr(huella_archivo(archivo), archivo, **parametros)
+
+
+@st.cache_data(
+    ttl=TTL_DATOS_EN_LINEA, max_entries=MAX_ENTRADAS_CACHE, show_spinner=False
+)
+def _cashflows_ibr(huella, _archivo, **parametros):
+    return generar_cashflows_df_ibr(
+        archivo_subido=_archivo, archivo=_archivo, **parametros
+    )
+
+
+def generar_flujos_real_df_ibr_cache(archivo=None, **parametros):
+    """
+    `generar_flujos_real_df_ibr` con caché (ver `generar_cashflows_df_ibr_cache`).
+    """
+    return _flujos_real_ibr(huella_archivo(archivo), archivo, **parametros)
+
+
+@st.cache_data(
+    ttl=TTL_DATOS_EN_LINEA, max_entries=MAX_ENTRADAS_CACHE, show_spinner=False
+)
+def _flujos_real_ibr(huella, _archivo, **parametros):
+    return generar_flujos_real_df_ibr(archivo=_archivo, **parametros)
+
+
+def generar_cashflows_df_ipc_cache(archivo=None, **parametros):
+    """
+    `generar_cashflows_df_ipc` con caché por valores de entrada y huella del archivo
+    de proyecciones.
+    """
+    return _cashflows_ipc(huella_archivo(archivo), archivo, **parametros)
+
+
+@st.cache_data(max_entries=MAX_ENTRADAS_CACHE, show_spinner=False)
+def _cashflows_ipc(huella, _archivo, **parametros):
+    return generar_cashflows_df_ipc(archivo_subido=_archivo, **parametros)
+
+
+def generar_flujos_real_df_ipc_cache(archivo=None, **parametros):
+    """
+    `generar_flujos_real_df_ipc` con caché (ver `generar_cashflows_df_ipc_cache`).
+    """
+    return _flujos_real_ipc(huella_archivo(archivo), archivo, **parametros)
+
+
+@st.cache_data(max_entries=MAX_ENTRADAS_CACHE, show_spinner=False)
+def _flujos_real_ipc(huella, _archivo, **parametros):
+    return generar_flujos_real_df_ipc(archivo_subido=_archivo, **parametros)
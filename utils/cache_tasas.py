@@ -0,0 +1,78 @@
+import datetime
+import math
+import threading
+from concurrent.futures import Future
+
+from cachetools import TLRUCache
+
+from utils import configuracion
+
+# Caché en memoria de las series en línea, compartida por todos los hilos del proceso
+# (sesiones de Streamlit, servicio HTTP). Solo hay una consulta en vuelo por llave:
+# quien llega primero consulta y los demás esperan el mismo resultado (Future).
+
+# Días tras los cuales una ventana de la serie se considera definitiva (no vence)
+DIAS_SERIE_DEFINITIVA = 7
+
+# Máximo de ventanas guardadas (las de uso más antiguo salen primero)
+MAX_ENTRADAS_CACHE_TASAS = 1024
+
+_cache = TLRUCache(
+    maxsize=MAX_ENTRADAS_CACHE_TASAS, ttu=lambda clave, valor, ahora: ahora + valor[1]
+)
+_candado = threading.Lock()
+_contadores = {"aciertos": 0, "fallos": 0, "esperas": 0}
+
+
+def vigencia_ventana(fecha_fin: datetime.date):
+    """
+    Segundos de vigencia de una ventana: las que terminan hace más de
+    `DIAS_SERIE_DEFINITIVA` días no vencen; las recientes, tras `TTL_DATOS_EN_LINEA`.
+    """
+    limite = datetime.date.today() - datetime.timedelta(days=DIAS_SERIE_DEFINITIVA)
+    if fecha_fin < limite:
+        return math.inf
+    return configuracion.TTL_DATOS_EN_LINEA
+
+
+def consultar_una_vez(clave, consultar, vigencia: float):
+    """
+    Retorna el valor guardado bajo `clave` o lo obtiene con `consultar()`. Si otro
+    hilo ya lo está consultando, espera su resultado en lugar de repetir la consulta.
+    Los errores se propagan a todos los que esperaban y no se guardan.
+
+    Parámetros:
+    clave: Llave (hashable) de la consulta.
+    consultar: Función sin argumentos que obtiene el valor.
+    vigencia (float): Segundos que el valor permanece en la caché (math.inf: no vence).
+    """
+    with _candado:
+        entrada = _cache.get(clave)
+        if entrada is None:
+            futuro = Future()
+            _cache[clave] = (futuro, vigencia)
+            _contadores["fallos"] += 1
+        else:
+            futuro = entrada[0]
+            _contadores["aciertos" if futuro.done() else "esperas"] += 1
+    if entrada is not None:
+        return futuro.result()
+
+    try:
+        futuro.set_result(consultar())
+    except BaseException as e:
+        futuro.set_exception(e)
+        with _candado:
+            if _cache.get(clave, (None,))[0] is futuro:
+                del _cache[clave]
+    return futuro.result()
+
+
+def estadisticas_cache_tasas():
+    """
+    Retorna:
+    dict: "aciertos", "fallos" (consultas hechas), "esperas" (llamadas que esperaron
+    una consulta en vuelo) y "entradas" guardadas.
+    """
+    with _candado:
+        return {**_contadores, "entradas": len(_cache)}
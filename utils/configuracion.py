@@ -0,0 +1,53 @@
+import os
+from pathlib import Path
+
+# Configuración de la aplicación leída desde variables de entorno.
+
+# Directorio local para el histórico de series de BanRep y demás cachés en disco
+DIRECTORIO_DATOS = Path(
+    os.environ.get("CALCULADORA_RF_DATOS", Path.home() / ".cache" / "calculadora_rf")
+)
+
+# Memoria máxima (MB) de las tablas de factores de descuento compartidas entre bonos
+MEMORIA_FACTORES_DESCUENTO = (
+    int(os.environ.get("CALCULADORA_RF_MEMORIA_FACTORES_MB", 64)) * 1024 * 1024
+)
+
+# Backend de los kernels de valoración por lotes: "auto" (Numba si está instalado), "numba" o "numpy"
+BACKEND_CALCULO = os.environ.get("CALCULADORA_RF_BACKEND", "auto")
+
+# Fuente de la IBR cuando no hay archivo de proyecciones: "banrep" (API en línea) o
+# "local" (histórico local en DIRECTORIO_DATOS, que solo descarga los tramos faltantes)
+FUENTE_IBR = os.environ.get("CALCULADORA_RF_FUENTE_IBR", "banrep")
+
+# Vigencia (segundos) de los datos recientes de BanRep en caché y de las valoraciones
+# que dependen de ellos
+TTL_DATOS_EN_LINEA = int(os.environ.get("CALCULADORA_RF_TTL_EN_LINEA", 900))
+
+# Máximo de entradas por función en la caché de Streamlit (compartida entre sesiones)
+MAX_ENTRADAS_CACHE = int(os.environ.get("CALCULADORA_RF_MAX_ENTRADAS_CACHE", 128))
+
+# Tamaño máximo (MB) de la caché en disco de valoraciones, compartida entre procesos
+# (0 la desactiva)
+CACHE_DISCO_BYTES = (
+    int(os.environ.get("CALCULADORA_RF_CACHE_DISCO_MB", 256)) * 1024 * 1024
+)
+
+# Límites de las consultas a la API de BanRep: consultas por segundo y ráfaga máxima
+# (cubeta de fichas), espera máxima por una ficha y tiempo de respuesta (segundos)
+BANREP_CONSULTAS_POR_SEGUNDO = float(os.environ.get("CALCULADORA_RF_BANREP_CPS", 2))
+BANREP_RAFAGA = int(os.environ.get("CALCULADORA_RF_BANREP_RAFAGA", 5))
+BANREP_ESPERA_MAXIMA = float(os.environ.get("CALCULADORA_RF_BANREP_ESPERA", 5))
+BANREP_TIMEOUT = float(os.environ.get("CALCULADORA_RF_BANREP_TIMEOUT", 10))
+
+# Fallas seguidas que abren el interruptor de BanRep y segundos que permanece abierto
+# (mientras tanto la IBR se toma de los últimos datos conocidos)
+BANREP_FALLAS_APERTURA = int(os.environ.get("CALCULADORA_RF_BANREP_FALLAS", 3))
+BANREP_SEGUNDOS_ABIERTO = float(os.environ.get("CALCULADORA_RF_BANREP_ABIERTO", 60))
+
+# Calentamiento de cachés en segundo plano al iniciar la interfaz ("0" lo desactiva) y
+# días hacia atrás de la ventana de IBR y fechas de publicación que se precargan
+CALENTAR_AL_INICIO = os.environ.get("CALCULADORA_RF_CALENTAR", "1") != "0"
+VENTANA_CALENTAMIENTO_DIAS = int(
+    os.environ.get("CALCULADORA_RF_VENTANA_CALENTAMIENTO", 365)
+)
@@ -1,6 +1,8 @@
+import hashlib
 import math
 
 import numpy as np
+from cachetools.keys import hashkey
 
 
 def shift_list_with_replacement(lst, shift=1, fill_value=0.0):
@@ -30,3 +32,28 @@ def shift_list_with_replacement(lst, shift=1, fill_value=0.0):
 def truncate(number, decimals=3):
     factor = 10**decimals
     return math.floor(number * factor) / factor
+
+
+def huella_archivo(archivo):
+    """
+    Retorna una huella estable del contenido de un archivo para usarla como llave de caché.
+
+    :param archivo: Archivo subido (UploadedFile / BytesIO), ruta (str) o None
+    :return: Hash SHA-1 del contenido, o None si no hay archivo
+    """
+    if archivo is None:
+        return None
+    if hasattr(archivo, "huella"):  # Referencia del almacén de archivos compartidos
+        return archivo.huella
+    if isinstance(archivo, str):
+        with open(archivo, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    return hashlib.sha1(archivo.getvalue()).hexdigest()
+
+
+def clave_con_archivo(*args, archivo=None, **kwargs):
+    """
+    Llave de caché (cachetools) que reemplaza el argumento `archivo` por la huella de su contenido,
+    ya que los objetos subidos desde Streamlit no son comparables entre reruns.
+    """
+    return hashkey(*args, huella_archivo=huella_archivo(archivo), **kwargs)
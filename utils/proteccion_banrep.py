@@ -0,0 +1,165 @@
+import contextlib
+import contextvars
+import threading
+import time
+
+from utils import configuracion
+
+# Protección de las consultas a la API de BanRep, compartida por todo el proceso:
+# una cubeta de fichas limita la tasa de consultas salientes y un interruptor
+# (circuit breaker) deja de consultar tras varias fallas seguidas. Mientras está
+# abierto, la IBR se sirve con los últimos datos conocidos; la marca de datos
+# desactualizados viaja con cada resultado (no es del proceso) y, al recuperarse,
+# se limpian las cachés que los guardaron.
+
+_candado = threading.Lock()
+_cubeta = {"fichas": float(configuracion.BANREP_RAFAGA), "ultima": time.monotonic()}
+_interruptor = {"fallas": 0, "abierto_desde": None, "prueba_en_curso": False}
+_estado = {"respaldo_servido": False}
+
+# Registros activos en el contexto actual (hilo o tarea), ver `registrar_datos_desactualizados`
+_registros = contextvars.ContextVar("registros_desactualizados", default=())
+
+# Funciones sin argumentos llamadas cuando BanRep se recupera tras servir datos viejos
+_recuperaciones = []
+
+
+def registrar_recuperacion_banrep(funcion):
+    """
+    Registra una función (p. ej. limpiar una caché) que se llama cuando BanRep vuelve
+    a responder después de haberse servido datos desactualizados.
+    """
+    _recuperaciones.append(funcion)
+
+
+def _tomar_ficha():
+    """
+    Espera una ficha de la cubeta, como máximo `BANREP_ESPERA_MAXIMA` segundos.
+    """
+    limite = time.monotonic() + configuracion.BANREP_ESPERA_MAXIMA
+    while True:
+        with _candado:
+            ahora = time.monotonic()
+            _cubeta["fichas"] = min(
+                configuracion.BANREP_RAFAGA,
+                _cubeta["fichas"]
+                + (ahora - _cubeta["ultima"])
+                * configuracion.BANREP_CONSULTAS_POR_SEGUNDO,
+            )
+            _cubeta["ultima"] = ahora
+            if _cubeta["fichas"] >= 1:
+                _cubeta["fichas"] -= 1
+                return True
+            espera = (
+                1 - _cubeta["fichas"]
+            ) / configuracion.BANREP_CONSULTAS_POR_SEGUNDO
+        if ahora + espera > limite:
+            return False
+        time.sleep(espera)
+
+
+def permitir_consulta_banrep():
+    """
+    Indica si se puede consultar BanRep: el interruptor está cerrado (o semiabierto y
+    esta es la consulta de prueba) y hay una ficha disponible.
+    """
+    with _candado:
+        abierto_desde = _interruptor["abierto_desde"]
+        if abierto_desde is not None:
+            if (
+                _interruptor["prueba_en_curso"]
+                or time.monotonic() - abierto_desde
+                < configuracion.BANREP_SEGUNDOS_ABIERTO
+            ):
+                return False
+            _interruptor["prueba_en_curso"] = True
+    if _tomar_ficha():
+        return True
+    with _candado:
+        _interruptor["prueba_en_curso"] = False
+    return False
+
+
+def registrar_exito_banrep():
+    """
+    Cierra el interruptor y, si se habían servido datos desactualizados, llama las
+    funciones de recuperación registradas.
+    """
+    with _candado:
+        _interruptor.update(fallas=0, abierto_desde=None, prueba_en_curso=False)
+        recuperado = _estado["respaldo_servido"]
+        _estado["respaldo_servido"] = False
+    if recuperado:
+        for funcion in _recuperaciones:
+            funcion()
+
+
+def registrar_falla_banrep():
+    """
+    Cuenta una falla; el interruptor se abre tras `BANREP_FALLAS_APERTURA` fallas
+    seguidas o si falla la consulta de prueba.
+    """
+    with _candado:
+        _interruptor["fallas"] += 1
+        if (
+            _interruptor["prueba_en_curso"]
+            or _interruptor["fallas"] >= configuracion.BANREP_FALLAS_APERTURA
+        ):
+            _interruptor.update(abierto_desde=time.monotonic(), prueba_en_curso=False)
+
+
+@contextlib.contextmanager
+def registrar_datos_desactualizados():
+    """
+    Registra si lo calculado dentro del bloque usó datos viejos de la IBR. Los
+    registros son propios del hilo (o tarea) y se anidan: una marca llega a todos
+    los registros activos.
+
+    Uso:
+    with registrar_datos_desactualizados() as registro:
+        ...
+    registro["desactualizado"]  # True si se usaron datos de respaldo
+    """
+    registro = {"desactualizado": False}
+    token = _registros.set((*_registros.get(), registro))
+    try:
+        yield registro
+    finally:
+        _registros.reset(token)
+
+
+def marcar_datos_desactualizados():
+    """
+    Marca los registros activos: se usaron datos viejos de la IBR en lugar de los de
+    BanRep (directamente o desde una caché que los guardó).
+    """
+    for registro in _registros.get():
+        registro["desactualizado"] = True
+    with _candado:
+        _estado["respaldo_servido"] = True
+
+
+def estado_banrep():
+    """
+    Retorna:
+    dict: "interruptor" ("cerrado", "abierto" o "semiabierto"), "fallas" seguidas,
+    "fichas" disponibles y "desactualizado" (se sirvieron datos viejos desde la
+    última respuesta de BanRep).
+    """
+    with _candado:
+        abierto_desde = _interruptor["abierto_desde"]
+        if abierto_desde is None:
+            interruptor = "cerrado"
+        elif (
+            _interruptor["prueba_en_curso"]
+            or time.monotonic() - abierto_desde >= configuracion.BANREP_SEGUNDOS_ABIERTO
+        ):
+            interruptor = "semiabierto"
+        else:
+            interruptor = "abierto"
+        return {
+            "interruptor": interruptor,
+            "fallas": _interruptor["fallas"],
+            "fichas": _cubeta["fichas"],
+            "desactualizado": _estado["respaldo_servido"],
+        }
@@ -1,4 +1,131 @@
+import time
+
+import pandas as pd
+import streamlit as st
+
+from data_handling.curva_data import COLUMNAS_CURVA
+from data_handling.exportacion_data import FORMATOS_EXPORTACION
+from data_handling.valoracion_data import ETIQUETAS_ETAPAS
+from utils.cache_streamlit import exportar_tabla_cache
+
+# Aviso cuando la IBR se tomó de los datos de respaldo porque BanRep no respondía
+AVISO_DATOS_DESACTUALIZADOS = (
+    "⚠️ BanRep no está respondiendo: la IBR se tomó de los últimos datos conocidos "
+    "y puede estar desactualizada."
+)
+
+
 def display_errors(errors, placeholders):
     """Updates error placeholders dynamically based on the errors dictionary."""
     for key, placeholder in placeholders.items():
         placeholder.error(errors[key]) if key in errors else placeholder.empty()
+
+
+@st.fragment
+def selector_descuento(key):
+    """
+    Radio para elegir cómo se descuentan los flujos y, en modo curva, editor de los
+    instrumentos de tasa fija con los que se construye la curva cero. Es un fragmento:
+    cambiar el modo o editar la tabla no vuelve a ejecutar la página (el valor se lee
+    al enviar el formulario).
+
+    Retorna:
+    pd.DataFrame | None: Instrumentos de la curva, o None si se descuenta con la tasa.
+    """
+    modo = st.radio(
+        "**Descuento**",
+        ["Tasa de Mercado", "Curva Cero"],
+        index=0,
+        horizontal=True,
+        key=f"{key}_modo_descuento",
+        help="Curva Cero: descuenta cada flujo con la curva construida (bootstrapping) "
+        "a partir de los instrumentos de tasa fija de la tabla.",
+    )
+    if modo != "Curva Cero":
+        return None
+
+    instrumentos = pd.DataFrame(
+        {
+            "fecha_emision": ["01/01/2024"] * 5,
+            "fecha_vencimiento": [
+                "01/01/2026",
+                "01/01/2028",
+                "01/01/2031",
+                "01/01/2034",
+                "01/01/2039",
+            ],
+            "periodo_cupon": ["Anual"] * 5,
+            "base_intereses": ["365/365"] * 5,
+            "modalidad_tasa_cupon": ["EA"] * 5,
+            "tasa_cupon": [9.0, 9.25, 9.5, 9.75, 10.0],
+            "tasa_mercado": [9.0, 9.25, 9.5, 9.75, 10.0],
+        },
+        columns=COLUMNAS_CURVA,
+    )
+    with st.expander("Instrumentos Curva Cero", expanded=True):
+        return st.data_editor(
+            instrumentos,
+            num_rows="dynamic",
+            use_container_width=True,
+            hide_index=True,
+            key=f"{key}_instrumentos_curva",
+            column_config={
+                "periodo_cupon": st.column_config.SelectboxColumn(
+                    options=["Anual", "Semestral", "Trimestral", "Mensual"]
+                ),
+                "base_intereses": st.column_config.SelectboxColumn(
+                    options=["30/360", "365/365"]
+                ),
+                "modalidad_tasa_cupon": st.column_config.SelectboxColumn(
+                    options=["EA", "Nominal"]
+                ),
+            },
+        )
+
+
+def botones_descarga(df: pd.DataFrame, nombre_archivo: str, key: str):
+    """
+    Selector de formato (xlsx, Parquet o CSV) y botón para descargar la tabla (sin
+    volver a calcular). Solo se serializa el formato elegido, una vez por tabla.
+    """
+    col_formato, col_boton = st.columns([1, 2])
+    formato = col_formato.selectbox(
+        "Formato",
+        list(FORMATOS_EXPORTACION),
+        key=f"{key}_formato",
+        label_visibility="collapsed",
+    )
+    col_boton.download_button(
+        f"Descargar {formato}",
+        data=exportar_tabla_cache(df, formato),
+        file_name=f"{nombre_archivo}.{formato}",
+        mime=FORMATOS_EXPORTACION[formato],
+        key=f"{key}_descarga",
+        use_container_width=True,
+    )
+
+
+def mostrar_valoracion(estado: dict, mostrar: dict, progreso, errores):
+    """
+    Muestra los resultados de una valoración de fondo (`valorar_por_etapas`) a medida
+    que cada etapa termina, en el orden de `mostrar` (nombre de etapa -> función que
+    recibe su resultado). La barra de progreso se actualiza mientras espera, lo que
+    permite a Streamlit interrumpir la espera si el usuario vuelve a enviar el formulario.
+    """
+    mostradas = set()
+    while True:
+        terminado = estado["terminado"]
+        for nombre, funcion in mostrar.items():
+            if nombre not in mostradas and nombre in estado["resultados"]:
+                funcion(estado["resultados"][nombre])
+                mostradas.add(nombre)
+        if terminado:
+            break
+        etapa = ETIQUETAS_ETAPAS.get(estado["etapa"], "En cola")
+        progreso.progress(
+            len(estado["resultados"]) / estado["total"], text=f"Calculando: {etapa}..."
+        )
+        time.sleep(0.1)
+    progreso.empty()
+    if estado["error"]:
+        errores.error(estado["error"])
@@ -0,0 +1,110 @@
+"""
+Valorador por lotes sin interfaz gráfica (tasa fija, IBR e IPC).
+
+Lee el archivo de posiciones (CSV, Parquet o xlsx) por bloques, valida cada fila con
+las reglas de las calculadoras y escribe las métricas en Parquet, CSV o xlsx a medida que
+se calculan, sin cargar todo el libro en memoria. Las filas con error van al archivo
+de fallas.
+
+Uso:
+    python valorar_lote.py posiciones.csv resultados.parquet --proyecciones proy.xlsx
+    python valorar_lote.py posiciones.parquet resultados.csv --fuente banrep --trabajadores 4
+"""
+
+import argparse
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from data_handling.lote_data import (
+    abrir_escritor,
+    leer_posiciones_por_bloques,
+    preparar_trabajador,
+    procesar_bloque,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("entrada", help="Posiciones (.csv, .parquet o .xlsx).")
+    parser.add_argument("salida", help="Resultados (.parquet, .csv o .xlsx).")
+    parser.add_argument(
+        "--fallas",
+        help="Filas con error (.csv, .parquet o .xlsx). Por defecto <salida>_fallas.csv.",
+    )
+    parser.add_argument(
+        "--fuente",
+        choices=("proyecciones", "banrep"),
+        default="proyecciones",
+        help="Tasas IBR/IPC del archivo de proyecciones o del histórico local de BanRep.",
+    )
+    parser.add_argument("--proyecciones", help="Excel de proyecciones (IBR/IPC).")
+    parser.add_argument("--trabajadores", type=int, default=1)
+    parser.add_argument("--filas-bloque", type=int, default=5000)
+    args = parser.parse_args()
+
+    if args.fuente == "proyecciones" and not args.proyecciones:
+        parser.error("--fuente proyecciones requiere --proyecciones <archivo.xlsx>.")
+    if args.trabajadores < 1 or args.filas_bloque < 1:
+        parser.error("--trabajadores y --filas-bloque deben ser mayores a cero.")
+
+    salida = Path(args.salida)
+    ruta_fallas = args.fallas or salida.with_name(f"{salida.stem}_fallas.csv")
+    ruta_proyecciones = args.proyecciones if args.fuente == "proyecciones" else None
+    escribir, cerrar = abrir_escritor(salida)
+    escribir_fallas, cerrar_fallas = abrir_escritor(ruta_fallas)
+    bloques = leer_posiciones_por_bloques(args.entrada, args.filas_bloque)
+
+    inicio = time.perf_counter()
+    n_resultados = n_fallas = 0
+    try:
+        if args.trabajadores == 1:
+            preparar_trabajador(args.fuente, ruta_proyecciones)
+            procesados = map(procesar_bloque, bloques)
+        else:
+            procesados = _procesar_en_paralelo(
+                bloques, args.trabajadores, args.fuente, ruta_proyecciones
+            )
+        for resultados, fallas in procesados:
+            escribir(resultados)
+            escribir_fallas(fallas)
+            n_resultados += len(resultados)
+            n_fallas += len(fallas)
+            print(f"{n_resultados} posiciones valoradas, {n_fallas} con error")
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        cerrar()
+        cerrar_fallas()
+
+    print(
+        f"Listo en {time.perf_counter() - inicio:.1f} s: {n_resultados} en {salida}, "
+        f"{n_fallas} en {ruta_fallas}"
+    )
+    return 0
+
+
+def _procesar_en_paralelo(bloques, trabajadores: int, fuente: str, ruta_proyecciones):
+    """
+    Reparte los bloques entre procesos con a lo sumo dos bloques en curso por
+    trabajador, y entrega los resultados en el orden del archivo.
+    """
+    with ProcessPoolExecutor(
+        max_workers=trabajadores,
+        initializer=preparar_trabajador,
+        initargs=(fuente, ruta_proyecciones),
+    ) as pool:
+        en_curso = deque()
+        for bloque in bloques:
+            en_curso.append(pool.submit(procesar_bloque, bloque))
+            if len(en_curso) >= 2 * trabajadores:
+                yield en_curso.popleft().result()
+        while en_curso:
+            yield en_curso.popleft().result()
+
+
+if __name__ == "__main__":
+    sys.exit(main())